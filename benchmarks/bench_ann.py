@@ -0,0 +1,121 @@
+"""
+Benchmark de la recherche approchée (IVF) face à la recherche exacte du VectorIndex.
+
+Les vecteurs sont synthétiques : un mélange de gaussiennes normalisées, plus
+proche de vrais embeddings de texte qu'un bruit uniforme. Les requêtes sont
+des points du corpus légèrement perturbés. Pour chaque taille de corpus, le
+script mesure la construction de l'IVF puis, requête par requête (comme dans
+le chat), la latence et le rappel@k pour plusieurs valeurs de ``nprobe``.
+
+Usage :
+    python benchmarks/bench_ann.py --sizes 10000,100000,1000000 --dim 128 --top-k 25
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils.embeddings import normalize_rows  # noqa: E402
+from utils.vector_index import VectorIndex  # noqa: E402
+
+
+def synthetic_vectors(count: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = normalize_rows(rng.standard_normal((clusters, dim), dtype=np.float32))
+    vectors = np.empty((count, dim), dtype=np.float32)
+    # Par blocs pour ne pas doubler la mémoire à 1M de vecteurs
+    for start in range(0, count, 100_000):
+        size = min(100_000, count - start)
+        labels = rng.integers(0, clusters, size)
+        vectors[start:start + size] = centers[labels] + 0.08 * rng.standard_normal((size, dim), dtype=np.float32)
+    return normalize_rows(vectors)
+
+
+def time_queries(index: VectorIndex, queries: np.ndarray, top_k: int, nprobe: int) -> Dict[str, Any]:
+    latencies = []
+    ids = []
+    for query in queries:
+        start = time.perf_counter()
+        _, found = index.search(query, top_k=top_k, nprobe=nprobe)
+        latencies.append(time.perf_counter() - start)
+        ids.append(found[0])
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "ids": ids,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "qps": len(queries) / float(np.sum(latencies)),
+    }
+
+
+def bench_size(size: int, args: argparse.Namespace, rng: np.random.Generator) -> List[Dict[str, Any]]:
+    clusters = max(16, size // 500)
+    vectors = synthetic_vectors(size, args.dim, clusters, rng)
+    index = VectorIndex(args.dim, "synthetic")
+    index.add(vectors, [""] * size)
+    del vectors
+
+    picks = rng.integers(0, size, args.queries)
+    noise = 0.05 * rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    queries = normalize_rows(np.asarray(index.vectors[picks]) + noise)
+
+    exact = time_queries(index, queries, args.top_k, nprobe=0)
+    rows = [{
+        "size": size, "method": "exact", "nprobe": 0, "build_s": 0.0, "recall": 1.0,
+        "p50_ms": exact["p50_ms"], "p95_ms": exact["p95_ms"], "qps": exact["qps"],
+    }]
+
+    start = time.perf_counter()
+    index.train_ivf(nlist=args.nlist)
+    build_s = time.perf_counter() - start
+    for nprobe in args.nprobe:
+        approx = time_queries(index, queries, args.top_k, nprobe=nprobe)
+        recall = np.mean([
+            len(set(found.tolist()) & set(truth.tolist())) / len(truth)
+            for found, truth in zip(approx["ids"], exact["ids"])
+        ])
+        rows.append({
+            "size": size, "method": "ivf", "nprobe": nprobe, "build_s": build_s, "recall": float(recall),
+            "p50_ms": approx["p50_ms"], "p95_ms": approx["p95_ms"], "qps": approx["qps"],
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Tailles de corpus, séparées par des virgules")
+    parser.add_argument("--dim", type=int, default=128, help="Dimension des vecteurs")
+    parser.add_argument("--queries", type=int, default=200, help="Nombre de requêtes mesurées")
+    parser.add_argument("--top-k", type=int, default=25, help="k du rappel@k")
+    parser.add_argument("--nprobe", default="1,4,16,64", help="Valeurs de nprobe testées")
+    parser.add_argument("--nlist", type=int, default=None, help="Nombre de listes IVF (défaut : 4·√n)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="Écrit aussi les résultats bruts dans ce fichier")
+    args = parser.parse_args()
+    args.nprobe = [int(value) for value in args.nprobe.split(",") if value.strip()]
+
+    rng = np.random.default_rng(args.seed)
+    rows: List[Dict[str, Any]] = []
+    for size in (int(value) for value in args.sizes.split(",") if value.strip()):
+        rows.extend(bench_size(size, args, rng))
+
+    print(f"{'taille':>9}  {'méthode':<7}{'nprobe':>7}{'construction (s)':>18}"
+          f"{f'rappel@{args.top_k}':>11}{'p50 (ms)':>10}{'p95 (ms)':>10}{'req/s':>10}")
+    for row in rows:
+        print(
+            f"{row['size']:>9}  {row['method']:<7}{row['nprobe']:>7}{row['build_s']:>18.2f}"
+            f"{row['recall']:>11.3f}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['qps']:>10.1f}"
+        )
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Benchmark du pipeline PDF → génération → sauvegarde, sans accès réseau.
+
+Les PDF sont générés à la volée (nombre de pages configurable) et
+``google.generativeai`` est remplacé par un faux modèle local à latence
+réglable qui renvoie du JSON prédéfini. Pour chaque étape le script mesure le
+temps écoulé et le débit, puis, dans une seconde exécution de l'étape, le pic
+mémoire Python (tracemalloc). tracemalloc ralentit fortement l'extraction :
+il n'est jamais actif pendant la mesure du temps. Il ne voit pas non plus les
+processus d'extraction parallèle, dont le RSS maximal est lu avec
+``resource`` (Unix) : la colonne n'est remplie que si une étape dépasse le
+maximum déjà atteint par les processus enfants.
+
+Aucune QApplication n'est nécessaire : le worker est exécuté directement et
+la préparation des quiz n'utilise pas Qt.
+
+Usage :
+    python benchmarks/bench_pipeline.py --pages 10,100,300 --latency 0.2
+    python benchmarks/bench_pipeline.py --pages 300 --no-memory   # temps seulement
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils import generation, rag_utils  # noqa: E402
+from utils.cache import PDFTextCache  # noqa: E402
+from utils.generation import GenerationWorker  # noqa: E402
+from utils.json_datastore import JSONDataStore  # noqa: E402
+from utils.rag_utils import get_text_from_pdf  # noqa: E402
+from utils.request_scheduler import RequestScheduler  # noqa: E402
+
+# Aucune limite de débit : le benchmark mesure le pipeline, pas le quota de l'API
+UNLIMITED = RequestScheduler(requests_per_minute=1e9, max_concurrency=64, max_retries=0)
+
+_WORDS = (
+    "neurone synapse apprentissage mémoire cortex signal réseau gradient "
+    "modèle donnée couche activation poids biais erreur optimisation"
+).split()
+
+
+def write_synthetic_pdf(path: Path, pages: int, lines_per_page: int = 40) -> None:
+    """Écrit un PDF texte minimal (police Helvetica standard) sans dépendance externe."""
+
+    objects: List[bytes] = []
+    page_ids = [3 + 2 * i for i in range(pages)]
+    font_id = 3 + 2 * pages
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    for index in range(pages):
+        lines = []
+        for line in range(lines_per_page):
+            words = " ".join(_WORDS[(index + line + k) % len(_WORDS)] for k in range(10))
+            lines.append(f"({words.encode('latin-1', 'replace').decode('latin-1')}) Tj T*")
+        stream = f"BT /F1 10 Tf 12 TL 50 780 Td {' '.join(lines)} ET".encode("latin-1")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {page_ids[index] + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    path.write_bytes(bytes(output))
+
+
+class _FakeResponse:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Remplaçant local de ``genai.GenerativeModel`` : attend ``latency`` puis répond."""
+
+    latency = 0.0
+    num_items = 10
+
+    def __init__(self, model_name: str, **_: Any) -> None:
+        self.model_name = model_name
+
+    def generate_content(self, contents: Any, generation_config: Dict[str, Any] | None = None,
+                         stream: bool = False, **_: Any) -> Any:
+        time.sleep(self.latency)
+        prompt = (contents[0] if isinstance(contents, list) else str(contents))[:200].lower()
+        if "quiz" in prompt:
+            payload = json.dumps({"questions": [
+                {"question": f"Question {i} ?", "options": ["A", "B", "C", "D"], "answer": "A"}
+                for i in range(self.num_items)
+            ]})
+        elif "flashcards" in prompt:
+            payload = json.dumps({"flashcards": [
+                {"front": f"Notion {i}", "back": f"Définition {i}"} for i in range(self.num_items)
+            ]})
+        else:
+            payload = "# Résumé\n\n" + "\n\n".join(f"## Section {i}\n- point clé" for i in range(6))
+        if stream:
+            step = max(1, len(payload) // 8)
+            return iter([_FakeResponse(payload[i:i + step]) for i in range(0, len(payload), step)])
+        return _FakeResponse(payload)
+
+
+def install_fake_genai(latency: float) -> None:
+    FakeGenerativeModel.latency = latency
+    generation.genai = SimpleNamespace(configure=lambda **_: None, GenerativeModel=FakeGenerativeModel)
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+
+def run_end_to_end(pdf_path: Path) -> None:
+    """Exécute un GenerationWorker complet et échoue si un artefact manque ou est en erreur.
+
+    Le worker signale ses erreurs par signaux au lieu de les lever : sans ce
+    contrôle, une génération cassée passerait pour une génération rapide.
+    """
+
+    worker = GenerationWorker(str(pdf_path), use_cache=False, scheduler=UNLIMITED)
+    produced: Dict[str, Any] = {}
+    errors: List[str] = []
+    worker.finished_summary.connect(lambda value: produced.__setitem__("summary", value))
+    worker.finished_quiz.connect(lambda value: produced.__setitem__("quiz", value))
+    worker.finished_flashcards.connect(lambda value: produced.__setitem__("flashcards", value))
+    worker.error.connect(errors.append)
+    worker.artifact_error.connect(lambda artifact, message: errors.append(f"{artifact}: {message}"))
+    worker.run()
+    missing = [artifact for artifact in GenerationWorker.ARTIFACTS if artifact not in produced]
+    if errors or missing:
+        raise RuntimeError(f"Pipeline en échec : erreurs={errors} manquants={missing}")
+
+
+def children_max_rss_kib() -> Optional[float]:
+    """RSS maximal des processus enfants terminés (pool d'extraction), en KiB."""
+
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return rss / 1024 if sys.platform == "darwin" else float(rss)  # octets sous macOS
+
+
+def measure(label: str, func: Callable[[], Any], units: float = 1.0, unit_name: str = "op",
+            memory: bool = True) -> Dict[str, Any]:
+    # Temps mesuré sans tracemalloc, qui ralentit l'extraction de plusieurs fois
+    children_before = children_max_rss_kib()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    children_after = children_max_rss_kib()
+
+    peak_kib = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_kib = peak / 1024
+    return {
+        "stage": label,
+        "seconds": elapsed,
+        "peak_kib": peak_kib,
+        "children_rss_kib": children_after if children_after != children_before else None,
+        "throughput": units / elapsed if elapsed else float("inf"),
+        "unit": f"{unit_name}/s",
+    }
+
+
+def bench_document(pages: int, workdir: Path, repeat: int, memory: bool = True) -> List[Dict[str, Any]]:
+    pdf_path = workdir / f"synthetic_{pages}.pdf"
+    write_synthetic_pdf(pdf_path, pages)
+    results = []
+    stage = partial(measure, memory=memory)
+
+    results.append(stage("extract", lambda: get_text_from_pdf(str(pdf_path), use_cache=False), pages, "page"))
+    get_text_from_pdf(str(pdf_path))  # remplit le cache de texte
+    results.append(stage("extract (cache)", lambda: get_text_from_pdf(str(pdf_path)), pages, "page"))
+
+    text = get_text_from_pdf(str(pdf_path))
+    worker = GenerationWorker(str(pdf_path), use_cache=False, stream_summary=False, scheduler=UNLIMITED)
+    model = FakeGenerativeModel(worker.model_name)
+    results.append(stage("summary", lambda: worker._generate_summary(model, text)))
+    results.append(stage("quiz", lambda: worker._generate_quiz(model, text, worker.num_questions)))
+    results.append(stage("flashcards", lambda: worker._generate_flashcards(model, text)))
+
+    payload = model.generate_content(["quiz"]).text
+    results.append(stage(
+        "parse", lambda: [worker._parse_json_list(payload, "questions") for _ in range(repeat * 100)],
+        repeat * 100,
+    ))
+
+    store = JSONDataStore(workdir / f"store_{pages}.json")
+    quiz = {"questions": worker._parse_json_list(payload, "questions")}
+    results.append(stage(
+        "persist",
+        lambda: [
+            store.save_new_course(filename=pdf_path.name, summary=text[:2000], quiz_data=quiz,
+                                  flashcards_data={"flashcards": []})
+            for _ in range(repeat)
+        ],
+        repeat,
+    ))
+
+    results.append(stage("end-to-end", lambda: run_end_to_end(pdf_path)))
+    for row in results:
+        row["pages"] = pages
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default="10,100,300", help="Tailles de document, séparées par des virgules")
+    parser.add_argument("--latency", type=float, default=0.2, help="Latence simulée par appel Gemini (s)")
+    parser.add_argument("--repeat", type=int, default=5, help="Répétitions des étapes rapides")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Ne mesure que les temps (pas de seconde exécution sous tracemalloc)")
+    parser.add_argument("--json", dest="json_path", help="Écrit aussi les résultats bruts dans ce fichier")
+    args = parser.parse_args()
+
+    install_fake_genai(args.latency)
+    rows: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="neurolearn-bench-") as tmp:
+        # Le cache de texte du benchmark ne doit pas polluer celui de l'application
+        rag_utils._text_cache = PDFTextCache(cache_dir=Path(tmp) / "pdf_text")
+        for pages in (int(value) for value in args.pages.split(",") if value.strip()):
+            rows.extend(bench_document(pages, Path(tmp), args.repeat, memory=not args.no_memory))
+
+    def kib(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.1f}"
+
+    print(f"{'pages':>6}  {'étape':<16}{'temps (s)':>10}{'pic Python (KiB)':>18}"
+          f"{'RSS enfants (KiB)':>19}{'débit':>16}")
+    for row in rows:
+        print(
+            f"{row['pages']:>6}  {row['stage']:<16}{row['seconds']:>10.4f}"
+            f"{kib(row['peak_kib']):>18}{kib(row['children_rss_kib']):>19}"
+            f"{row['throughput']:>10.1f} {row['unit']}"
+        )
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
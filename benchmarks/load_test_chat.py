@@ -0,0 +1,230 @@
+"""
+Test de charge du endpoint /chat d'APIUtils (chat_endpoint -> ModelInterface.send_message).
+
+Le script démarre un faux serveur Ollama (``/api/chat``) dont la latence
+avant le premier token, le débit de tokens et le taux d'erreur sont
+réglables, puis un serveur APIUtils qui pointe vers lui. Pour chaque niveau
+de concurrence, des utilisateurs simulés (chacun sa session et sa connexion
+keep-alive) envoient des messages en boucle ; le script rapporte les
+latences p50/p95/p99, le débit et le taux d'erreur, puis affiche les
+compteurs de ``GET /metrics`` côté serveur.
+
+Avec ``--target``, la charge part vers un serveur APIUtils déjà lancé
+(et son vrai backend) au lieu du couple local.
+
+Usage :
+    python benchmarks/load_test_chat.py --concurrency 1,4,16,64 --requests 200 --latency 0.2 --token-rate 50
+    python benchmarks/load_test_chat.py --target http://127.0.0.1:99 --model tuteur --duration 30
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils.api_utils import APIUtils  # noqa: E402
+
+STUB_MODEL = "stub-model"
+
+
+def percentile_ms(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1)))] * 1000
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Imite ``POST /api/chat`` d'Ollama, en réponse unique ou en NDJSON."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        settings = self.server.settings
+        if self.path != "/api/chat":
+            return self._send_json(404, {"error": "not found"})
+
+        time.sleep(settings.latency)
+        if random.random() < settings.error_rate:
+            return self._send_json(500, {"error": "stub failure"})
+
+        tokens = [f"tok{i} " for i in range(settings.tokens)]
+        delay = 1.0 / settings.token_rate if settings.token_rate > 0 else 0.0
+        if not payload.get("stream"):
+            time.sleep(delay * len(tokens))
+            return self._send_json(200, {"model": payload.get("model"), "message": {
+                "role": "assistant", "content": "".join(tokens)}, "done": True})
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for token in tokens:
+            time.sleep(delay)
+            self._write_chunk({"message": {"role": "assistant", "content": token}, "done": False})
+        self._write_chunk({"message": {"role": "assistant", "content": ""}, "done": True})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, body):
+        data = json.dumps(body).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+
+
+def start_stub(args: argparse.Namespace) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+    server.daemon_threads = True
+    server.settings = args
+    threading.Thread(target=server.serve_forever, name="stub-ollama", daemon=True).start()
+    return server
+
+
+def start_api(stub_url: str, workdir: Path) -> str:
+    api = APIUtils(model_file=str(workdir / "models.json"), ollama_url=stub_url)
+    server = api.start_server(port=0, block=False)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    response = requests.post(f"{base_url}/models", json={
+        "name": STUB_MODEL, "role": "assistant", "model_name": "stub:latest",
+        "system_prompt": "Tu es un assistant de test.",
+    }, timeout=10)
+    response.raise_for_status()
+    return base_url
+
+
+def run_level(base_url: str, model: str, concurrency: int, args: argparse.Namespace) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration if args.duration else None
+    remaining = [args.requests]
+
+    def take() -> bool:
+        with lock:
+            if deadline is not None:
+                return time.perf_counter() < deadline
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def user(index: int) -> None:
+        nonlocal errors
+        # Une connexion keep-alive et une session de chat par utilisateur simulé
+        http = requests.Session()
+        session_id = f"load-{concurrency}-{index}"
+        turn = 0
+        while take():
+            turn += 1
+            body = {"model": model, "message": f"Question {turn}", "session_id": session_id, "stream": args.stream}
+            start = time.perf_counter()
+            try:
+                response = http.post(f"{base_url}/chat", json=body, stream=args.stream, timeout=args.timeout)
+                ok = response.status_code == 200
+                if ok and args.stream:
+                    lines = [line for line in response.iter_lines() if line]
+                    ok = bool(lines) and "error" not in json.loads(lines[-1])
+                else:
+                    response.content  # lit le corps : la latence couvre la réponse complète
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+        http.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(user, range(concurrency)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    total = len(latencies) + errors
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "rps": total / wall if wall else 0.0,
+        "error_rate": errors / total if total else 0.0,
+        "p50_ms": percentile_ms(latencies, 0.50),
+        "p95_ms": percentile_ms(latencies, 0.95),
+        "p99_ms": percentile_ms(latencies, 0.99),
+    }
+
+
+def print_metrics(base_url: str) -> Optional[Dict[str, Any]]:
+    try:
+        metrics = requests.get(f"{base_url}/metrics", timeout=10).json()
+    except (requests.RequestException, ValueError) as exc:
+        print(f"\n/metrics indisponible : {exc}")
+        return None
+    print(f"\nCompteurs serveur (GET /metrics), en vol : {metrics['in_flight']}")
+    for route, stats in sorted(metrics["routes"].items()):
+        print(f"  {route:<22}{stats['requests']:>8} req  {stats['rps']:>7.1f} req/s (60 s)  {stats['error_rate']:>6.1%} err"
+              f"  p50 {stats['p50_ms']:>8.1f}  p95 {stats['p95_ms']:>8.1f}  p99 {stats['p99_ms']:>8.1f} ms")
+    return metrics
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Niveaux de concurrence, séparés par des virgules")
+    parser.add_argument("--requests", type=int, default=200, help="Requêtes par niveau")
+    parser.add_argument("--duration", type=float, default=None, help="Durée par niveau en secondes (remplace --requests)")
+    parser.add_argument("--stream", action="store_true", help="Utilise /chat en streaming (NDJSON)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Faux backend : attente avant le premier token (s)")
+    parser.add_argument("--token-rate", type=float, default=50.0, help="Faux backend : tokens par seconde (0 = instantané)")
+    parser.add_argument("--tokens", type=int, default=20, help="Faux backend : tokens par réponse")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Faux backend : proportion de réponses 500")
+    parser.add_argument("--target", help="URL d'un serveur APIUtils existant (pas de faux backend)")
+    parser.add_argument("--model", default=STUB_MODEL, help="Modèle utilisé avec --target")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Timeout client par requête (s)")
+    parser.add_argument("--json", dest="json_path", help="Écrit aussi les résultats bruts dans ce fichier")
+    args = parser.parse_args()
+    levels = [int(value) for value in args.concurrency.split(",") if value.strip()]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.target:
+            base_url = args.target.rstrip("/")
+        else:
+            stub = start_stub(args)
+            base_url = start_api(f"http://127.0.0.1:{stub.server_address[1]}", Path(workdir))
+
+        rows = [run_level(base_url, args.model, level, args) for level in levels]
+        print(f"{'concurrence':>11}{'requêtes':>10}{'req/s':>9}{'erreurs':>9}"
+              f"{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}")
+        for row in rows:
+            print(f"{row['concurrency']:>11}{row['requests']:>10}{row['rps']:>9.1f}{row['error_rate']:>9.1%}"
+                  f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+        metrics = print_metrics(base_url)
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps({"levels": rows, "server": metrics}, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
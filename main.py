@@ -1,13 +1,49 @@
+import multiprocessing
 import sys
+import time
 from pathlib import Path
+
+_START = time.perf_counter()
 sys.path.append(str(Path(__file__).resolve().parent))
 
+from utils.startup_timing import StartupTimer
+
+STARTUP = StartupTimer(origin=_START)
+
+from PyQt6.QtCore import QEvent, QObject, QTimer
 from PyQt6.QtGui import QIcon
-from PyQt6.QtWidgets import QApplication
+from PyQt6.QtWidgets import QApplication, QWidget
 from dotenv import load_dotenv
 
 from ui.MainWindow import MainWindow
 
+STARTUP.mark("imports")
+
+
+class _FirstPaintWatcher(QObject):
+    """Appelle ``callback`` une fois le premier paintEvent de la fenêtre traité."""
+
+    def __init__(self, app: QApplication, window: QWidget, callback) -> None:
+        super().__init__(app)
+        self._app = app
+        self._window = window
+        self._callback = callback
+        app.installEventFilter(self)
+
+    def eventFilter(self, obj, event) -> bool:  # type: ignore[override]
+        if event.type() == QEvent.Type.Paint and isinstance(obj, QWidget) and obj.window() is self._window:
+            self._app.removeEventFilter(self)
+            # Différé : le rappel passe après la fin de cette vague de peinture
+            QTimer.singleShot(0, self._callback)
+        return False
+
+
+def _after_first_paint(window: MainWindow) -> None:
+    STARTUP.mark("first paint")
+    window.load_history()
+    STARTUP.mark("store")
+    STARTUP.report()
+
 
 def main() -> None:
     load_dotenv()
@@ -27,12 +63,18 @@ def main() -> None:
     style_path = Path(__file__).resolve().parent / "style.qss"
     if style_path.exists():
         app.setStyleSheet(style_path.read_text(encoding="utf-8"))
+    STARTUP.mark("style")
 
     window = MainWindow()
+    STARTUP.mark("window")
+    # L'historique n'est lu qu'une fois la fenêtre réellement peinte
+    _FirstPaintWatcher(app, window, lambda: _after_first_paint(window))
     window.show()
 
     sys.exit(app.exec())
 
 
 if __name__ == "__main__":
+    # Requis par l'extraction PDF multi-processus dans l'exécutable empaqueté
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Les modules sont importés depuis la racine du dépôt (utils.*), comme dans main.py
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
@@ -0,0 +1,234 @@
+import http.client
+import json
+import socket
+
+import pytest
+import requests
+
+from utils import ModelInterface as model_interface
+from utils import api_utils
+from utils.api_utils import APIUtils
+from utils.conversation_history import ConversationHistory
+from utils.session_store import SessionStore
+
+
+class FakeModelInterface:
+    """Remplace ModelInterface : répond sans serveur Ollama et garde l'historique."""
+
+    def __init__(self, model_config, api_url=None):
+        self.model_config = model_config
+        self.conversation = ConversationHistory(system_prompt=model_config.get("system_prompt"))
+
+    def send_message(self, user_message, rag_content=None):
+        if user_message == "panne":
+            return None
+        reply = f"{self.model_config['model']} #{len(self.conversation.messages) // 2 + 1}: {user_message}"
+        self.conversation.add_turn(user_message, reply)
+        return reply
+
+    def send_message_stream(self, user_message, rag_content=None):
+        yield "début "
+        if user_message == "panne":
+            raise RuntimeError("flux interrompu")
+        yield user_message
+
+
+class BrokenOllamaSession:
+    """Session requests dont la réponse Ollama en streaming est coupée après un fragment."""
+
+    class Response:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def raise_for_status(self):
+            pass
+
+        def iter_lines(self):
+            yield json.dumps({"message": {"content": "début "}, "done": False}).encode("utf-8")
+            raise requests.exceptions.ChunkedEncodingError("Connection broken: IncompleteRead")
+
+    def post(self, url, **kwargs):
+        return self.Response()
+
+
+@pytest.fixture
+def serve(tmp_path):
+    sessions = SessionStore(ttl=3600, max_sessions=16, persist_dir=tmp_path / "sessions")
+    utils = APIUtils(model_file=str(tmp_path / "models.json"), sessions=sessions)
+    server = utils.start_server(port=0, block=False)
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+
+    def request(method, path, body=None):
+        data = body if isinstance(body, (bytes, type(None))) else json.dumps(body).encode("utf-8")
+        connection.request(method, path, body=data, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        raw = response.read().decode("utf-8")
+        if response.getheader("Content-Type", "").startswith("application/x-ndjson"):
+            return response.status, [json.loads(line) for line in raw.splitlines()]
+        return response.status, json.loads(raw)
+
+    request.utils = utils
+    request.port = server.server_address[1]
+    yield request
+    connection.close()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def api(serve, monkeypatch):
+    monkeypatch.setattr(api_utils, "ModelInterface", FakeModelInterface)
+    return serve
+
+
+def _create(api, name="tuteur", **fields):
+    body = {"name": name, "role": "assistant", "model_name": "qwen3", "system_prompt": "Tu es un tuteur."}
+    body.update(fields)
+    return api("POST", "/models", body)
+
+
+def test_health_and_unknown_route(api):
+    assert api("GET", "/health") == (200, {"status": "ok"})
+    status, body = api("GET", "/inconnu")
+    assert status == 404 and "Route inconnue" in body["error"]
+    assert api("DELETE", "/health")[0] == 404
+
+
+def test_model_crud(api):
+    assert _create(api)[0] == 201
+    assert _create(api)[0] == 409
+    assert api("GET", "/models") == (200, {"models": ["tuteur"]})
+
+    status, body = api("GET", "/models/tuteur")
+    assert status == 200 and body["config"]["model"] == "qwen3"
+
+    assert api("PATCH", "/models/tuteur", {"model_name": "llama3", "rag_file": "cours.txt"})[0] == 200
+    assert api("GET", "/models/tuteur")[1]["config"]["model"] == "llama3"
+
+    assert api("DELETE", "/models/tuteur")[0] == 200
+    assert api("GET", "/models/tuteur")[0] == 404
+    assert api("DELETE", "/models/tuteur")[0] == 404
+
+
+def test_request_validation(api):
+    status, body = api("POST", "/models", {"name": "tuteur"})
+    assert status == 400 and "model_name" in body["error"]
+    assert api("POST", "/models", b"{pas du json")[0] == 400
+    assert api("POST", "/models", [1, 2])[0] == 400
+
+    _create(api)
+    status, body = api("PATCH", "/models/tuteur", {"name": "autre", "secret": 1})
+    assert status == 400 and "name" in body["error"] and "secret" in body["error"]
+    assert api("PATCH", "/models/tuteur", {})[0] == 400
+    assert api("PATCH", "/models/absent", {"role": "x"})[0] == 404
+    assert api("POST", "/chat", {"model": "tuteur"})[0] == 400
+
+
+def test_chat_keeps_one_history_per_session(api):
+    _create(api)
+    assert api("POST", "/chat", {"model": "tuteur", "message": "a"})[1] == {"response": "qwen3 #1: a", "session_id": "default"}
+    assert api("POST", "/chat", {"model": "tuteur", "message": "b"})[1]["response"] == "qwen3 #2: b"
+    status, body = api("POST", "/chat", {"model": "tuteur", "message": "c", "session_id": "autre"})
+    assert (status, body) == (200, {"response": "qwen3 #1: c", "session_id": "autre"})
+
+
+def test_chat_errors(api):
+    assert api("POST", "/chat", {"model": "absent", "message": "a"})[0] == 404
+    _create(api)
+    assert api("POST", "/chat", {"model": "tuteur", "message": "panne"})[0] == 502
+
+
+def test_edit_restarts_sessions_with_the_new_config(api):
+    _create(api)
+    api("POST", "/chat", {"model": "tuteur", "message": "a"})
+    api("PATCH", "/models/tuteur", {"model": "llama3"})
+    # Nouvelle configuration, historique conservé
+    assert api("POST", "/chat", {"model": "tuteur", "message": "b"})[1]["response"] == "llama3 #2: b"
+
+
+def test_streamed_chat(api):
+    _create(api)
+    status, records = api("POST", "/chat", {"model": "tuteur", "message": "salut", "stream": True})
+    assert status == 200
+    assert records == [{"delta": "début "}, {"delta": "salut"}, {"done": True, "response": "début salut"}]
+
+    assert api("POST", "/chat", {"model": "absent", "message": "salut", "stream": True})[0] == 404
+
+
+def test_failed_stream_ends_with_an_error_record(api):
+    _create(api)
+    status, records = api("POST", "/chat", {"model": "tuteur", "message": "panne", "stream": True})
+    assert status == 200
+    assert records[-1] == {"done": True, "response": "début ", "error": "flux interrompu"}
+    assert api("GET", "/metrics")[1]["routes"]["POST /chat"]["errors"] == 1
+
+
+def test_metrics_group_requests_by_route(api):
+    _create(api)
+    api("GET", "/models/tuteur")
+    api("GET", "/models/absent")
+    status, metrics = api("GET", "/metrics")
+
+    assert status == 200
+    route = metrics["routes"]["GET /models/<name>"]
+    assert (route["requests"], route["errors"]) == (2, 1)
+    assert metrics["routes"]["POST /models"]["requests"] == 1
+    assert metrics["sessions"]["max_sessions"] == 16
+
+
+def test_dropped_ollama_stream_ends_with_an_error_record(serve, monkeypatch):
+    # Vraie ModelInterface : seule la session requests est simulée
+    monkeypatch.setattr(model_interface, "get_shared_session", BrokenOllamaSession)
+    _create(serve)
+
+    status, records = serve("POST", "/chat", {"model": "tuteur", "message": "salut", "stream": True})
+
+    assert status == 200
+    assert records[0] == {"delta": "début "}
+    assert records[-1]["done"] is True and records[-1]["response"] == "début "
+    assert "IncompleteRead" in records[-1]["error"]
+    assert serve("GET", "/metrics")[1]["routes"]["POST /chat"]["errors"] == 1
+    with serve.utils.sessions.use(("tuteur", "default"), lambda: None) as interface:
+        assert interface.history == []
+
+
+
+def test_oversized_body_closes_the_connection(serve):
+    # Le « corps » annoncé contient une requête : elle ne doit pas être traitée sur la même connexion
+    smuggled = b"GET /health HTTP/1.1\r\nHost: test\r\n\r\n"
+    head = f"POST /models HTTP/1.1\r\nHost: test\r\nContent-Length: {api_utils.MAX_BODY_BYTES + 1}\r\n\r\n"
+    with socket.create_connection(("127.0.0.1", serve.port), timeout=5) as client:
+        client.sendall(head.encode("ascii") + smuggled)
+        received = b""
+        while chunk := client.recv(65536):
+            received += chunk
+
+    assert received.startswith(b"HTTP/1.1 413")
+    assert b"Connection: close" in received
+    assert received.count(b"HTTP/1.1 ") == 1
+
+
+def test_rps_covers_the_last_minute_only():
+    clock = [1000.0]
+    metrics = api_utils.APIMetrics(clock=lambda: clock[0])
+
+    def requests_at(count):
+        for _ in range(count):
+            metrics.begin()
+            metrics.record("GET /health", 200, 0.001)
+
+    clock[0] += 10
+    requests_at(50)
+    route = metrics.snapshot()["routes"]["GET /health"]
+    assert route["rps"] == pytest.approx(5.0)
+
+    # Dix minutes plus tard : seule la dernière minute compte, pas la moyenne depuis le démarrage
+    clock[0] += 600
+    requests_at(60)
+    clock[0] += 0.5
+    route = metrics.snapshot()["routes"]["GET /health"]
+    assert route["rps"] == pytest.approx(1.0)
+    assert route["avg_rps_since_start"] == pytest.approx(110 / 610.5)
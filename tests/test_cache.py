@@ -0,0 +1,81 @@
+import os
+
+from utils.cache import GenerationCache
+
+
+def _age(cache, key, seconds_ago):
+    path = cache._entry_path(key)
+    stamp = path.stat().st_mtime - seconds_ago
+    os.utime(path, (stamp, stamp))
+
+
+def test_round_trip_counts_hits_and_misses(tmp_path):
+    cache = GenerationCache(tmp_path, max_bytes=1 << 20, enabled=True)
+    key = GenerationCache.make_key("doc", "gemini", "summary", 1, {"lang": "fr"})
+
+    assert cache.get(key) is None
+    cache.put(key, {"text": "résumé"})
+    assert cache.get(key) == {"text": "résumé"}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_key_depends_on_everything_that_changes_the_result():
+    base = ("doc", "gemini", "summary", 1, {"lang": "fr"})
+    key = GenerationCache.make_key(*base)
+    assert GenerationCache.make_key("doc", "gemini", "summary", 1, {"lang": "fr"}) == key
+    assert GenerationCache.make_key("doc", "gemini", "summary", 2, {"lang": "fr"}) != key
+    assert GenerationCache.make_key("doc", "gemini", "quiz", 1, {"lang": "fr"}) != key
+    assert GenerationCache.make_key("doc", "gemini", "summary", 1, {"lang": "en"}) != key
+
+
+def test_eviction_removes_least_recently_used_entries(tmp_path):
+    payload = "x" * 1000
+    cache = GenerationCache(tmp_path, max_bytes=10 ** 6, enabled=True)
+    for key, seconds_ago in (("old", 300), ("used", 200), ("recent", 100)):
+        cache.put(key, payload)
+        _age(cache, key, seconds_ago)
+    # Une lecture rafraîchit la date d'accès : "used" devient la plus récente
+    assert cache.get("used") == payload
+
+    entry_size = cache._entry_path("old").stat().st_size
+    cache.max_bytes = 2 * entry_size
+    cache.put("new", payload)
+
+    assert not cache._entry_path("old").exists()
+    assert not cache._entry_path("recent").exists()
+    assert cache._entry_path("used").exists()
+    assert cache._entry_path("new").exists()
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_disabled_cache_neither_reads_nor_writes(tmp_path):
+    cache = GenerationCache(tmp_path / "gen", enabled=False)
+    cache.put("key", "value")
+    assert cache.get("key") is None
+    assert not (tmp_path / "gen").exists()
+
+
+def test_failed_access_time_update_still_returns_the_entry(tmp_path, monkeypatch):
+    cache = GenerationCache(tmp_path, enabled=True)
+    cache.put("key", "value")
+
+    def read_only(*args, **kwargs):
+        raise PermissionError("lecture seule")
+
+    monkeypatch.setattr(os, "utime", read_only)
+    assert cache.get("key") == "value"
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_eviction_and_clear_leave_in_flight_writes_alone(tmp_path):
+    cache = GenerationCache(tmp_path, max_bytes=0, enabled=True)
+    in_flight = tmp_path / ".tmp-writer.json"
+    in_flight.write_text("{" + "x" * 1000, encoding="utf-8")
+
+    cache.put("key", "value")
+    assert not cache._entry_path("key").exists()
+    assert in_flight.exists()
+
+    cache.clear()
+    assert in_flight.exists()
+    assert cache.stats()["entries"] == 0
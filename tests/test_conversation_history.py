@@ -0,0 +1,96 @@
+from utils.conversation_history import ConversationHistory, estimate_tokens
+
+
+def _history(**kwargs):
+    options = {"system_prompt": "Tu es un tuteur.", "max_tokens": 400}
+    options.update(kwargs)
+    return ConversationHistory(**options)
+
+
+def _fill(history, turns, size=200):
+    for number in range(turns):
+        history.add_turn(f"question {number} " + "q" * size, f"réponse {number} " + "r" * size)
+
+
+def test_old_turns_are_folded_into_the_summary():
+    history = _history()
+    _fill(history, 10)
+
+    assert history.count_tokens(history.messages) <= history.turns_budget
+    assert history.messages[-1]["content"].startswith("réponse 9")
+    assert "question 0" not in " ".join(message["content"] for message in history.messages)
+    assert history.summary
+    assert estimate_tokens(history.summary) <= history.summary_budget
+
+
+def test_last_exchange_is_kept_even_over_budget():
+    history = _history(max_tokens=100)
+    history.add_turn("x" * 2000, "y" * 2000)
+    assert [message["role"] for message in history.messages] == ["user", "assistant"]
+
+
+def test_summarizer_receives_dropped_turns():
+    calls = []
+
+    def summarizer(previous, dropped):
+        calls.append(dropped)
+        return f"{len(dropped)} messages"
+
+    history = _history(summarizer=summarizer)
+    _fill(history, 6)
+    assert calls and [message["role"] for message in calls[0]][:2] == ["user", "assistant"]
+    assert calls[0][0]["content"].startswith("question 0 ")
+    assert history.summary.endswith("messages")
+
+
+def test_built_request_fits_the_budget():
+    history = _history()
+    _fill(history, 10)
+    messages = history.build_messages("nouvelle question", rag_content="contexte " * 500)
+
+    assert history.count_tokens(messages) <= history.max_tokens
+    assert messages[0]["role"] == "system" and "Tu es un tuteur." in messages[0]["content"]
+    assert messages[0]["content"].count("Tu es un tuteur.") == 1
+    assert messages[-1] == {"role": "user", "content": "nouvelle question"}
+    # Les tours repris commencent par une question
+    assert [message["role"] for message in messages if message["role"] != "system"][0] == "user"
+
+
+def test_rag_context_is_not_kept_in_history():
+    history = _history()
+    history.build_messages("question", rag_content="extrait du cours")
+    history.add_turn("question", "réponse")
+    assert "extrait du cours" not in str(history.messages)
+
+
+def test_to_dict_restore_round_trip():
+    history = _history()
+    _fill(history, 10)
+    state = history.to_dict()
+
+    restored = _history()
+    assert restored.restore(state)
+    assert restored.messages == history.messages
+    assert restored.summary == history.summary
+    assert restored.to_dict() == state
+    # L'état sauvegardé est une copie
+    state["messages"][0]["content"] = "modifié"
+    assert restored.messages[0]["content"] != "modifié"
+
+
+def test_restore_applies_the_current_budget():
+    large = _history(max_tokens=10_000)
+    _fill(large, 10)
+    small = _history()
+    assert small.restore(large.to_dict())
+    assert small.count_tokens(small.messages) <= small.turns_budget
+    assert small.summary
+
+
+def test_restore_rejects_malformed_state():
+    history = _history()
+    history.add_turn("question", "réponse")
+    for state in (None, [], {"messages": "texte"}, {"messages": [{"role": "system", "content": "x"}]},
+                  {"messages": [{"role": "user", "content": 3}]}, {"messages": [], "summary": 5}):
+        assert not history.restore(state)
+        assert history.messages == [] and history.summary == ""
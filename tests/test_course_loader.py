@@ -0,0 +1,97 @@
+import os
+import threading
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+pytest.importorskip("PyQt6.QtWidgets")
+
+from PyQt6.QtCore import QEventLoop, QTimer  # noqa: E402
+from PyQt6.QtGui import QTextDocument  # noqa: E402
+from PyQt6.QtWidgets import QApplication, QTextEdit  # noqa: E402
+
+from utils.json_datastore import JSONDataStore  # noqa: E402
+from utils.quiz_rendering import RENDER_VERSION  # noqa: E402
+
+SUMMARY = "# Chapitre\nIntroduction\n- premier point\n- second point\n\n" + "Paragraphe **long**.\n\n" * 200
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def markdown_calls(monkeypatch):
+    """Threads dans lesquels du Markdown est analysé par Qt."""
+
+    calls = []
+    for cls in (QTextDocument, QTextEdit):
+        original = cls.setMarkdown
+
+        def wrapper(self, text, *args, _original=original):
+            calls.append(threading.current_thread() is threading.main_thread())
+            return _original(self, text, *args)
+
+        monkeypatch.setattr(cls, "setMarkdown", wrapper)
+    return calls
+
+
+@pytest.fixture
+def window(app, tmp_path):
+    from ui.MainWindow import MainWindow
+
+    window = MainWindow()
+    store = JSONDataStore(tmp_path / "data.json")
+    window._datastore_instance = store
+    window._course_loader.datastore = store
+    yield window
+    window._course_loader.shutdown()
+    window.deleteLater()
+
+
+def _load(window, course_id):
+    loop = QEventLoop()
+    window._course_loader.flashcards_ready.connect(loop.quit)
+    QTimer.singleShot(10_000, loop.quit)
+    window._course_loader.load(course_id)
+    loop.exec()
+    window._course_loader.flashcards_ready.disconnect(loop.quit)
+
+
+def _save(store):
+    return store.save_new_course(filename="cours.pdf", summary=SUMMARY, quiz_data=[], flashcards_data=[])
+
+
+def test_history_summary_is_rendered_off_the_gui_thread(window, markdown_calls):
+    store = window._datastore
+    course_id = _save(store)
+
+    _load(window, course_id)
+
+    assert "premier point" in window.summary_edit.toPlainText()
+    assert markdown_calls == [False]
+    render = store.get_course_by_id(course_id)["summary_render"]
+    assert render["version"] == RENDER_VERSION and "premier point" in render["html"]
+
+
+def test_stored_render_is_reused_without_parsing(window, markdown_calls):
+    store = window._datastore
+    course_id = _save(store)
+    _load(window, course_id)
+    window._course_loader.forget(course_id)
+    markdown_calls.clear()
+
+    _load(window, course_id)
+
+    assert markdown_calls == []
+    assert "second point" in window.summary_edit.toPlainText()
+
+
+def test_new_summary_drops_the_stale_render(window):
+    store = window._datastore
+    course_id = _save(store)
+    _load(window, course_id)
+
+    store.update_course(course_id, summary="Nouveau résumé")
+    assert "summary_render" not in store.get_course_by_id(course_id)
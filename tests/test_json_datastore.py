@@ -0,0 +1,139 @@
+import json
+import logging
+
+from utils.json_datastore import JSONDataStore
+
+
+def _save(store, name):
+    return store.save_new_course(filename=name, summary=f"Résumé {name}", quiz_data=[], flashcards_data=[])
+
+
+def _journal_lines(store):
+    return store._journal_path.read_text(encoding="utf-8").splitlines()
+
+
+def test_changes_are_journaled_then_replayed_on_reopen(tmp_path):
+    storage = tmp_path / "data.json"
+    store = JSONDataStore(storage)
+    first = _save(store, "a.pdf")
+    second = _save(store, "b.pdf")
+    assert store.delete_course(first)
+
+    assert [json.loads(line)["op"] for line in _journal_lines(store)] == ["add", "add", "del"]
+    # L'index sur disque n'a pas encore été réécrit
+    assert json.loads(storage.read_text(encoding="utf-8"))["courses"] == []
+
+    reopened = JSONDataStore(storage)
+    assert [meta["id"] for meta in reopened.get_all_course_metadata()] == [second]
+    assert reopened.get_course_by_id(second)["summary"] == "Résumé b.pdf"
+    assert reopened.get_course_by_id(first) is None
+
+
+def test_compaction_folds_journal_and_removes_tombstoned_files(tmp_path):
+    store = JSONDataStore(tmp_path / "data.json")
+    kept = _save(store, "a.pdf")
+    deleted = _save(store, "b.pdf")
+    store.delete_course(deleted)
+    assert store._course_path(deleted).exists()
+
+    store.compact()
+
+    assert not store._journal_path.exists()
+    assert not store._course_path(deleted).exists()
+    assert store._course_path(kept).exists()
+    index = json.loads((tmp_path / "data.json").read_text(encoding="utf-8"))
+    assert [meta["id"] for meta in index["courses"]] == [kept]
+
+
+def test_journal_is_compacted_at_threshold(tmp_path, monkeypatch):
+    monkeypatch.setattr(JSONDataStore, "COMPACT_THRESHOLD", 3)
+    store = JSONDataStore(tmp_path / "data.json")
+    ids = [_save(store, f"{number}.pdf") for number in range(3)]
+
+    assert not store._journal_path.exists()
+    ids.append(_save(store, "3.pdf"))
+    assert len(_journal_lines(store)) == 1
+    assert {meta["id"] for meta in JSONDataStore(tmp_path / "data.json").get_all_course_metadata()} == set(ids)
+
+
+def test_torn_last_line_is_ignored_silently(tmp_path, caplog):
+    store = JSONDataStore(tmp_path / "data.json")
+    course_id = _save(store, "a.pdf")
+    with store._journal_path.open("a", encoding="utf-8") as handle:
+        handle.write('{"op": "add", "cour')
+
+    with caplog.at_level(logging.ERROR, logger="utils.json_datastore"):
+        reopened = JSONDataStore(tmp_path / "data.json")
+
+    assert [meta["id"] for meta in reopened.get_all_course_metadata()] == [course_id]
+    assert not caplog.records
+    assert not reopened._journal_path.with_suffix(".journal.corrupt").exists()
+
+
+def test_corrupt_journal_line_is_reported_and_backed_up(tmp_path, caplog):
+    store = JSONDataStore(tmp_path / "data.json")
+    first = _save(store, "a.pdf")
+    with store._journal_path.open("a", encoding="utf-8") as handle:
+        handle.write("not json\n")
+    second = _save(store, "b.pdf")
+
+    with caplog.at_level(logging.ERROR, logger="utils.json_datastore"):
+        reopened = JSONDataStore(tmp_path / "data.json")
+
+    assert {meta["id"] for meta in reopened.get_all_course_metadata()} == {first, second}
+    assert any("unreadable" in record.getMessage() for record in caplog.records)
+    backup = reopened._journal_path.with_suffix(".journal.corrupt")
+    assert "not json" in backup.read_text(encoding="utf-8")
+
+
+def test_metadata_is_newest_first_and_ids_stay_unique(tmp_path):
+    storage = tmp_path / "data.json"
+    storage.write_text(json.dumps({
+        "version": JSONDataStore.FORMAT_VERSION,
+        "courses": [
+            {"id": "old", "filename": "old.pdf", "creation_date": "2024-01-01T00:00:00"},
+            {"id": "new", "filename": "new.pdf", "creation_date": "2024-03-01T00:00:00"},
+            {"id": "old", "filename": "old.pdf", "creation_date": "2024-01-01T00:00:00"},
+        ],
+    }), encoding="utf-8")
+
+    store = JSONDataStore(storage)
+    assert [meta["id"] for meta in store.get_all_course_metadata()] == ["new", "old"]
+    assert store.delete_course("old")
+    assert [meta["id"] for meta in store.get_all_course_metadata()] == ["new"]
+
+
+def test_legacy_single_file_is_migrated(tmp_path):
+    storage = tmp_path / "data.json"
+    legacy = {"courses": [
+        {"id": "b", "filename": "b.pdf", "creation_date": "2024-02-01T00:00:00",
+         "summary": "Résumé B", "quiz": [{"question": "Q ?"}], "flashcards": []},
+        {"filename": "sans-id.pdf", "creation_date": "2024-03-01T00:00:00", "summary": "Résumé C"},
+        {"id": "a", "filename": "a.pdf", "creation_date": "2024-01-01T00:00:00", "summary": "Résumé A"},
+        "entrée invalide",
+    ]}
+    original = json.dumps(legacy).encode("utf-8")
+    storage.write_bytes(original)
+
+    store = JSONDataStore(storage)
+
+    metadata = store.get_all_course_metadata()
+    assert [meta["filename"] for meta in metadata] == ["sans-id.pdf", "b.pdf", "a.pdf"]
+    generated = metadata[0]["id"]
+    assert generated and generated not in ("a", "b")
+
+    for meta in metadata:
+        body = json.loads(store._course_path(meta["id"]).read_text(encoding="utf-8"))
+        assert body["id"] == meta["id"] and body["filename"] == meta["filename"]
+    assert store.get_course_by_id("b")["quiz"] == [{"question": "Q ?"}]
+
+    assert storage.with_suffix(".json.v1.bak").read_bytes() == original
+    index = json.loads(storage.read_text(encoding="utf-8"))
+    assert index["version"] == JSONDataStore.FORMAT_VERSION
+    assert [meta["id"] for meta in index["courses"]] == ["a", "b", generated]
+    assert "summary" not in index["courses"][0]
+
+    # Deuxième ouverture : plus de migration, même contenu
+    reopened = JSONDataStore(storage)
+    assert reopened.get_all_course_metadata() == metadata
+    assert reopened.get_course_by_id(generated)["summary"] == "Résumé C"
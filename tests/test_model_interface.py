@@ -0,0 +1,80 @@
+import json
+
+import pytest
+import requests
+
+from utils.ModelInterface import ModelInterface
+
+
+class FakeResponse:
+    def __init__(self, lines, status=200):
+        self._lines = lines
+        self.status_code = status
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+    def iter_lines(self):
+        for line in self._lines:
+            if isinstance(line, Exception):
+                raise line
+            yield json.dumps(line).encode("utf-8") if isinstance(line, dict) else line
+
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+        self.payloads = []
+
+    def post(self, url, json=None, **kwargs):
+        self.payloads.append(json)
+        return self.response
+
+
+def _chunk(text, done=False):
+    return {"message": {"role": "assistant", "content": text}, "done": done}
+
+
+def _interface(lines):
+    return ModelInterface({"model": "qwen3", "system_prompt": "Tu es un tuteur."}, session=FakeSession(FakeResponse(lines)))
+
+
+def test_complete_stream_is_recorded():
+    interface = _interface([_chunk("Bon"), _chunk("jour"), _chunk("", done=True)])
+    assert list(interface.send_message_stream("salut")) == ["Bon", "jour"]
+    assert interface.history == [{"role": "user", "content": "salut"}, {"role": "assistant", "content": "Bonjour"}]
+    assert interface.session.payloads[0]["stream"] is True
+
+
+@pytest.mark.parametrize("failure", [
+    requests.exceptions.ChunkedEncodingError("connexion coupée"),
+    {"error": "model crashed"},
+])
+def test_failed_stream_raises_and_keeps_history_clean(failure):
+    interface = _interface([_chunk("Bon"), failure, _chunk("jour", done=True)])
+    received = []
+    with pytest.raises(requests.RequestException):
+        for piece in interface.send_message_stream("salut"):
+            received.append(piece)
+    assert received == ["Bon"]
+    assert interface.history == []
+
+
+def test_stream_without_done_is_an_error():
+    interface = _interface([_chunk("Bon")])
+    with pytest.raises(requests.RequestException, match="before the reply was done"):
+        list(interface.send_message_stream("salut"))
+    assert interface.history == []
+
+
+def test_http_error_raises():
+    interface = ModelInterface({"model": "qwen3"}, session=FakeSession(FakeResponse([], status=500)))
+    with pytest.raises(requests.HTTPError):
+        list(interface.send_message_stream("salut"))
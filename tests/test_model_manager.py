@@ -0,0 +1,72 @@
+import json
+import multiprocessing
+
+import pytest
+
+from utils.model_manager import ModelManager
+
+
+def _create_many(path, worker, count):
+    manager = ModelManager(path)
+    for number in range(count):
+        manager.create_model(f"{worker}-{number}", "assistant", "qwen3", "prompt")
+
+
+def test_crud_round_trip(tmp_path):
+    path = str(tmp_path / "models.json")
+    manager = ModelManager(path)
+    manager.create_model("tuteur", "assistant", "qwen3", "prompt", rag_file="cours.txt")
+    with pytest.raises(ValueError):
+        manager.create_model("tuteur", "assistant", "qwen3", "prompt")
+
+    manager.edit_model("tuteur", model="llama3")
+    assert ModelManager(path).get_model("tuteur")["model"] == "llama3"
+
+    manager.delete_model("tuteur")
+    assert json.loads((tmp_path / "models.json").read_text(encoding="utf-8")) == {}
+    with pytest.raises(ValueError):
+        manager.get_model("tuteur")
+
+
+def test_get_model_returns_a_copy(tmp_path):
+    manager = ModelManager(str(tmp_path / "models.json"))
+    manager.create_model("tuteur", "assistant", "qwen3", "prompt")
+    manager.get_model("tuteur")["model"] = "modifié"
+    assert manager.get_model("tuteur")["model"] == "qwen3"
+
+
+def test_external_changes_are_picked_up(tmp_path):
+    path = tmp_path / "models.json"
+    manager = ModelManager(str(path))
+    manager.create_model("tuteur", "assistant", "qwen3", "prompt")
+
+    ModelManager(str(path)).create_model("autre", "assistant", "qwen3", "prompt")
+    assert sorted(manager.list_models()) == ["autre", "tuteur"]
+
+    path.write_text("pas du json", encoding="utf-8")
+    assert manager.list_models() == []
+
+
+def test_failed_edit_leaves_memory_and_file_unchanged(tmp_path):
+    path = tmp_path / "models.json"
+    manager = ModelManager(str(path))
+    manager.create_model("tuteur", "assistant", "qwen3", "prompt")
+    before = path.read_bytes()
+
+    with pytest.raises(TypeError):
+        manager.edit_model("tuteur", model=object())  # non sérialisable en JSON
+    assert path.read_bytes() == before
+    assert manager.get_model("tuteur")["model"] == "qwen3"
+
+
+def test_concurrent_processes_do_not_lose_writes(tmp_path):
+    path = str(tmp_path / "models.json")
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_create_many, args=(path, worker, 10)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    assert len(ModelManager(path).list_models()) == 40
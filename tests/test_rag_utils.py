@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from utils import rag_utils  # noqa: E402
+from utils.rag_utils import index_document, retrieve_relevant_chunks, sentence_chunking  # noqa: E402
+
+TEXT = " ".join(f"La phrase numéro {number} parle du neurone {number}." for number in range(40))
+
+
+@pytest.fixture
+def document(tmp_path):
+    path = tmp_path / "cours.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    return path
+
+
+def _index(document, tmp_path, **kwargs):
+    return index_document(str(document), model_name="hashing", index_path=str(tmp_path / "index"), **kwargs)
+
+
+def test_sentence_chunking_overlaps():
+    chunks = sentence_chunking("Un. Deux. Trois. Quatre. Cinq.", chunk_size=3, overlap=1)
+    assert chunks == ["Un. Deux. Trois.", "Trois. Quatre. Cinq."]
+    with pytest.raises(ValueError):
+        sentence_chunking("Un.", chunk_size=2, overlap=2)
+
+
+def test_changed_file_only_embeds_new_chunks(document, tmp_path):
+    first = _index(document, tmp_path)
+    assert first.info["last_update"] == {"reused": 0, "embedded": len(first), "removed": 0}
+
+    document.write_text(TEXT + " Une phrase ajoutée à la fin du cours.", encoding="utf-8")
+    second = _index(document, tmp_path)
+    update = second.info["last_update"]
+    assert update["embedded"] >= 1 and update["reused"] >= len(first) - 2
+    assert update["reused"] + update["embedded"] == len(second)
+
+
+def test_unchanged_file_reports_this_call_and_applies_new_metadata(document, tmp_path, monkeypatch):
+    first = _index(document, tmp_path, metadata={"cours": "v1"})
+
+    def no_embedding(*args, **kwargs):
+        raise AssertionError("un fichier inchangé ne doit pas être réindexé")
+
+    monkeypatch.setattr(rag_utils, "create_embeddings", no_embedding)
+    reused = _index(document, tmp_path, metadata={"cours": "v2"})
+
+    assert reused.info["last_update"] == {"reused": len(first), "embedded": 0, "removed": 0}
+    assert all(meta["cours"] == "v2" for meta in reused.metadata)
+    assert [meta["hash"] for meta in reused.metadata] == [meta["hash"] for meta in first.metadata]
+    # Les nouvelles métadonnées sont enregistrées avec l'index
+    assert _index(document, tmp_path, metadata={"cours": "v2"}).metadata == reused.metadata
+
+
+def test_retrieval_finds_the_matching_chunk(document, tmp_path):
+    index = _index(document, tmp_path, chunk_size=1, overlap=0)
+    chunks, scores = retrieve_relevant_chunks(index, "neurone 17", top_k=3)
+    assert any("neurone 17." in chunk for chunk in chunks)
+    assert scores == sorted(scores, reverse=True)
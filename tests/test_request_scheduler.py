@@ -0,0 +1,155 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import request_scheduler
+from utils.request_scheduler import RequestCancelled, RequestScheduler, is_retryable, retry_after
+
+
+class ServiceUnavailable(Exception):
+    """Même nom que l'exception google.api_core correspondante."""
+
+
+def _scheduler(**kwargs):
+    # Débit assez élevé pour que le seau de jetons ne retarde jamais les tests
+    options = {"requests_per_minute": 60_000, "max_concurrency": 2, "max_retries": 3,
+               "timeout": 0, "base_delay": 0.001, "max_delay": 0.01}
+    options.update(kwargs)
+    return RequestScheduler(**options)
+
+
+def _flaky(failures, exc_type=ServiceUnavailable):
+    calls = []
+
+    def call():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise exc_type("indisponible")
+        return "ok"
+
+    return call, calls
+
+
+def test_transient_errors_are_retried_until_success():
+    call, calls = _flaky(2)
+    assert _scheduler().submit(call) == "ok"
+    assert len(calls) == 3
+
+
+def test_gives_up_after_max_retries():
+    call, calls = _flaky(10)
+    with pytest.raises(ServiceUnavailable):
+        _scheduler(max_retries=2).submit(call)
+    assert len(calls) == 3
+
+
+def test_permanent_errors_are_not_retried():
+    call, calls = _flaky(1, ValueError)
+    with pytest.raises(ValueError):
+        _scheduler().submit(call)
+    assert len(calls) == 1
+
+
+def test_backoff_is_capped_exponential_jitter(monkeypatch):
+    monkeypatch.setattr(request_scheduler.random, "uniform", lambda low, high: high)
+    scheduler = _scheduler(base_delay=1.0, max_delay=10.0)
+    error = ServiceUnavailable("indisponible")
+    assert [scheduler._backoff(attempt, error) for attempt in range(6)] == [1, 2, 4, 8, 10, 10]
+
+
+def test_server_retry_hint_pauses_every_caller(monkeypatch):
+    monkeypatch.setattr(request_scheduler.random, "uniform", lambda low, high: 0.0)
+    scheduler = _scheduler(max_delay=60.0)
+    error = ServiceUnavailable("quota")
+    error.response = SimpleNamespace(headers={"Retry-After": "30"})
+
+    assert scheduler._backoff(0, error) == 30
+    assert scheduler._bucket.reserve() == pytest.approx(30, abs=1)
+
+
+def test_retry_after_sources():
+    header = Exception()
+    header.response = SimpleNamespace(headers={"Retry-After": "4"})
+    details = Exception()
+    details.details = [SimpleNamespace(retry_delay=SimpleNamespace(seconds=2, nanos=500_000_000))]
+
+    assert retry_after(header) == 4
+    assert retry_after(details) == 2.5
+    assert retry_after(Exception("429 Please retry in 3.5s.")) == 3.5
+    assert retry_after(Exception("retry_delay { seconds: 7 }")) == 7
+    assert retry_after(Exception("boom")) is None
+
+
+def test_is_retryable():
+    coded = Exception()
+    coded.code = 429
+    assert is_retryable(coded)
+    assert is_retryable(TimeoutError())
+    assert is_retryable(ServiceUnavailable())
+    assert not is_retryable(ValueError())
+
+
+def test_stream_is_consumed_while_holding_the_slot():
+    scheduler = _scheduler(max_concurrency=1)
+    slot_free = []
+
+    def consume(stream):
+        acquired = scheduler._slots.acquire(blocking=False)
+        if acquired:
+            scheduler._slots.release()
+        slot_free.append(acquired)
+        return "".join(stream)
+
+    assert scheduler.submit(lambda: iter(["a", "b"]), consume=consume) == "ab"
+    assert slot_free == [False]
+    # La place est rendue une fois le flux lu
+    assert scheduler._slots.acquire(blocking=False)
+
+
+def test_concurrency_is_bounded():
+    scheduler = _scheduler(max_concurrency=2)
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        threading.Event().wait(0.02)
+        with lock:
+            running[0] -= 1
+
+    threads = [threading.Thread(target=scheduler.submit, args=(call,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
+
+
+def test_cancellation_interrupts_the_backoff_wait():
+    call, calls = _flaky(10)
+    scheduler = _scheduler(base_delay=30.0, max_delay=30.0)
+    with pytest.raises(RequestCancelled):
+        scheduler.submit(call, cancelled=lambda: bool(calls))
+    assert len(calls) == 1
+
+
+def test_generate_passes_the_request_timeout():
+    model = SimpleNamespace(generate_content=lambda contents, **kwargs: (contents, kwargs))
+    contents, kwargs = _scheduler(timeout=12).generate(model, "prompt", stream=True)
+    assert contents == "prompt"
+    assert kwargs == {"stream": True, "request_options": {"timeout": 12}}
+
+
+def test_burst_of_max_concurrency_calls_does_not_wait():
+    # Au débit par défaut (1 requête/s), les appels lancés ensemble ne sont pas espacés
+    scheduler = RequestScheduler(requests_per_minute=60, max_concurrency=4, timeout=0)
+    started = time.monotonic()
+    for _ in range(4):
+        scheduler.submit(lambda: None)
+    assert time.monotonic() - started < 0.5
+    # Au-delà de la rafale, le débit reprend la main
+    assert scheduler._bucket.reserve() > 0
@@ -0,0 +1,119 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import session_store
+from utils.conversation_history import ConversationHistory
+from utils.session_store import SessionStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_store, "time", SimpleNamespace(monotonic=clock, time=time.time))
+    return clock
+
+
+def _interface():
+    return SimpleNamespace(conversation=ConversationHistory(max_tokens=4096))
+
+
+def _chat(store, key, message="bonjour"):
+    with store.use(key, _interface) as interface:
+        interface.conversation.add_turn(message, "réponse")
+        return interface
+
+
+def test_same_key_reuses_the_interface(clock):
+    store = SessionStore(ttl=60, max_sessions=4)
+    first = _chat(store, ("tuteur", "a"))
+    assert _chat(store, ("tuteur", "a")) is first
+    assert _chat(store, ("tuteur", "b")) is not first
+    assert len(store) == 2
+
+
+def test_idle_sessions_expire(clock):
+    store = SessionStore(ttl=60, max_sessions=4)
+    _chat(store, ("tuteur", "a"))
+    clock.now += 30
+    _chat(store, ("tuteur", "b"))
+    clock.now += 45
+    _chat(store, ("tuteur", "c"))
+
+    assert sorted(key[1] for key in store._sessions) == ["b", "c"]
+    assert store.stats()["evictions"] == 1
+
+
+def test_least_recently_used_session_is_evicted_over_the_cap(clock):
+    store = SessionStore(ttl=3600, max_sessions=2)
+    _chat(store, ("tuteur", "a"))
+    _chat(store, ("tuteur", "b"))
+    _chat(store, ("tuteur", "a"))
+    _chat(store, ("tuteur", "c"))
+
+    assert sorted(key[1] for key in store._sessions) == ["a", "c"]
+
+
+def test_session_in_use_is_never_evicted(clock):
+    store = SessionStore(ttl=60, max_sessions=1)
+    with store.use(("tuteur", "a"), _interface) as busy:
+        clock.now += 120
+        _chat(store, ("tuteur", "b"))
+        assert ("tuteur", "a") in store._sessions
+    with store.use(("tuteur", "a"), _interface) as again:
+        assert again is busy
+
+
+def test_evicted_history_is_restored_from_disk(clock, tmp_path):
+    store = SessionStore(ttl=3600, max_sessions=1, persist_dir=tmp_path)
+    first = _chat(store, ("tuteur", "a"), "première question")
+    _chat(store, ("tuteur", "b"))
+
+    with store.use(("tuteur", "a"), _interface) as interface:
+        assert interface is not first
+        assert interface.conversation.messages == first.conversation.messages
+
+
+def test_malformed_session_file_starts_a_fresh_conversation(clock, tmp_path, caplog):
+    store = SessionStore(ttl=3600, max_sessions=4, persist_dir=tmp_path)
+    key = ("tuteur", "a")
+    store._session_path(key).write_text(
+        '{"model": "tuteur", "session_id": "a", "conversation": {"messages": 3}}', encoding="utf-8"
+    )
+
+    with store.use(key, _interface) as interface:
+        assert interface.conversation.messages == []
+    assert "illisible" in caplog.text
+
+
+def test_discard_keeps_or_forgets_saved_history(clock, tmp_path):
+    store = SessionStore(ttl=3600, max_sessions=4, persist_dir=tmp_path)
+    _chat(store, ("tuteur", "a"))
+    _chat(store, ("autre", "a"))
+
+    store.discard("tuteur")
+    assert ("tuteur", "a") not in store._sessions
+    assert store._session_path(("tuteur", "a")).exists()
+
+    store.discard("tuteur", forget=True)
+    assert not store._session_path(("tuteur", "a")).exists()
+    assert ("autre", "a") in store._sessions
+
+
+def test_flush_writes_live_sessions(clock, tmp_path):
+    store = SessionStore(ttl=3600, max_sessions=4, persist_dir=tmp_path)
+    _chat(store, ("tuteur", "a"))
+    store.flush()
+
+    reloaded = SessionStore(ttl=3600, max_sessions=4, persist_dir=tmp_path)
+    with reloaded.use(("tuteur", "a"), _interface) as interface:
+        assert interface.conversation.messages[0]["content"] == "bonjour"
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from utils.vector_index import VectorIndex
+
+DIM = 32
+
+
+def _clustered(count, seed=0, clusters=40):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, DIM))
+    points = centers[rng.integers(clusters, size=count)] + 0.3 * rng.normal(size=(count, DIM))
+    return points.astype(np.float32)
+
+
+def _index(count=5000):
+    index = VectorIndex(DIM, "test")
+    vectors = _clustered(count)
+    index.add(vectors, [f"chunk {number}" for number in range(count)])
+    return index
+
+
+def _recall(approx_ids, exact_ids):
+    hits = sum(len(set(approx) & set(exact)) for approx, exact in zip(approx_ids, exact_ids))
+    return hits / exact_ids.size
+
+
+def test_exact_search_matches_brute_force():
+    index = _index(500)
+    queries = _clustered(10, seed=1)
+    scores, ids = index.search(queries, top_k=5)
+
+    normalized = index.vectors / np.linalg.norm(index.vectors, axis=1, keepdims=True)
+    brute = (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ normalized.T
+    np.testing.assert_array_equal(ids, np.argsort(-brute, axis=1)[:, :5])
+    assert np.all(np.diff(scores, axis=1) <= 0)
+
+
+def test_ivf_recall_against_exact_search():
+    index = _index()
+    queries = _clustered(100, seed=1)
+    _, exact_ids = index.search(queries, top_k=10, nprobe=0)
+
+    index.train_ivf(nlist=64, seed=0)
+    _, approx_ids = index.search(queries, top_k=10, nprobe=16)
+    assert _recall(approx_ids, exact_ids) >= 0.9
+
+    # Toutes les listes parcourues : la recherche redevient exacte
+    _, full_ids = index.search(queries, top_k=10, nprobe=64)
+    assert _recall(full_ids, exact_ids) == 1.0
+
+
+def test_recall_grows_with_nprobe():
+    index = _index()
+    queries = _clustered(100, seed=2)
+    _, exact_ids = index.search(queries, top_k=10, nprobe=0)
+    index.train_ivf(nlist=64, seed=0)
+
+    recalls = [_recall(index.search(queries, top_k=10, nprobe=nprobe)[1], exact_ids) for nprobe in (1, 4, 16)]
+    assert recalls == sorted(recalls)
+    assert recalls[0] < 1.0
+
+
+def test_vectors_added_after_training_are_searchable():
+    index = _index(1000)
+    index.train_ivf(nlist=16, seed=0)
+    extra = _clustered(1, seed=3)
+    index.add(extra, ["nouveau"])
+
+    _, ids = index.search(extra, top_k=1, nprobe=4)
+    assert index.chunks[ids[0, 0]] == "nouveau"
+
+
+def test_save_and_load_keep_the_ivf(tmp_path):
+    index = _index(1000)
+    index.train_ivf(nlist=16, seed=0)
+    queries = _clustered(5, seed=4)
+    expected = index.search(queries, top_k=5, nprobe=4)
+
+    loaded = VectorIndex.load(index.save(tmp_path / "index"))
+    assert loaded.has_ivf
+    assert loaded.chunks == index.chunks
+    for got, want in zip(loaded.search(queries, top_k=5, nprobe=4), expected):
+        np.testing.assert_allclose(got, want, rtol=1e-6)
+
+
+def test_add_rejects_mismatched_input():
+    index = VectorIndex(DIM, "test")
+    with pytest.raises(ValueError):
+        index.add(np.zeros((2, DIM + 1)), ["a", "b"])
+    with pytest.raises(ValueError):
+        index.add(np.ones((2, DIM)), ["a"])
@@ -4,13 +4,12 @@ from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Union
 import os
 
-from PyQt6.QtCore import Qt, QThread
-from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import Qt, QThread, QTimer
+from PyQt6.QtGui import QIcon, QTextCursor
 from PyQt6.QtWidgets import (
+    QApplication,
     QFileDialog,
     QHBoxLayout,
-    QLayout,
-    QLayoutItem,
     QLabel,
     QListWidget,
     QListWidgetItem,
@@ -18,7 +17,6 @@ from PyQt6.QtWidgets import (
     QMessageBox,
     QProgressBar,
     QPushButton,
-    QScrollArea,
     QStatusBar,
     QTabWidget,
     QTextBrowser,
@@ -31,14 +29,21 @@ from PyQt6.QtWidgets import (
 )
 
 from utils.generation import GenerationWorker
+from utils.generation_queue import GenerationJob, GenerationQueue
 from ui.FlashcardWidget import FlashcardWidget
-from ui.QuizWidget import QuizWidget
+from ui.QuizModel import QuizModel
+from ui.QuizPanel import QuizPanel
 from utils.json_datastore import JSONDataStore
+from utils.course_loader import CourseLoader, LoadedCourse
 
 
 class MainWindow(QMainWindow):
     """Fenêtre principale de l'application NeuroLearn."""
 
+    _ARTIFACT_TABS = {"summary": 0, "quiz": 1, "flashcards": 2}
+    # Intervalle minimal entre deux rendus du résumé en streaming
+    _SUMMARY_RENDER_INTERVAL_MS = 150
+
     def __init__(self) -> None:
         super().__init__()
         self.setWindowTitle("NeuroLearn")
@@ -69,18 +74,44 @@ class MainWindow(QMainWindow):
         self._status_bar.addWidget(self._status_message)
         self._status_bar.addPermanentWidget(self._progress)
 
-        self._datastore = JSONDataStore()
+        # Créé à la première utilisation : voir la propriété _datastore et load_history
+        self._datastore_instance: Optional[JSONDataStore] = None
+        self._course_loader = CourseLoader(parent=self)
+        self._course_loader.summary_ready.connect(self._on_course_summary_loaded)
+        self._course_loader.quiz_ready.connect(self._on_course_quiz_loaded)
+        self._course_loader.flashcards_ready.connect(self._on_course_flashcards_loaded)
+        self._course_loader.failed.connect(self._on_course_load_failed)
         self._current_pdf_name: Optional[str] = None
         self._current_summary: Optional[str] = None
         self._current_quiz: Optional[Dict[str, List[Dict[str, Any]]]] = None
         self._current_flashcards: Optional[Dict[str, List[Dict[str, Any]]]] = None
         self._generation_error = False
+        self._failed_artifacts: Dict[str, str] = {}
+        self._summary_stream = ""
+        self._summary_rendered_upto = 0
+        self._summary_render_timer = QTimer(self)
+        self._summary_render_timer.setSingleShot(True)
+        self._summary_render_timer.setInterval(self._SUMMARY_RENDER_INTERVAL_MS)
+        self._summary_render_timer.timeout.connect(self._render_summary_stream)
 
         self.worker_thread: QThread | None = None
         self.worker: GenerationWorker | None = None
+        self._queue = GenerationQueue(parent=self)
+        self._queue_items: Dict[int, QListWidgetItem] = {}
         self._build_ui()
         self._connect_signals()
         self._connect_history_signals()
+
+    @property
+    def _datastore(self) -> JSONDataStore:
+        if self._datastore_instance is None:
+            self._datastore_instance = JSONDataStore()
+            self._course_loader.datastore = self._datastore_instance
+        return self._datastore_instance
+
+    def load_history(self) -> None:
+        """Charge l'historique des cours ; appelé par main.py après le premier affichage."""
+
         self._refresh_history_list()
 
     def _build_ui(self) -> None:
@@ -92,9 +123,19 @@ class MainWindow(QMainWindow):
         main_layout.setSpacing(12)
         central_widget.setLayout(main_layout)
 
+        load_layout = QHBoxLayout()
+        load_layout.setContentsMargins(0, 0, 0, 0)
+        load_layout.setSpacing(8)
         self.load_button = QPushButton("Charger un cours")
         self.load_button.setObjectName("loadButton")
-        main_layout.addWidget(self.load_button)
+        load_layout.addWidget(self.load_button, stretch=1)
+        self.batch_button = QPushButton("Charger plusieurs cours")
+        self.batch_button.setProperty("variant", "ghost")
+        load_layout.addWidget(self.batch_button)
+        self.folder_button = QPushButton("Charger un dossier")
+        self.folder_button.setProperty("variant", "ghost")
+        load_layout.addWidget(self.folder_button)
+        main_layout.addLayout(load_layout)
 
         content_layout = QHBoxLayout()
         content_layout.setContentsMargins(0, 0, 0, 0)
@@ -129,6 +170,32 @@ class MainWindow(QMainWindow):
         self.history_empty_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         history_layout.addWidget(self.history_empty_label)
 
+        self.queue_title = QLabel("File d'attente")
+        self.queue_title.setObjectName("historyTitle")
+        history_layout.addWidget(self.queue_title)
+
+        self.queue_list = QListWidget()
+        self.queue_list.setObjectName("historyList")
+        self.queue_list.setSelectionMode(QListWidget.SelectionMode.SingleSelection)
+        self.queue_list.setMaximumHeight(180)
+        history_layout.addWidget(self.queue_list)
+
+        queue_buttons = QHBoxLayout()
+        queue_buttons.setContentsMargins(0, 0, 0, 0)
+        queue_buttons.setSpacing(8)
+        self.cancel_job_button = QPushButton("Annuler")
+        self.cancel_job_button.setProperty("variant", "ghost")
+        self.cancel_job_button.setEnabled(False)
+        queue_buttons.addWidget(self.cancel_job_button)
+        self.retry_job_button = QPushButton("Réessayer")
+        self.retry_job_button.setProperty("variant", "ghost")
+        self.retry_job_button.setEnabled(False)
+        queue_buttons.addWidget(self.retry_job_button)
+        history_layout.addLayout(queue_buttons)
+        self._queue_widgets = (self.queue_title, self.queue_list, self.cancel_job_button, self.retry_job_button)
+        for widget in self._queue_widgets:
+            widget.setVisible(False)
+
         content_layout.addWidget(self.history_panel, stretch=0)
 
         self.tabs = QTabWidget()
@@ -145,19 +212,11 @@ class MainWindow(QMainWindow):
         summary_container.setLayout(summary_layout)
         self.tabs.addTab(summary_container, "Résumé")
 
-        self.quiz_layout = QVBoxLayout()
-        self.quiz_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-        self.quiz_layout.setContentsMargins(12, 12, 12, 12)
-        self.quiz_layout.setSpacing(16)
-        quiz_container = QWidget()
-        quiz_container.setLayout(self.quiz_layout)
-        self.quiz_scroll = QScrollArea()
-        self.quiz_scroll.setWidgetResizable(True)
-        self.quiz_scroll.setWidget(quiz_container)
+        self.quiz_panel = QuizPanel()
         quiz_tab = QWidget()
         quiz_tab_layout = QVBoxLayout(quiz_tab)
         quiz_tab_layout.setContentsMargins(0, 0, 0, 0)
-        quiz_tab_layout.addWidget(self.quiz_scroll)
+        quiz_tab_layout.addWidget(self.quiz_panel)
         self.tabs.addTab(quiz_tab, "Quiz")
 
         flashcard_tab = QWidget()
@@ -181,6 +240,16 @@ class MainWindow(QMainWindow):
 
     def _connect_signals(self) -> None:
         self.load_button.clicked.connect(self._on_load_clicked)
+        self.batch_button.clicked.connect(self._on_batch_clicked)
+        self.folder_button.clicked.connect(self._on_folder_clicked)
+
+        self._queue.job_added.connect(self._on_job_added)
+        self._queue.job_changed.connect(self._on_job_changed)
+        self._queue.job_finished.connect(self._on_batch_job_finished)
+        self._queue.idle.connect(self._on_queue_idle)
+        self.queue_list.itemSelectionChanged.connect(self._update_queue_buttons)
+        self.cancel_job_button.clicked.connect(self._on_cancel_job_clicked)
+        self.retry_job_button.clicked.connect(self._on_retry_job_clicked)
 
     def _connect_history_signals(self) -> None:
         self.history_list.itemSelectionChanged.connect(self._on_history_selection_changed)
@@ -196,6 +265,190 @@ class MainWindow(QMainWindow):
         if pdf_path:
             self._start_generation(pdf_path)
 
+    def _on_batch_clicked(self) -> None:
+        pdf_paths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Sélectionner des cours",
+            str(Path.home()),
+            "Fichiers PDF (*.pdf)",
+        )
+        if pdf_paths:
+            self._enqueue_pdfs(pdf_paths)
+
+    def _on_folder_clicked(self) -> None:
+        folder = QFileDialog.getExistingDirectory(self, "Sélectionner un dossier de cours", str(Path.home()))
+        if not folder:
+            return
+        pdf_paths = sorted(str(path) for path in Path(folder).iterdir() if path.suffix.lower() == ".pdf")
+        if not pdf_paths:
+            QMessageBox.information(self, "Dossier vide", "Aucun fichier PDF trouvé dans ce dossier.")
+            return
+        self._enqueue_pdfs(pdf_paths)
+
+    @staticmethod
+    def _is_premium() -> bool:
+        return os.environ.get("PREMIUM", "0") in ("1", "true", "True")
+
+    @staticmethod
+    def _default_num_questions(is_premium: bool) -> int:
+        # Gratuit -> figé à 30, premium -> valeur paramétrable
+        if not is_premium:
+            return 30
+        return int(os.environ.get("DEFAULT_QUIZ_QUESTIONS", "10"))
+
+    def _show_course_limit_message(self) -> None:
+        QMessageBox.information(
+            self,
+            "Limite atteinte",
+            (
+                "Vous avez atteint la limite de 3 cours pour la version gratuite.\n\n"
+                "Pour débloquer des cours supplémentaires, passez à la version premium (400 MAD).\n"
+                "Contact : +212634350272"
+            ),
+        )
+
+    def _active_generation_count(self) -> int:
+        """Cours en cours de génération : file par lot plus la génération d'un fichier seul."""
+
+        return self._queue.active_count() + (1 if self.worker_thread is not None else 0)
+
+    def _remaining_free_courses(self) -> int:
+        stored = len(self._datastore.get_all_course_metadata())
+        return 3 - stored - self._active_generation_count()
+
+    def _enqueue_pdfs(self, pdf_paths: List[str]) -> None:
+        is_premium = self._is_premium()
+        if not is_premium:
+            remaining = self._remaining_free_courses()
+            if remaining <= 0:
+                self._show_course_limit_message()
+                return
+            if len(pdf_paths) > remaining:
+                QMessageBox.information(
+                    self,
+                    "Limite atteinte",
+                    f"La version gratuite est limitée à 3 cours : seuls les {remaining} premiers "
+                    "fichiers seront traités.",
+                )
+                pdf_paths = pdf_paths[:remaining]
+
+        num_questions = self._default_num_questions(is_premium)
+        for pdf_path in pdf_paths:
+            self._queue.enqueue(pdf_path, num_questions)
+        self._set_busy(True, f"Traitement par lot : {self._queue.active_count()} cours en file")
+
+    def _job_status_text(self, job: GenerationJob) -> str:
+        if job.status == GenerationJob.PENDING:
+            status = "En attente"
+        elif job.status == GenerationJob.RUNNING:
+            status = f"En cours ({job.completed_artifacts}/3)"
+        elif job.status == GenerationJob.DONE:
+            status = "Terminé (partiel)" if job.failed_artifacts else "Terminé"
+        elif job.status == GenerationJob.FAILED:
+            status = f"Échec : {job.error}"
+        else:
+            status = "Annulé"
+        return f"{job.filename}\n{status}"
+
+    def _on_job_added(self, job_id: int) -> None:
+        job = self._queue.job(job_id)
+        if job is None:
+            return
+        item = QListWidgetItem(self._job_status_text(job))
+        item.setData(Qt.ItemDataRole.UserRole, job_id)
+        self.queue_list.addItem(item)
+        self._queue_items[job_id] = item
+        for widget in self._queue_widgets:
+            widget.setVisible(True)
+
+    def _on_job_changed(self, job_id: int) -> None:
+        job = self._queue.job(job_id)
+        item = self._queue_items.get(job_id)
+        if job is None or item is None:
+            return
+        item.setText(self._job_status_text(job))
+        item.setToolTip(job.error or job.pdf_path)
+        self._update_queue_buttons()
+        if self._queue.active_count():
+            self._status_message.setText(f"Traitement par lot : {self._queue.active_count()} cours en file")
+
+    def _on_batch_job_finished(self, job_id: int) -> None:
+        job = self._queue.job(job_id)
+        if job is None:
+            return
+        if not self._is_premium() and len(self._datastore.get_all_course_metadata()) >= 3:
+            self._show_course_limit_message()
+            return
+        try:
+            self._datastore.save_new_course(
+                filename=job.filename,
+                summary=job.summary or "",
+                quiz_data={"questions": job.quiz or []},
+                flashcards_data={"flashcards": job.flashcards or []},
+            )
+        except Exception as exc:
+            QMessageBox.warning(
+                self,
+                "Enregistrement",
+                f"Impossible d'enregistrer le cours {job.filename} : {exc}",
+            )
+            return
+        self._refresh_history_list()
+
+    def _on_queue_idle(self) -> None:
+        if self.worker_thread is None:
+            self._set_busy(False, "Traitement par lot terminé")
+
+    def _selected_job_id(self) -> Optional[int]:
+        items = self.queue_list.selectedItems()
+        if not items:
+            return None
+        return items[0].data(Qt.ItemDataRole.UserRole)
+
+    def _update_queue_buttons(self) -> None:
+        job_id = self._selected_job_id()
+        job = self._queue.job(job_id) if job_id is not None else None
+        status = job.status if job is not None else None
+        self.cancel_job_button.setEnabled(status in (GenerationJob.PENDING, GenerationJob.RUNNING))
+        self.retry_job_button.setEnabled(status in (GenerationJob.FAILED, GenerationJob.CANCELLED))
+
+    def _on_cancel_job_clicked(self) -> None:
+        job_id = self._selected_job_id()
+        if job_id is not None:
+            self._queue.cancel(job_id)
+
+    def _on_retry_job_clicked(self) -> None:
+        job_id = self._selected_job_id()
+        if job_id is None:
+            return
+        if not self._is_premium() and self._remaining_free_courses() <= 0:
+            self._show_course_limit_message()
+            return
+        if not self._queue.retry(job_id):
+            QMessageBox.information(
+                self,
+                "File d'attente",
+                "Ce cours est encore en cours d'arrêt, réessayez dans un instant.",
+            )
+            return
+        self._set_busy(True, f"Traitement par lot : {self._queue.active_count()} cours en file")
+
+    def closeEvent(self, event) -> None:  # type: ignore[override]
+        self._set_busy(True, "Arrêt des générations en cours…")
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            self._queue.shutdown()
+            if self.worker is not None:
+                self.worker.cancel()
+            if self.worker_thread is not None and self.worker_thread.isRunning():
+                # Même règle que la file : pas de délai maximal, le thread ne doit pas être détruit en marche
+                self.worker_thread.quit()
+                self.worker_thread.wait()
+        finally:
+            QApplication.restoreOverrideCursor()
+        self._course_loader.shutdown()
+        super().closeEvent(event)
+
     def _start_generation(self, pdf_path: str) -> None:
         if self.worker_thread is not None and self.worker_thread.isRunning():
             QMessageBox.warning(
@@ -206,28 +459,14 @@ class MainWindow(QMainWindow):
             return
 
         # Vérifier le mode (freemium / premium)
-        is_premium = os.environ.get("PREMIUM", "0") in ("1", "true", "True")
+        is_premium = self._is_premium()
 
-        # Limite du nombre de cours pour les utilisateurs gratuits
-        metadata = self._datastore.get_all_course_metadata()
-        if not is_premium and len(metadata) >= 3:
-            QMessageBox.information(
-                self,
-                "Limite atteinte",
-                (
-                    "Vous avez atteint la limite de 3 cours pour la version gratuite.\n\n"
-                    "Pour débloquer des cours supplémentaires, passez à la version premium (400 MAD).\n"
-                    "Contact : +212634350272"
-                ),
-            )
+        # Limite du nombre de cours pour les utilisateurs gratuits (cours de la file compris)
+        if not is_premium and self._remaining_free_courses() <= 0:
+            self._show_course_limit_message()
             return
 
-        # Déterminer le nombre de questions : gratuit -> figé à 30, premium -> valeur paramétrable
-        if not is_premium:
-            num_questions = 30
-        else:
-            default_questions = int(os.environ.get("DEFAULT_QUIZ_QUESTIONS", "10"))
-            num_questions = default_questions
+        num_questions = self._default_num_questions(is_premium)
 
         self._set_busy(True, "Génération en cours…")
         self.load_button.setEnabled(False)
@@ -240,6 +479,7 @@ class MainWindow(QMainWindow):
         self._current_quiz = None
         self._current_flashcards = None
         self._generation_error = False
+        self._failed_artifacts = {}
 
         self.worker_thread = QThread(self)
         self.worker = GenerationWorker(pdf_path, num_questions=num_questions)
@@ -252,32 +492,68 @@ class MainWindow(QMainWindow):
 
         self.worker.finished.connect(self._on_generation_finished)
         self.worker.error.connect(self._on_worker_error)
+        self.worker.artifact_error.connect(self._on_artifact_error)
         self.worker.finished_summary.connect(self.display_summary)
+        self.worker.summary_progress.connect(self._on_summary_progress)
         self.worker.finished_quiz.connect(self.display_quiz)
         self.worker.finished_flashcards.connect(self.display_flashcards)
 
         self.worker_thread.start()
 
     def _clear_results(self) -> None:
+        self._summary_render_timer.stop()
+        self._summary_stream = ""
+        self._summary_rendered_upto = 0
         self.summary_edit.clear()
-        self._clear_layout(self.quiz_layout)
+        self.quiz_panel.clear()
         self.flashcard_widget.clear()
 
-    def _clear_layout(self, layout: QLayout) -> None:
-        while layout.count():
-            item = layout.takeAt(0)
-            if item is None:
-                continue
-            widget = item.widget()
-            if widget is not None:
-                widget.deleteLater()
-            child_layout = item.layout()
-            if child_layout is not None:
-                self._clear_layout(child_layout)
-
-    def display_summary(self, summary_text: str) -> None:
+    def _on_summary_progress(self, chunk: str) -> None:
+        if not self._summary_stream:
+            self.tabs.setTabEnabled(0, True)
+            self.tabs.setCurrentIndex(0)
+            self._status_message.setText("Rédaction du résumé…")
+        self._summary_stream += chunk
+        if not self._summary_render_timer.isActive():
+            self._summary_render_timer.start()
+
+    def _render_summary_stream(self) -> None:
+        """Ajoute au rendu les paragraphes du flux déjà complets.
+
+        Seuls les blocs terminés par une ligne vide sont rendus, pour ne pas
+        afficher un élément Markdown à moitié reçu ; le rendu complet est refait
+        une seule fois dans display_summary.
+        """
+
+        boundary = self._summary_stream.rfind("\n\n")
+        if boundary <= self._summary_rendered_upto:
+            return
+        fragment = self._summary_stream[self._summary_rendered_upto:boundary].strip()
+        self._summary_rendered_upto = boundary
+        if not fragment:
+            return
+
+        scrollbar = self.summary_edit.verticalScrollBar()
+        follow = scrollbar.value() >= scrollbar.maximum() - 4
+        cursor = QTextCursor(self.summary_edit.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        if not self.summary_edit.document().isEmpty():
+            cursor.insertBlock()
+        cursor.insertMarkdown(fragment)
+        if follow:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def display_summary(self, summary_text: str, html: Optional[str] = None) -> None:
+        self._summary_render_timer.stop()
+        self._summary_stream = ""
+        self._summary_rendered_upto = 0
         stripped = summary_text.strip()
-        self.summary_edit.setMarkdown(stripped)
+        # Même moteur Markdown (Qt) dans les deux cas ; un cours de l'historique arrive
+        # déjà rendu par CourseLoader et n'est pas analysé dans le thread de l'interface
+        if html:
+            self.summary_edit.setHtml(html)
+        else:
+            self.summary_edit.setMarkdown(stripped)
         self.tabs.setTabEnabled(0, True)
         self._current_summary = stripped
 
@@ -289,17 +565,7 @@ class MainWindow(QMainWindow):
             quiz_items = quiz_payload
 
         quiz_list: List[Dict[str, Any]] = list(quiz_items)
-        self._clear_layout(self.quiz_layout)
-        count = 0
-        for item in quiz_list:
-            question = item.get("question") or item.get("prompt") or "Question"
-            options = item.get("options") or item.get("choices") or []
-            answer = item.get("answer") or item.get("correct_answer") or ""
-            self.quiz_layout.addWidget(QuizWidget(question, options, answer))
-            count += 1
-
-        if count == 0:
-            self.quiz_layout.addWidget(QuizWidget("Aucune question disponible.", [], ""))
+        self.quiz_panel.set_model(QuizModel.from_items(quiz_list))
         self.tabs.setTabEnabled(1, True)
         self._current_quiz = {"questions": quiz_list}
 
@@ -320,11 +586,29 @@ class MainWindow(QMainWindow):
         self._current_flashcards = {"flashcards": flashcard_list}
 
     def _on_generation_finished(self) -> None:
-        self._set_busy(False, "Génération terminée")
         self.load_button.setEnabled(True)
+        if self._generation_error:
+            return
+
+        if self._failed_artifacts:
+            self._set_busy(False, "Génération terminée avec des erreurs")
+            labels = {"summary": "Résumé", "quiz": "Quiz", "flashcards": "Flashcards"}
+            details = "\n".join(
+                f"• {labels.get(name, name)} : {message}" for name, message in self._failed_artifacts.items()
+            )
+            QMessageBox.warning(
+                self,
+                "Génération partielle",
+                f"Certains contenus n'ont pas pu être générés :\n\n{details}",
+            )
+        else:
+            self._set_busy(False, "Génération terminée")
+
         self._toggle_tabs(True)
-        if not self._generation_error:
-            self._persist_generated_course()
+        for name, index in self._ARTIFACT_TABS.items():
+            if name in self._failed_artifacts:
+                self.tabs.setTabEnabled(index, False)
+        self._persist_generated_course()
 
     def _on_worker_error(self, message: str) -> None:
         self._set_busy(False, "Erreur pendant la génération")
@@ -333,6 +617,9 @@ class MainWindow(QMainWindow):
         self._toggle_tabs(False)
         self._generation_error = True
 
+    def _on_artifact_error(self, artifact: str, message: str) -> None:
+        self._failed_artifacts[artifact] = message
+
     def _cleanup_thread(self) -> None:
         if self.worker_thread is not None:
             self.worker_thread.deleteLater()
@@ -364,12 +651,10 @@ class MainWindow(QMainWindow):
                 self.tabs.setTabIcon(index, QIcon(str(icon_path)))
 
     def _persist_generated_course(self) -> None:
-        if (
-            not self._current_pdf_name
-            or self._current_summary is None
-            or self._current_quiz is None
-            or self._current_flashcards is None
-        ):
+        if not self._current_pdf_name:
+            return
+        # Un artefact en échec ne doit pas faire perdre ceux qui ont abouti
+        if self._current_summary is None and self._current_quiz is None and self._current_flashcards is None:
             return
 
         # Version gratuite : limite de 3 cours
@@ -387,9 +672,9 @@ class MainWindow(QMainWindow):
         try:
             course_id = self._datastore.save_new_course(
                 filename=self._current_pdf_name,
-                summary=self._current_summary,
-                quiz_data=self._current_quiz,
-                flashcards_data=self._current_flashcards,
+                summary=self._current_summary or "",
+                quiz_data=self._current_quiz or {"questions": []},
+                flashcards_data=self._current_flashcards or {"flashcards": []},
             )
         except Exception as exc:
             QMessageBox.warning(
@@ -433,32 +718,33 @@ class MainWindow(QMainWindow):
         selected_items = self.history_list.selectedItems()
         self.delete_button.setEnabled(bool(selected_items))
         if not selected_items:
+            self._course_loader.cancel()
             return
 
         course_id = selected_items[0].data(Qt.ItemDataRole.UserRole)
         if not course_id:
             return
 
-        course = self._datastore.get_course_by_id(str(course_id))
-        if not course:
-            QMessageBox.warning(
-                self,
-                "Historique",
-                "Impossible de charger ce cours. L'entrée semble corrompue.",
-            )
-            self._refresh_history_list()
-            return
-
-        summary = course.get("summary", "")
-        quiz = course.get("quiz", [])
-        flashcards = course.get("flashcards", [])
+        # Lecture et préparation en arrière-plan ; les onglets se remplissent au fil de l'eau
+        self._toggle_tabs(False)
+        self.tabs.setCurrentIndex(0)
+        self._course_loader.load(str(course_id))
 
-        self.display_summary(summary)
-        self.display_quiz(quiz)
-        self.display_flashcards(flashcards)
-        self._toggle_tabs(True)
+    def _on_course_summary_loaded(self, course: LoadedCourse) -> None:
+        self._current_pdf_name = course.filename
+        self.display_summary(course.summary, html=course.summary_html)
         self.tabs.setCurrentIndex(0)
-        self._current_pdf_name = course.get("filename", "Cours")
+
+    def _on_course_quiz_loaded(self, course: LoadedCourse) -> None:
+        self.display_quiz(course.quiz)
+
+    def _on_course_flashcards_loaded(self, course: LoadedCourse) -> None:
+        self.display_flashcards(course.flashcards)
+
+    def _on_course_load_failed(self, course_id: str, message: str) -> None:
+        self._course_loader.forget(course_id)
+        QMessageBox.warning(self, "Historique", message)
+        self._refresh_history_list()
 
     def _on_delete_clicked(self) -> None:
         selected_items = self.history_list.selectedItems()
@@ -479,6 +765,7 @@ class MainWindow(QMainWindow):
         )
         if reply == QMessageBox.StandardButton.Yes:
             if self._datastore.delete_course(str(course_id)):
+                self._course_loader.forget(str(course_id))
                 self._refresh_history_list()
                 self._clear_results()
                 self._toggle_tabs(False)
@@ -552,6 +839,14 @@ class MainWindow(QMainWindow):
         quiz_layout.addWidget(self.quiz_questions_spin)
         layout.addLayout(quiz_layout)
 
+        batch_layout = QHBoxLayout()
+        batch_layout.addWidget(QLabel("Traitements simultanés (lot) :"))
+        self.batch_concurrency_spin = QSpinBox()
+        self.batch_concurrency_spin.setRange(1, 8)
+        self.batch_concurrency_spin.setValue(self._queue.concurrency)
+        batch_layout.addWidget(self.batch_concurrency_spin)
+        layout.addLayout(batch_layout)
+
         # Boutons
         button_layout = QHBoxLayout()
         button_layout.addStretch()
@@ -561,7 +856,14 @@ class MainWindow(QMainWindow):
         button_layout.addWidget(cancel_btn)
 
         save_btn = QPushButton("Enregistrer")
-        save_btn.clicked.connect(lambda: self._save_settings_from_dialog(api_key_input.text(), self.quiz_questions_spin.value(), dialog))
+        save_btn.clicked.connect(
+            lambda: self._save_settings_from_dialog(
+                api_key_input.text(),
+                self.quiz_questions_spin.value(),
+                dialog,
+                self.batch_concurrency_spin.value(),
+            )
+        )
         button_layout.addWidget(save_btn)
 
         layout.addLayout(button_layout)
@@ -591,7 +893,13 @@ class MainWindow(QMainWindow):
         else:
             QMessageBox.warning(self, "Champ vide", "Veuillez entrer une clé API valide.")
 
-    def _save_settings_from_dialog(self, api_key: str, quiz_questions: int, dialog: QDialog):
+    def _save_settings_from_dialog(
+        self,
+        api_key: str,
+        quiz_questions: int,
+        dialog: QDialog,
+        batch_concurrency: Optional[int] = None,
+    ):
         """Enregistre la clé API et le paramètre du quiz depuis la fenêtre de dialogue.
 
         Note: si l'utilisateur est en mode gratuit, la valeur du nombre de questions
@@ -604,7 +912,8 @@ class MainWindow(QMainWindow):
         if env_path.exists():
             lines = env_path.read_text(encoding="utf-8").splitlines()
             # Supprime les anciennes lignes gérées
-            lines = [l for l in lines if not l.startswith("GOOGLE_API_KEY=") and not l.startswith("DEFAULT_QUIZ_QUESTIONS=")]
+            managed = ("GOOGLE_API_KEY=", "DEFAULT_QUIZ_QUESTIONS=", "NEUROLEARN_BATCH_CONCURRENCY=")
+            lines = [l for l in lines if not l.startswith(managed)]
 
         if api_key:
             lines.append(f"GOOGLE_API_KEY={api_key}")
@@ -613,6 +922,11 @@ class MainWindow(QMainWindow):
         lines.append(f"DEFAULT_QUIZ_QUESTIONS={quiz_questions}")
         os.environ["DEFAULT_QUIZ_QUESTIONS"] = str(quiz_questions)
 
+        if batch_concurrency is not None:
+            lines.append(f"NEUROLEARN_BATCH_CONCURRENCY={batch_concurrency}")
+            os.environ["NEUROLEARN_BATCH_CONCURRENCY"] = str(batch_concurrency)
+            self._queue.set_concurrency(batch_concurrency)
+
         try:
             env_path.write_text("\n".join(lines), encoding="utf-8")
         except OSError:
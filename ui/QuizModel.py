@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.quiz_rendering import has_render
+
+
+@dataclass
+class RenderedQuestion:
+    """Textes prêts à afficher pour une question, calculés une seule fois."""
+
+    question_display: str
+    option_displays: List[str]
+    option_plain: List[str]
+    answer_display: str
+    correct_indices: List[int]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RenderedQuestion":
+        """Construit le rendu à partir du dictionnaire de ``utils.quiz_rendering``."""
+
+        return cls(
+            question_display=str(data.get("question") or "Question"),
+            option_displays=[str(value) for value in data.get("options") or []],
+            option_plain=[str(value) for value in data.get("options_plain") or []],
+            answer_display=str(data.get("answer") or ""),
+            correct_indices=[int(index) for index in data.get("correct_indices") or []],
+        )
+
+
+@dataclass
+class QuizQuestion:
+    """Une question de quiz et l'état de la réponse de l'utilisateur."""
+
+    question: str
+    options: List[str]
+    answer: str
+    selected: int = -1
+    checked: bool = False
+    rendered: Optional[RenderedQuestion] = field(default=None, repr=False)
+
+
+class QuizModel:
+    """Liste légère des questions d'un quiz, indépendante des widgets qui l'affichent."""
+
+    def __init__(self, questions: Optional[List[QuizQuestion]] = None) -> None:
+        self._questions: List[QuizQuestion] = questions or []
+
+    @classmethod
+    def from_items(cls, items: Iterable[Any]) -> "QuizModel":
+        questions: List[QuizQuestion] = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            question = QuizQuestion(
+                question=str(item.get("question") or item.get("prompt") or "Question"),
+                options=[str(option) for option in (item.get("options") or item.get("choices") or [])],
+                answer=str(item.get("answer") or item.get("correct_answer") or ""),
+            )
+            # Rendu précalculé à la génération : aucun QTextDocument à l'affichage
+            if has_render(item) and len(item["render"].get("options") or []) == len(question.options):
+                question.rendered = RenderedQuestion.from_dict(item["render"])
+            questions.append(question)
+        return cls(questions)
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def __getitem__(self, index: int) -> QuizQuestion:
+        return self._questions[index]
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QScrollArea,
+    QVBoxLayout,
+    QWidget,
+)
+
+from ui.QuizModel import QuizModel
+from ui.QuizWidget import QuizWidget
+
+
+class QuizPanel(QWidget):
+    """Affiche un QuizModel page par page avec un nombre fixe de cartes réutilisées.
+
+    Seules les ``page_size`` questions de la page courante ont un widget ; changer
+    de page ou de cours réaffecte ces mêmes cartes via ``QuizWidget.bind``. Le
+    coût d'affichage ne dépend donc pas du nombre de questions du quiz.
+    """
+
+    DEFAULT_PAGE_SIZE = 5
+
+    def __init__(self, page_size: int = DEFAULT_PAGE_SIZE, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        self._model = QuizModel()
+        self._page = 0
+        self._page_size = max(1, page_size)
+        self._cards: list[QuizWidget] = []
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(8)
+
+        self._cards_layout = QVBoxLayout()
+        self._cards_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+        self._cards_layout.setContentsMargins(12, 12, 12, 12)
+        self._cards_layout.setSpacing(16)
+
+        self.empty_label = QLabel("Aucune question disponible.")
+        self.empty_label.setObjectName("quizPlaceholder")
+        self.empty_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self._cards_layout.addWidget(self.empty_label)
+
+        cards_container = QWidget()
+        cards_container.setLayout(self._cards_layout)
+        self.scroll = QScrollArea()
+        self.scroll.setWidgetResizable(True)
+        self.scroll.setWidget(cards_container)
+        layout.addWidget(self.scroll, stretch=1)
+
+        nav_layout = QHBoxLayout()
+        nav_layout.setContentsMargins(12, 0, 12, 12)
+        nav_layout.setSpacing(12)
+
+        self.prev_button = QPushButton("◀ Précédent")
+        self.prev_button.setProperty("variant", "ghost")
+        self.prev_button.clicked.connect(self._go_prev)
+
+        self.next_button = QPushButton("Suivant ▶")
+        self.next_button.setProperty("variant", "ghost")
+        self.next_button.clicked.connect(self._go_next)
+
+        self.counter_label = QLabel("")
+        self.counter_label.setObjectName("flashcardCounter")
+        self.counter_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        nav_layout.addStretch(1)
+        nav_layout.addWidget(self.prev_button)
+        nav_layout.addWidget(self.counter_label)
+        nav_layout.addWidget(self.next_button)
+        nav_layout.addStretch(1)
+        layout.addLayout(nav_layout)
+
+        self._update_page()
+
+    def set_model(self, model: QuizModel) -> None:
+        self._model = model
+        self._page = 0
+        self._update_page()
+
+    def clear(self) -> None:
+        self.set_model(QuizModel())
+
+    def _page_count(self) -> int:
+        return max(1, -(-len(self._model) // self._page_size))
+
+    def _go_prev(self) -> None:
+        if self._page > 0:
+            self._page -= 1
+            self._update_page()
+
+    def _go_next(self) -> None:
+        if self._page < self._page_count() - 1:
+            self._page += 1
+            self._update_page()
+
+    def _update_page(self) -> None:
+        start = self._page * self._page_size
+        stop = min(start + self._page_size, len(self._model))
+
+        for offset, index in enumerate(range(start, stop)):
+            if offset == len(self._cards):
+                card = QuizWidget()
+                self._cards.append(card)
+                self._cards_layout.addWidget(card)
+            card = self._cards[offset]
+            card.bind(self._model[index])
+            card.setVisible(True)
+        for card in self._cards[stop - start:]:
+            card.setVisible(False)
+
+        has_questions = len(self._model) > 0
+        self.empty_label.setVisible(not has_questions)
+        self.prev_button.setEnabled(self._page > 0)
+        self.next_button.setEnabled(self._page < self._page_count() - 1)
+        if has_questions:
+            self.counter_label.setText(f"Questions {start + 1}–{stop} / {len(self._model)}")
+        else:
+            self.counter_label.setText("")
+        self.scroll.verticalScrollBar().setValue(0)
@@ -3,7 +3,6 @@ from __future__ import annotations
 from typing import Iterable
 
 from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QTextDocument
 from PyQt6.QtWidgets import (
     QButtonGroup,
     QFrame,
@@ -15,25 +14,29 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from ui.QuizModel import QuizQuestion, RenderedQuestion
+from utils.quiz_rendering import render_quiz_item
+
 
 class QuizWidget(QWidget):
-    """Carte interactive pour une question de quiz multi-choix."""
+    """Carte interactive pour une question de quiz multi-choix.
+
+    La carte peut être réaffectée à une autre question avec ``bind`` : les
+    lignes d'options sont réutilisées et l'état de la réponse est lu et écrit
+    dans le QuizQuestion lié, ce qui permet au QuizPanel de n'instancier que
+    les cartes visibles.
+    """
 
     def __init__(
         self,
-        question: str,
-        options: Iterable[str],
-        answer: str,
+        question: str = "",
+        options: Iterable[str] = (),
+        answer: str = "",
         parent: QWidget | None = None,
     ) -> None:
         super().__init__(parent)
         self.setObjectName("quizCard")
-
-        self._option_displays = [self._sanitize_content(str(opt)) or "*Option vide*" for opt in options]
-        self._option_plain = [self._to_plain_text(value) for value in self._option_displays]
-        self._answer_display = self._sanitize_content(answer or "")
-        self._answer_plain = self._to_plain_text(self._answer_display)
-        self._checked = False
+        self._state: QuizQuestion | None = None
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 16)
@@ -44,64 +47,34 @@ class QuizWidget(QWidget):
         self.card_frame.setAttribute(Qt.WidgetAttribute.WA_StyledBackground, True)
         self.card_frame.setProperty("status", "")
 
-        card_layout = QVBoxLayout(self.card_frame)
-        card_layout.setContentsMargins(20, 20, 20, 20)
-        card_layout.setSpacing(12)
+        self._card_layout = QVBoxLayout(self.card_frame)
+        self._card_layout.setContentsMargins(20, 20, 20, 20)
+        self._card_layout.setSpacing(12)
 
-        self.question_label = QLabel(self._sanitize_content(question) or "Question")
+        self.question_label = QLabel("Question")
         self.question_label.setTextFormat(Qt.TextFormat.MarkdownText)
         self.question_label.setObjectName("quizQuestion")
         self.question_label.setWordWrap(True)
-        card_layout.addWidget(self.question_label)
+        self._card_layout.addWidget(self.question_label)
 
         self.button_group = QButtonGroup(self)
         self.button_group.setExclusive(True)
-        self.option_buttons = []
-        self.option_rows = []
-        self.option_labels = []
-
-        if self._option_displays:
-            for idx, option_text in enumerate(self._option_displays):
-                option_row = QFrame()
-                option_row.setObjectName("quizOptionRow")
-                option_row.setProperty("result", "")
-
-                row_layout = QHBoxLayout(option_row)
-                row_layout.setContentsMargins(14, 10, 14, 10)
-                row_layout.setSpacing(12)
-
-                radio = QRadioButton()
-                radio.setProperty("role", "option")
-                radio.setProperty("result", "")
-                radio.setAutoExclusive(True)
-                radio.setCursor(Qt.CursorShape.PointingHandCursor)
-                self.button_group.addButton(radio, idx)
-
-                option_label = QLabel(option_text)
-                option_label.setObjectName("quizOptionLabel")
-                option_label.setTextFormat(Qt.TextFormat.MarkdownText)
-                option_label.setWordWrap(True)
-                option_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
-                option_label.setProperty("result", "")
-
-                row_layout.addWidget(radio)
-                row_layout.addWidget(option_label, 1)
-
-                self.option_buttons.append(radio)
-                self.option_rows.append(option_row)
-                self.option_labels.append(option_label)
-                card_layout.addWidget(option_row)
-        else:
-            placeholder = QLabel("Aucune option fournie.")
-            placeholder.setObjectName("quizPlaceholder")
-            placeholder.setAlignment(Qt.AlignmentFlag.AlignLeft)
-            card_layout.addWidget(placeholder)
+        self.button_group.idToggled.connect(self._on_option_toggled)
+        self.option_buttons: list[QRadioButton] = []
+        self.option_rows: list[QFrame] = []
+        self.option_labels: list[QLabel] = []
+
+        # Les lignes d'options sont insérées avant ce placeholder, puis réutilisées
+        self.placeholder = QLabel("Aucune option fournie.")
+        self.placeholder.setObjectName("quizPlaceholder")
+        self.placeholder.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        self._card_layout.addWidget(self.placeholder)
 
         self.feedback_label = QLabel("")
         self.feedback_label.setObjectName("quizFeedback")
         self.feedback_label.setWordWrap(True)
         self.feedback_label.hide()
-        card_layout.addWidget(self.feedback_label)
+        self._card_layout.addWidget(self.feedback_label)
 
         layout.addWidget(self.card_frame)
 
@@ -110,94 +83,140 @@ class QuizWidget(QWidget):
         self.validate_button.clicked.connect(self._validate)
         layout.addWidget(self.validate_button, alignment=Qt.AlignmentFlag.AlignRight)
 
-        self._refresh(self.card_frame)
+        self.bind(QuizQuestion(question=question, options=[str(opt) for opt in options], answer=answer or ""))
+
+    def bind(self, state: QuizQuestion) -> None:
+        """Affiche ``state`` dans cette carte en réutilisant les widgets existants."""
+
+        self._state = None
+        if state.rendered is None:
+            state.rendered = self.render_question(state)
+        rendered = state.rendered
+
+        self.question_label.setText(rendered.question_display)
+        self._ensure_option_rows(len(rendered.option_displays))
+
+        self.button_group.setExclusive(False)
+        for idx, (row, radio, label) in enumerate(zip(self.option_rows, self.option_buttons, self.option_labels)):
+            visible = idx < len(rendered.option_displays)
+            row.setVisible(visible)
+            radio.setChecked(False)
+            if visible:
+                label.setText(rendered.option_displays[idx])
+        self.button_group.setExclusive(True)
+        self.placeholder.setVisible(not rendered.option_displays)
+
+        self._state = state
+        if 0 <= state.selected < len(rendered.option_displays):
+            self.option_buttons[state.selected].setChecked(True)
+        self._apply_result(state)
+
+    def _ensure_option_rows(self, count: int) -> None:
+        while len(self.option_rows) < count:
+            idx = len(self.option_rows)
+            option_row = QFrame()
+            option_row.setObjectName("quizOptionRow")
+            option_row.setProperty("result", "")
+
+            row_layout = QHBoxLayout(option_row)
+            row_layout.setContentsMargins(14, 10, 14, 10)
+            row_layout.setSpacing(12)
+
+            radio = QRadioButton()
+            radio.setProperty("role", "option")
+            radio.setProperty("result", "")
+            radio.setAutoExclusive(True)
+            radio.setCursor(Qt.CursorShape.PointingHandCursor)
+            self.button_group.addButton(radio, idx)
+
+            option_label = QLabel("")
+            option_label.setObjectName("quizOptionLabel")
+            option_label.setTextFormat(Qt.TextFormat.MarkdownText)
+            option_label.setWordWrap(True)
+            option_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+            option_label.setProperty("result", "")
+
+            row_layout.addWidget(radio)
+            row_layout.addWidget(option_label, 1)
+
+            self.option_buttons.append(radio)
+            self.option_rows.append(option_row)
+            self.option_labels.append(option_label)
+            self._card_layout.insertWidget(self._card_layout.indexOf(self.placeholder), option_row)
+
+    def _on_option_toggled(self, option_id: int, checked: bool) -> None:
+        if checked and self._state is not None and not self._state.checked:
+            self._state.selected = option_id
 
     def _validate(self) -> None:
-        if self._checked:
+        state = self._state
+        if state is None or state.checked:
             return
 
-        selected_id = self.button_group.checkedId()
-        if selected_id == -1:
+        if self.button_group.checkedId() == -1:
             self.feedback_label.setText("Sélectionnez une option pour valider.")
             self.feedback_label.setProperty("state", "warning")
             self.feedback_label.show()
             self._refresh(self.feedback_label)
             return
 
-        correct_indices = self._find_correct_indices()
-        selected_index = selected_id
-        is_correct = selected_index in correct_indices
+        state.selected = self.button_group.checkedId()
+        state.checked = True
+        self._apply_result(state)
+
+    def _apply_result(self, state: QuizQuestion) -> None:
+        """Synchronise l'apparence de la carte avec l'état (validé ou non) de la question."""
 
-        self._checked = True
-        self.validate_button.setEnabled(False)
+        rendered = state.rendered
+        if rendered is None:
+            return
+        correct_indices = rendered.correct_indices
+        self.validate_button.setEnabled(not state.checked)
 
-        for idx, button in enumerate(self.option_buttons):
-            button.setEnabled(False)
+        for idx in range(len(rendered.option_displays)):
             result = ""
-            if idx in correct_indices:
-                result = "correct"
-            elif idx == selected_index:
-                result = "incorrect"
-            button.setProperty("result", result)
-            row = self.option_rows[idx]
-            label = self.option_labels[idx]
-            row.setProperty("result", result)
-            label.setProperty("result", result)
-            self._refresh(button)
-            self._refresh(row)
-            self._refresh(label)
-
-        status = "correct" if is_correct else "incorrect"
-        self.card_frame.setProperty("status", status)
-        self._refresh(self.card_frame)
-
-        if is_correct:
+            if state.checked:
+                if idx in correct_indices:
+                    result = "correct"
+                elif idx == state.selected:
+                    result = "incorrect"
+            button = self.option_buttons[idx]
+            button.setEnabled(not state.checked)
+            for widget in (button, self.option_rows[idx], self.option_labels[idx]):
+                if widget.property("result") != result:
+                    widget.setProperty("result", result)
+                    self._refresh(widget)
+
+        status = ""
+        if state.checked:
+            status = "correct" if state.selected in correct_indices else "incorrect"
+        if self.card_frame.property("status") != status:
+            self.card_frame.setProperty("status", status)
+            self._refresh(self.card_frame)
+
+        if not state.checked:
+            self.feedback_label.setText("")
+            self.feedback_label.hide()
+            return
+        if status == "correct":
             self.feedback_label.setText("✔️ Bonne réponse !")
             self.feedback_label.setProperty("state", "success")
         else:
-            answer_text = ", ".join(self._option_displays[i] for i in correct_indices) if correct_indices else self._answer_display
+            answer_text = (
+                ", ".join(rendered.option_displays[i] for i in correct_indices)
+                if correct_indices
+                else rendered.answer_display
+            )
             self.feedback_label.setText(f"❌ Mauvaise réponse. Solution : {answer_text}")
             self.feedback_label.setProperty("state", "error")
         self.feedback_label.show()
         self._refresh(self.feedback_label)
 
-    def _find_correct_indices(self) -> list[int]:
-        if not self._option_plain:
-            return []
-        normalized_answer = self._normalize(self._answer_plain)
-        return [i for i, option in enumerate(self._option_plain) if self._normalize(option) == normalized_answer]
-
-    @staticmethod
-    def _normalize(value: str) -> str:
-        return " ".join(value.strip().lower().split())
-
     @staticmethod
-    def _sanitize_content(value: str) -> str:
-        text = (value or "").strip()
-        if not text:
-            return ""
-
-        lowered = text.lower()
-        if "<html" in lowered or "<body" in lowered or "<!doctype" in lowered:
-            doc = QTextDocument()
-            try:
-                doc.setHtml(text)
-                markdown = doc.toMarkdown().strip()
-                if markdown:
-                    return markdown
-                return doc.toPlainText().strip()
-            except Exception:
-                fallback = QTextDocument()
-                fallback.setPlainText(text)
-                return fallback.toPlainText().strip()
-        return text
+    def render_question(state: QuizQuestion) -> RenderedQuestion:
+        """Prépare les textes affichés et les indices des bonnes réponses."""
 
-    @staticmethod
-    def _to_plain_text(value: str) -> str:
-        doc = QTextDocument()
-        doc.setMarkdown(value)
-        plain = doc.toPlainText().strip()
-        return plain or value.strip()
+        return RenderedQuestion.from_dict(render_quiz_item(state.question, state.options, state.answer))
 
     @staticmethod
     def _refresh(widget: QWidget) -> None:
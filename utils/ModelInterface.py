@@ -1,58 +1,123 @@
+import json
+import logging
+import os
+import threading
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from utils.conversation_history import ConversationHistory
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeouts in seconds; the read timeout applies between two streamed chunks
+DEFAULT_TIMEOUT = (5, 120)
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
 
 
+def get_shared_session():
+    # One keep-alive connection pool for every ModelInterface of the process
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            pool_size = int(os.environ.get("NEUROLEARN_HTTP_POOL_SIZE", "16"))
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _shared_session = session
+        return _shared_session
+
 
 class ModelInterface:
-    def __init__(self, model_config, api_url="http://localhost:80"):
+    def __init__(self, model_config, api_url="http://localhost:80", session=None, timeout=DEFAULT_TIMEOUT,
+                 max_history_tokens=None):
         self.model_config = model_config  # dict with role, system_prompt, model, rag_file, etc.
         self.api_url = api_url           # Ollama API endpoint
-        self.history = []                # To store conversation history for chat
-        # Optionally, you could add:
-        # import requests
-        # self.session = requests.Session()  # For efficient HTTP requests
-        
+        # Token-budgeted chat turns plus a rolling summary of older ones
+        self.conversation = ConversationHistory(
+            system_prompt=model_config.get("system_prompt"),
+            max_tokens=max_history_tokens,
+        )
+        self.session = session or get_shared_session()
+        self.timeout = timeout
+
+    @property
+    def history(self):
+        # Turns kept verbatim (without system prompt or RAG context)
+        return self.conversation.messages
+
     def prepare_message(self, user_message, rag_content=None):
-        message = []
-        # Start with system prompt
-        if self.model_config.get("system_prompt"):
-            message.append({"role": "system", "content": self.model_config["system_prompt"]})
-        # Always add user message, optionally prepending RAG content
-        if rag_content:
-            content = f"{rag_content}\n\n{user_message}"
-        else:
-            content = user_message
-        message.append({"role": "user", "content": content})
-        return message
+        # Full message list for this turn: system prompt once, summary, RAG context, recent turns, user message
+        return self.conversation.build_messages(user_message, rag_content)
     
     
     def send_message(self, user_message, rag_content=None):
-        # Prepare the message list (system, user, RAG)
+        # Prepare the message list (system, summary, RAG, recent turns, user), bounded in size
         messages = self.prepare_message(user_message, rag_content)
-        
-        # Optionally include conversation history for multi-turn chat
-        full_history = self.history + messages
 
         # Build the payload for Ollama API
         payload = {
             "model": self.model_config["model"],
-            "messages": full_history,
+            "messages": messages,
             "stream": False
         }
 
         # Send the POST request to Ollama's /api/chat endpoint
         try:
-            response = requests.post(f"{self.api_url}/api/chat", json=payload)
+            response = self.session.post(f"{self.api_url}/api/chat", json=payload, timeout=self.timeout)
             response.raise_for_status()
             data = response.json()
             # Extract the assistant's reply (adjust key as needed for Ollama's response format)
             assistant_reply = data.get("message", {}).get("content", "")
             # Update history
-            self.history.extend(messages)
-            self.history.append({"role": "assistant", "content": assistant_reply})
+            self.conversation.add_turn(user_message, assistant_reply)
             return assistant_reply
         except requests.RequestException as e:
-            print(f"API request failed: {e}")
+            logger.warning("Ollama chat request failed: %s", e)
             return None
+
+    def send_message_stream(self, user_message, rag_content=None):
+        # Same as send_message, but yields reply fragments as Ollama produces them.
+        # A failed or cut-off stream raises requests.RequestException after the fragments
+        # already yielded; only a complete reply is added to the history.
+        messages = self.prepare_message(user_message, rag_content)
+        payload = {
+            "model": self.model_config["model"],
+            "messages": messages,
+            "stream": True
+        }
+
+        parts = []
+        try:
+            with self.session.post(
+                f"{self.api_url}/api/chat", json=payload, stream=True, timeout=self.timeout
+            ) as response:
+                response.raise_for_status()
+                # Ollama streams one JSON object per line
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except ValueError:
+                        continue
+                    if data.get("error"):
+                        raise requests.RequestException(data["error"])
+                    piece = data.get("message", {}).get("content", "")
+                    if piece:
+                        parts.append(piece)
+                        yield piece
+                    if data.get("done"):
+                        break
+                else:
+                    raise requests.RequestException("Ollama stream ended before the reply was done")
+        except requests.RequestException as e:
+            logger.warning("Ollama chat stream failed after %d fragment(s): %s", len(parts), e)
+            raise
+        self.conversation.add_turn(user_message, "".join(parts))
         
         
         
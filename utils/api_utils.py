@@ -1,5 +1,3 @@
-import http.server 
-
 """
 APIUtils - Module pour la gestion des endpoints API du ChatbotFactory.
 
@@ -8,48 +6,229 @@ Ce module expose des endpoints pour :
 - Chatter avec un modèle via l'API
 
 Utilise ModelManager et ModelInterface pour orchestrer la logique métier.
+
+Le serveur HTTP repose uniquement sur la bibliothèque standard
+(``ThreadingHTTPServer``) : chaque requête est traitée dans son propre thread.
+
+    GET    /health               état du serveur
+    GET    /models               liste des modèles
+    GET    /models/<nom>         configuration d'un modèle
+    POST   /models               création  {name, role, model_name, system_prompt, rag_file?}
+    PATCH  /models/<nom>         modification  {role?, model_name?, system_prompt?, rag_file?}
+    DELETE /models/<nom>         suppression
+    POST   /chat                 {model, message, rag_content?, session_id?, stream?}
+    GET    /metrics              compteurs par route : requêtes, erreurs, débit sur 60 s, latences p50/p95/p99
+
+Avec ``"stream": true``, la réponse de /chat est du NDJSON envoyé au fil de
+l'eau : une ligne ``{"delta": "..."}`` par fragment puis
+``{"done": true, "response": "..."}``.
+
+Chaque ``session_id`` a son propre historique. Les sessions inactives
+expirent (``NEUROLEARN_SESSION_TTL``), leur nombre en mémoire est plafonné
+(``NEUROLEARN_MAX_SESSIONS``) et, si ``NEUROLEARN_SESSION_DIR`` est défini,
+l'historique d'une session évincée y est sauvegardé pour qu'elle reprenne.
 """
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
 import requests
+
 from utils.model_manager import ModelManager
 from utils.ModelInterface import ModelInterface
+from utils.session_store import SessionStore
+
+DEFAULT_SESSION_ID = "default"
+# Champs qu'un PATCH /models/<nom> peut remplacer
+EDITABLE_MODEL_FIELDS = frozenset({"role", "model", "system_prompt", "rag_file"})
+# Corps de requête maximal accepté (1 Mo)
+MAX_BODY_BYTES = 1 << 20
+# Latences conservées par route pour le calcul des percentiles
+METRICS_WINDOW = 4096
+# Fenêtre glissante (secondes) du débit « rps » de /metrics
+RATE_WINDOW_S = 60
+
+
+class APIError(Exception):
+    """Erreur renvoyée au client avec le code HTTP ``status``."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class APIMetrics:
+    """
+    Compteurs du serveur, par route : requêtes, erreurs (statut >= 400) et latences.
+    Les percentiles portent sur les METRICS_WINDOW dernières requêtes de chaque route.
+    ``rps`` est le débit des RATE_WINDOW_S dernières secondes (compté par seconde),
+    ``avg_rps_since_start`` la moyenne depuis le démarrage.
+    ``in_flight`` compte les requêtes en cours, y compris celle qui lit /metrics.
+    """
+    def __init__(self, window=METRICS_WINDOW, rate_window=RATE_WINDOW_S, clock=time.monotonic):
+        self._lock = threading.Lock()
+        self._window = window
+        self._rate_window = rate_window
+        self._clock = clock
+        self._started = clock()
+        self._routes = {}
+        self.in_flight = 0
+
+    def begin(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def record(self, route, status, seconds):
+        now = self._clock()
+        with self._lock:
+            self.in_flight -= 1
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = {
+                    "count": 0,
+                    "errors": 0,
+                    "latencies": deque(maxlen=self._window),
+                    "per_second": deque(),  # [seconde, requêtes], au plus RATE_WINDOW_S entrées
+                }
+            stats["count"] += 1
+            if status >= 400:
+                stats["errors"] += 1
+            stats["latencies"].append(seconds)
+            second = int(now)
+            per_second = stats["per_second"]
+            if per_second and per_second[-1][0] == second:
+                per_second[-1][1] += 1
+            else:
+                per_second.append([second, 1])
+            self._expire(per_second, now)
+
+    def _expire(self, per_second, now):
+        while per_second and per_second[0][0] <= now - self._rate_window:
+            per_second.popleft()
+
+    def snapshot(self):
+        with self._lock:
+            now = self._clock()
+            uptime = now - self._started
+            # Tant que le serveur tourne depuis moins d'une fenêtre, le débit porte sur sa durée de vie
+            span = min(self._rate_window, uptime)
+            routes = {}
+            for route, stats in self._routes.items():
+                latencies = sorted(stats["latencies"])
+                self._expire(stats["per_second"], now)
+                recent = sum(count for _, count in stats["per_second"])
+                routes[route] = {
+                    "requests": stats["count"],
+                    "errors": stats["errors"],
+                    "error_rate": stats["errors"] / stats["count"],
+                    "rps": recent / span if span else 0.0,
+                    "avg_rps_since_start": stats["count"] / uptime if uptime else 0.0,
+                    "p50_ms": _percentile(latencies, 0.50) * 1000,
+                    "p95_ms": _percentile(latencies, 0.95) * 1000,
+                    "p99_ms": _percentile(latencies, 0.99) * 1000,
+                }
+            return {"uptime_s": uptime, "in_flight": self.in_flight, "routes": routes}
+
 
 class APIUtils:
     """
     Classe utilitaire pour exposer les endpoints API du ChatbotFactory.
     Utilise ModelManager pour la gestion des modèles et ModelInterface pour l'interaction LLM.
     """
-    def __init__(self, model_file="models.json"):
+    def __init__(self, model_file="models.json", ollama_url=None, sessions=None):
         """
         Initialise le serveur API et connecte les gestionnaires de modèles.
         Args:
             model_file (str): Chemin du fichier JSON des modèles.
+            ollama_url (str, optional): URL du serveur Ollama (``OLLAMA_URL`` ou http://localhost:80 par défaut).
+            sessions (SessionStore, optional): Sessions de chat (TTL, plafond LRU, persistance) ;
+                réglées par les variables d'environnement par défaut.
         """
         self.model_manager = ModelManager(model_file)
-        self.model_interfaces = {}  # Cache des interfaces par modèle
+        self.ollama_url = (ollama_url or os.environ.get("OLLAMA_URL") or "http://localhost:80").rstrip("/")
+        self.sessions = sessions if sessions is not None else SessionStore()  # Une ModelInterface par (modèle, session)
+        self._manager_lock = threading.Lock()
+        self.metrics = APIMetrics()
 
     def setup_routes(self, app):
         """
-        Définit tous les endpoints API sur l'objet serveur (ex: FastAPI).
+        Définit tous les endpoints API sur l'objet serveur.
         Args:
-            app: Instance du serveur web (FastAPI, Flask, etc.)
-        """
-        # Exemple FastAPI:
-        # @app.post("/create_model")
-        # def create_model(...):
-        #     return self.create_model_endpoint(...)
-        # @app.post("/chat")
-        # def chat(...):
-        #     return self.chat_endpoint(...)
-        pass
+            app: Instance du serveur web (ThreadingHTTPServer créé par start_server).
+        """
+        app.api = self
+        app.routes = [
+            ("GET", re.compile(r"^/health$"), lambda body: {"status": "ok"}),
+            ("GET", re.compile(r"^/metrics$"), lambda body: {**self.metrics.snapshot(), "sessions": self.sessions.stats()}),
+            ("GET", re.compile(r"^/models$"), lambda body: self.list_models_endpoint()),
+            ("GET", re.compile(r"^/models/(?P<name>[^/]+)$"),
+             lambda body, name: self.get_model_endpoint(name)),
+            ("POST", re.compile(r"^/models$"), self._create_model_route),
+            ("PATCH", re.compile(r"^/models/(?P<name>[^/]+)$"), self._edit_model_route),
+            ("DELETE", re.compile(r"^/models/(?P<name>[^/]+)$"),
+             lambda body, name: self.delete_model_endpoint(name)),
+            ("POST", re.compile(r"^/chat$"), self._chat_route),
+        ]
 
-    def start_server(self, port=99):
+    def start_server(self, port=99, host="127.0.0.1", block=True):
         """
         Démarre le serveur web sur le port spécifié.
         Args:
-            port (int): Port d'écoute du serveur.
+            port (int): Port d'écoute du serveur (0 pour un port libre).
+            host (str): Adresse d'écoute.
+            block (bool): Si False, le serveur tourne dans un thread et est renvoyé.
+        Returns:
+            ThreadingHTTPServer: Le serveur, quand ``block`` vaut False.
         """
-        # Exemple: uvicorn.run(app, host="0.0.0.0", port=port)
-        pass
+        server = ThreadingHTTPServer((host, port), _APIRequestHandler)
+        server.daemon_threads = True
+        self.setup_routes(server)
+        if not block:
+            threading.Thread(target=server.serve_forever, name="api-server", daemon=True).start()
+            return server
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            # Les sessions encore en mémoire pourront reprendre au prochain démarrage
+            self.sessions.flush()
+        return server
+
+    def list_models_endpoint(self):
+        """
+        Endpoint pour lister les modèles.
+        Returns:
+            dict: Noms des modèles configurés.
+        """
+        with self._manager_lock:
+            return {"models": self.model_manager.list_models()}
+
+    def get_model_endpoint(self, name):
+        """
+        Endpoint pour lire la configuration d'un modèle.
+        Args:
+            name (str): Nom du modèle.
+        Returns:
+            dict: Configuration du modèle.
+        """
+        with self._manager_lock:
+            try:
+                return {"name": name, "config": self.model_manager.get_model(name)}
+            except ValueError as exc:
+                raise APIError(404, str(exc)) from exc
 
     def create_model_endpoint(self, name, role, model_name, system_prompt, rag_file=None):
         """
@@ -63,22 +242,252 @@ class APIUtils:
         Returns:
             dict: Résultat de la création.
         """
-        self.model_manager.create_model(name, role, model_name, system_prompt, rag_file)
+        with self._manager_lock:
+            try:
+                self.model_manager.create_model(name, role, model_name, system_prompt, rag_file)
+            except ValueError as exc:
+                raise APIError(409, str(exc)) from exc
         return {"status": "success", "message": f"Model '{name}' created."}
 
-    def chat_endpoint(self, model_name, user_message, rag_content=None):
+    def edit_model_endpoint(self, name, **updates):
+        """
+        Endpoint pour modifier un modèle.
+        Args:
+            name (str): Nom du modèle.
+            **updates: Champs de configuration à remplacer.
+        Returns:
+            dict: Résultat de la modification.
+        """
+        with self._manager_lock:
+            try:
+                self.model_manager.edit_model(name, **updates)
+            except ValueError as exc:
+                raise APIError(404, str(exc)) from exc
+        # Les sessions ouvertes gardaient l'ancienne configuration ; leur historique est conservé
+        self.sessions.discard(name)
+        return {"status": "success", "message": f"Model '{name}' updated."}
+
+    def delete_model_endpoint(self, name):
+        """
+        Endpoint pour supprimer un modèle.
+        Args:
+            name (str): Nom du modèle.
+        Returns:
+            dict: Résultat de la suppression.
+        """
+        with self._manager_lock:
+            try:
+                self.model_manager.delete_model(name)
+            except ValueError as exc:
+                raise APIError(404, str(exc)) from exc
+        self.sessions.discard(name, forget=True)
+        return {"status": "success", "message": f"Model '{name}' deleted."}
+
+    def chat_endpoint(self, model_name, user_message, rag_content=None, session_id=DEFAULT_SESSION_ID):
         """
         Endpoint pour chatter avec un modèle.
         Args:
             model_name (str): Nom du modèle à utiliser.
             user_message (str): Message utilisateur.
             rag_content (str, optional): Contexte RAG additionnel.
+            session_id (str, optional): Conversation à poursuivre ; chaque session a son historique.
         Returns:
             dict: Réponse du modèle.
         """
-        if model_name not in self.model_interfaces:
-            config = self.model_manager.get_model(model_name)
-            self.model_interfaces[model_name] = ModelInterface(config)
-        interface = self.model_interfaces[model_name]
-        response = interface.send_message(user_message, rag_content)
-        return {"response": response}
\ No newline at end of file
+        with self.sessions.use((model_name, session_id), lambda: self._new_interface(model_name)) as interface:
+            response = interface.send_message(user_message, rag_content)
+        if response is None:
+            raise APIError(502, f"Le serveur Ollama ({self.ollama_url}) n'a pas répondu.")
+        return {"response": response, "session_id": session_id}
+
+    def chat_stream_endpoint(self, model_name, user_message, rag_content=None, session_id=DEFAULT_SESSION_ID):
+        """
+        Variante de chat_endpoint qui produit les fragments de réponse au fil de l'eau.
+        Returns:
+            Iterator[str]: Fragments de la réponse du modèle.
+        """
+        # Vérifié avant le premier fragment : un modèle inconnu donne encore une 404
+        config = self._model_config(model_name)
+
+        def fragments():
+            factory = lambda: ModelInterface(config, api_url=self.ollama_url)  # noqa: E731
+            with self.sessions.use((model_name, session_id), factory) as interface:
+                try:
+                    yield from interface.send_message_stream(user_message, rag_content)
+                except requests.RequestException as exc:
+                    # Réponse coupée par Ollama : le flux se termine par un enregistrement d'erreur
+                    raise APIError(502, f"Le serveur Ollama ({self.ollama_url}) a interrompu la réponse : {exc}") from exc
+
+        return fragments()
+
+    def _model_config(self, model_name):
+        with self._manager_lock:
+            try:
+                return self.model_manager.get_model(model_name)
+            except ValueError as exc:
+                raise APIError(404, str(exc)) from exc
+
+    def _new_interface(self, model_name):
+        return ModelInterface(self._model_config(model_name), api_url=self.ollama_url)
+
+    def _create_model_route(self, body):
+        missing = [field for field in ("name", "role", "model_name", "system_prompt") if not body.get(field)]
+        if missing:
+            raise APIError(400, f"Champs manquants : {', '.join(missing)}")
+        result = self.create_model_endpoint(
+            body["name"], body["role"], body["model_name"], body["system_prompt"], body.get("rag_file")
+        )
+        return 201, result
+
+    def _edit_model_route(self, body, name):
+        # Champs de configuration modifiables par l'API ; model_name est accepté comme à la création
+        updates = {("model" if key == "model_name" else key): value for key, value in body.items()}
+        unknown = sorted(set(updates) - EDITABLE_MODEL_FIELDS)
+        if unknown:
+            raise APIError(400, f"Champs non modifiables : {', '.join(unknown)}")
+        if not updates:
+            raise APIError(400, "Aucun champ à modifier.")
+        return self.edit_model_endpoint(name, **updates)
+
+    def _chat_route(self, body):
+        if not body.get("model") or not body.get("message"):
+            raise APIError(400, "Les champs 'model' et 'message' sont requis.")
+        args = (body["model"], body["message"], body.get("rag_content"), str(body.get("session_id") or DEFAULT_SESSION_ID))
+        if body.get("stream"):
+            return self.chat_stream_endpoint(*args)
+        return self.chat_endpoint(*args)
+
+
+class _APIRequestHandler(BaseHTTPRequestHandler):
+    """Traduit les requêtes HTTP en appels aux routes enregistrées par APIUtils.setup_routes."""
+
+    protocol_version = "HTTP/1.1"
+    # En-têtes et corps partent en deux écritures : sans TCP_NODELAY, l'ACK retardé
+    # du client ajoute ~40 ms à chaque réponse sur une connexion keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        # Pas de journal par requête sur stderr : trop bruyant sous charge
+        pass
+
+    def _dispatch(self, method):
+        path = urlsplit(self.path).path
+        metrics = self.server.api.metrics
+        route = f"{method} (autre)"
+        self._status = 500
+        started = time.perf_counter()
+        metrics.begin()
+        try:
+            body = self._read_body()
+            for route_method, pattern, handler in self.server.routes:
+                match = pattern.match(path)
+                if match and route_method == method:
+                    route = f"{method} {self._route_label(pattern)}"
+                    params = {key: unquote(value) for key, value in match.groupdict().items()}
+                    result = handler(body, **params)
+                    break
+            else:
+                raise APIError(404, f"Route inconnue : {method} {path}")
+
+            status = 200
+            if isinstance(result, tuple):
+                status, result = result
+            if isinstance(result, dict):
+                self._send_json(status, result)
+            else:
+                self._send_stream(result)
+        except APIError as exc:
+            self._send_json(exc.status, {"error": exc.message})
+        except Exception as exc:  # noqa: BLE001
+            self._send_json(500, {"error": str(exc)})
+        finally:
+            metrics.record(route, self._status, time.perf_counter() - started)
+
+    @staticmethod
+    def _route_label(pattern):
+        # "^/models/(?P<name>[^/]+)$" -> "/models/<name>" : une entrée par route, pas par URL
+        return re.sub(r"\(\?P<(\w+)>[^)]*\)", r"<\1>", pattern.pattern).strip("^$")
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            # Le corps n'est pas lu : sur une connexion keep-alive, il serait pris pour la requête suivante
+            self.close_connection = True
+            raise APIError(413, "Corps de requête trop volumineux.")
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError as exc:
+            raise APIError(400, f"JSON invalide : {exc}") from exc
+        if not isinstance(body, dict):
+            raise APIError(400, "Le corps de la requête doit être un objet JSON.")
+        return body
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self._status = status
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, fragments):
+        self._status = 200
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        parts = []
+        error = None
+        iterator = iter(fragments)
+        try:
+            while True:
+                try:
+                    fragment = next(iterator)
+                except StopIteration:
+                    break
+                except Exception as exc:  # noqa: BLE001
+                    # En-têtes déjà envoyés : l'erreur termine le flux NDJSON, jamais une réponse 500
+                    error = exc
+                    break
+                parts.append(fragment)
+                self._write_chunk({"delta": fragment})
+            final = {"done": True, "response": "".join(parts)}
+            # Les en-têtes sont partis en 200 ; l'échec compte quand même dans les métriques
+            if error is not None:
+                final["error"] = error.message if isinstance(error, APIError) else str(error)
+                self._status = error.status if isinstance(error, APIError) else 500
+            elif not parts:
+                final["error"] = "Le serveur Ollama n'a renvoyé aucune réponse."
+                self._status = 502
+            self._write_chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client parti : fermer le générateur libère la connexion à Ollama ; la réponse
+            # incomplète n'entre pas dans l'historique
+            fragments.close()
+            self.close_connection = True
+
+    def _write_chunk(self, payload):
+        line = json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+        self.wfile.flush()
+
+
+__all__ = ["APIError", "APIMetrics", "APIUtils"]
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+CACHE_ROOT = Path(__file__).resolve().parents[1] / ".cache"
+
+
+def file_sha256(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    """Calcule l'empreinte SHA-256 du contenu d'un fichier."""
+
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as handle:
+        for block in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _env_flag(name: str, default: bool = True) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off")
+
+
+class GenerationCache:
+    """Cache disque des résultats de génération, adressé par contenu.
+
+    Chaque entrée est un fichier JSON nommé par sa clé. La date de modification
+    sert d'horodatage d'accès : elle est rafraîchie à chaque lecture, et les
+    entrées les plus anciennes sont supprimées quand la taille totale dépasse
+    ``max_bytes`` (éviction LRU).
+    """
+
+    DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+    def __init__(
+        self,
+        cache_dir: str | Path | None = None,
+        max_bytes: Optional[int] = None,
+        enabled: Optional[bool] = None,
+    ) -> None:
+        self._dir = Path(cache_dir) if cache_dir is not None else CACHE_ROOT / "generation"
+        if max_bytes is None:
+            max_mb = os.environ.get("NEUROLEARN_CACHE_MAX_MB")
+            max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else self.DEFAULT_MAX_BYTES
+        self.max_bytes = max_bytes
+        self.enabled = _env_flag("NEUROLEARN_GENERATION_CACHE") if enabled is None else enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        document_hash: str,
+        model_name: str,
+        artifact: str,
+        prompt_version: int,
+        config: Dict[str, Any],
+    ) -> str:
+        """Construit la clé d'une entrée à partir de tout ce qui influence le résultat."""
+
+        payload = json.dumps(
+            {
+                "document": document_hash,
+                "model": model_name,
+                "artifact": artifact,
+                "prompt_version": prompt_version,
+                "config": config,
+            },
+            sort_keys=True,
+            ensure_ascii=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Any:
+        """Renvoie la valeur en cache, ou ``None`` si absente ou illisible."""
+
+        if not self.enabled:
+            return None
+        path = self._entry_path(key)
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                value = json.load(handle)["value"]
+        except (OSError, ValueError, KeyError, TypeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            # Cache en lecture seule par exemple : l'entrée reste valide, seul l'ordre LRU en pâtit
+            pass
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        self._dir.mkdir(parents=True, exist_ok=True)
+        path = self._entry_path(key)
+        fd, tmp_name = tempfile.mkstemp(dir=self._dir, prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump({"value": value}, handle, ensure_ascii=False)
+            os.replace(tmp_name, path)
+        except OSError:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            return
+        self._evict()
+
+    def clear(self) -> None:
+        for entry in self._entries():
+            try:
+                entry.unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        entries = self._entries()
+        size = 0
+        for entry in entries:
+            try:
+                size += entry.stat().st_size
+            except OSError:
+                pass
+        return {"hits": self.hits, "misses": self.misses, "entries": len(entries), "bytes": size}
+
+    def _entry_path(self, key: str) -> Path:
+        return self._dir / f"{key}.json"
+
+    def _entries(self) -> List[Path]:
+        # Les fichiers .tmp-*.json sont des écritures en cours (voir put) : on n'y touche pas
+        if not self._dir.exists():
+            return []
+        return [entry for entry in self._dir.glob("*.json") if not entry.name.startswith(".tmp-")]
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in self._entries():
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry))
+                total += stat.st_size
+            if total <= self.max_bytes:
+                return
+            entries.sort(key=lambda item: item[0])
+            for _, size, entry in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    entry.unlink()
+                except OSError:
+                    continue
+                total -= size
+
+
+class PDFTextCache:
+    """Cache persistant du texte extrait des PDF, page par page.
+
+    Une entrée par chemin de fichier, compressée avec zlib. Elle est valide tant
+    que la taille et la date de modification du PDF n'ont pas bougé ; si seule
+    la date change, l'empreinte SHA-256 du contenu tranche avant de réutiliser
+    l'entrée. Toute entrée périmée est supprimée à la lecture.
+    """
+
+    def __init__(self, cache_dir: str | Path | None = None, enabled: Optional[bool] = None) -> None:
+        self._dir = Path(cache_dir) if cache_dir is not None else CACHE_ROOT / "pdf_text"
+        self.enabled = _env_flag("NEUROLEARN_TEXT_CACHE") if enabled is None else enabled
+
+    def get_pages(self, pdf_path: str | Path) -> Optional[List[str]]:
+        """Renvoie le texte de chaque page si l'entrée est à jour, sinon ``None``."""
+
+        if not self.enabled:
+            return None
+        path = Path(pdf_path).resolve()
+        entry_path = self._entry_path(path)
+        try:
+            stat = path.stat()
+            entry = json.loads(zlib.decompress(entry_path.read_bytes()).decode("utf-8"))
+            pages = entry["pages"]
+            if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                return pages
+            if entry["size"] == stat.st_size and entry["sha256"] == file_sha256(path):
+                # Fichier simplement « touché » : on garde le texte et on met à jour l'empreinte
+                self._write(entry_path, {**entry, "mtime_ns": stat.st_mtime_ns})
+                return pages
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError, zlib.error):
+            pass
+        self._remove(entry_path)
+        return None
+
+    def put_pages(self, pdf_path: str | Path, pages: List[str], content_hash: Optional[str] = None) -> None:
+        if not self.enabled:
+            return
+        path = Path(pdf_path).resolve()
+        try:
+            stat = path.stat()
+            entry = {
+                "path": str(path),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": content_hash or file_sha256(path),
+                "pages": list(pages),
+            }
+            self._dir.mkdir(parents=True, exist_ok=True)
+            self._write(self._entry_path(path), entry)
+        except OSError:
+            pass
+
+    def invalidate(self, pdf_path: str | Path) -> None:
+        self._remove(self._entry_path(Path(pdf_path).resolve()))
+
+    def _entry_path(self, path: Path) -> Path:
+        digest = hashlib.sha256(str(path).encode("utf-8")).hexdigest()
+        return self._dir / f"{digest}.json.z"
+
+    def _write(self, entry_path: Path, entry: Dict[str, Any]) -> None:
+        data = zlib.compress(json.dumps(entry, ensure_ascii=False).encode("utf-8"), 6)
+        fd, tmp_name = tempfile.mkstemp(dir=self._dir, prefix=".tmp-", suffix=".json.z")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp_name, entry_path)
+        except OSError:
+            self._remove(Path(tmp_name))
+
+    @staticmethod
+    def _remove(entry_path: Path) -> None:
+        try:
+            entry_path.unlink()
+        except OSError:
+            pass
+
+
+__all__ = ["CACHE_ROOT", "GenerationCache", "PDFTextCache", "file_sha256"]
@@ -1,9 +1,6 @@
 
 from utils.rag_utils import (
-    extract_data,
-    sentence_chunking,
-    create_embeddings,
-    store_embeddings,
+    index_document,
     retrieve_relevant_chunks,
     generate_prompt,
 )
@@ -18,14 +15,18 @@ def chat_with_model(model_name, model_file="models.json"):
     config = manager.get_model(model_name)
     print(f"Loaded config for '{model_name}':\n{config}")
 
-    # Prepare RAG context if rag_file is present
+    # Open the persisted RAG index; only changed chunks are re-embedded if rag_file was edited
     db = None
     if config.get("rag_file"):
         print("Preparing RAG context...")
-        text = extract_data(config["rag_file"])
-        chunks = sentence_chunking(text)
-        embeddings = create_embeddings(chunks)
-        db = store_embeddings(embeddings, chunks)
+        settings = config.get("rag_index") or {}
+        db = index_document(
+            config["rag_file"],
+            chunk_size=settings.get("chunk_size", 7),
+            overlap=settings.get("overlap", 1),
+            model_name=settings.get("embedding_model"),
+            index_path=settings.get("path"),
+        )
 
     # Chat loop
     while True:
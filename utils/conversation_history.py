@@ -0,0 +1,171 @@
+"""
+ConversationHistory - Historique de chat borné par un budget de tokens.
+
+Le prompt système n'est envoyé qu'une fois par requête, les anciens échanges
+sont condensés dans un résumé glissant et le contexte RAG est gardé hors de
+l'historique : il ne sert qu'au tour pour lequel il a été récupéré.
+"""
+from __future__ import annotations
+
+import os
+import textwrap
+from typing import Callable, Dict, List, Optional
+
+Message = Dict[str, str]
+# (résumé précédent, messages retirés de l'historique) -> nouveau résumé
+Summarizer = Callable[[str, List[Message]], str]
+
+DEFAULT_MAX_TOKENS = 4096
+_ROLE_LABELS = {"user": "Utilisateur", "assistant": "Assistant"}
+
+
+def estimate_tokens(text: str) -> int:
+    # Même heuristique que utils.generation : ~4 caractères par token
+    return max(1, len(text) // 4) if text else 0
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    limit = max(0, max_tokens) * 4
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0] + " […]"
+
+
+def extractive_summary(previous: str, dropped: List[Message]) -> str:
+    """Résumé sans appel au modèle : une ligne abrégée par message retiré."""
+
+    lines = [previous] if previous else []
+    for message in dropped:
+        label = _ROLE_LABELS.get(message["role"], message["role"])
+        lines.append(f"- {label} : {textwrap.shorten(message['content'], width=240, placeholder=' […]')}")
+    return "\n".join(lines)
+
+
+class ConversationHistory:
+    """Tours de conversation dont la taille envoyée au modèle reste bornée.
+
+    ``max_tokens`` (``NEUROLEARN_CHAT_MAX_TOKENS`` par défaut) borne la requête
+    complète. Le contexte RAG peut en occuper ``rag_share`` et le résumé
+    ``summary_share`` ; le reste va au prompt système, au message courant et
+    aux tours les plus récents. Les tours qui ne tiennent plus sont passés à
+    ``summarizer`` (``extractive_summary`` par défaut, qui n'appelle pas le
+    modèle) et disparaissent de l'historique.
+    """
+
+    def __init__(
+        self,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        summarizer: Optional[Summarizer] = None,
+        rag_share: float = 0.4,
+        summary_share: float = 0.15,
+    ) -> None:
+        if max_tokens is None:
+            max_tokens = int(os.environ.get("NEUROLEARN_CHAT_MAX_TOKENS", DEFAULT_MAX_TOKENS))
+        self.system_prompt = system_prompt or ""
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer or extractive_summary
+        self.rag_budget = int(max_tokens * rag_share)
+        self.summary_budget = int(max_tokens * summary_share)
+        self.messages: List[Message] = []
+        self.summary = ""
+
+    @property
+    def turns_budget(self) -> int:
+        """Tokens réservés aux tours conservés mot pour mot."""
+
+        reserved = estimate_tokens(self.system_prompt) + self.rag_budget + self.summary_budget
+        return max(0, self.max_tokens - reserved)
+
+    def build_messages(self, user_message: str, rag_content: Optional[str] = None) -> List[Message]:
+        """Messages à envoyer pour ``user_message`` : système, contexte, tours récents puis question."""
+
+        messages: List[Message] = []
+        system_parts = [self.system_prompt] if self.system_prompt else []
+        if self.summary:
+            system_parts.append(f"Résumé de la conversation précédente :\n{self.summary}")
+        if system_parts:
+            messages.append({"role": "system", "content": "\n\n".join(system_parts)})
+        if rag_content:
+            context = _truncate_tokens(rag_content, self.rag_budget)
+            messages.append({"role": "system", "content": f"Contexte documentaire pour la question suivante :\n{context}"})
+
+        user = {"role": "user", "content": user_message}
+        budget = self.max_tokens - self.count_tokens(messages) - estimate_tokens(user_message)
+        recent: List[Message] = []
+        for message in reversed(self.messages):
+            cost = estimate_tokens(message["content"])
+            if cost > budget:
+                break
+            recent.append(message)
+            budget -= cost
+        recent.reverse()
+        # L'historique envoyé commence toujours par une question de l'utilisateur
+        while recent and recent[0]["role"] != "user":
+            recent.pop(0)
+        return messages + recent + [user]
+
+    def add_turn(self, user_message: str, assistant_reply: str) -> None:
+        """Enregistre un échange (sans le contexte RAG) puis résume ce qui dépasse le budget."""
+
+        self.messages.append({"role": "user", "content": user_message})
+        self.messages.append({"role": "assistant", "content": assistant_reply})
+        self._compact()
+
+    def clear(self) -> None:
+        self.messages = []
+        self.summary = ""
+
+    def to_dict(self) -> Dict[str, object]:
+        """État à sauvegarder pour reprendre la conversation plus tard."""
+
+        return {"messages": [dict(message) for message in self.messages], "summary": self.summary}
+
+    def restore(self, state: object) -> bool:
+        """Recharge un état produit par ``to_dict`` en le ramenant au budget courant.
+
+        Un état invalide est ignoré : la conversation repart de zéro et la
+        méthode renvoie False.
+        """
+
+        messages = state.get("messages") if isinstance(state, dict) else None
+        summary = state.get("summary") if isinstance(state, dict) else None
+        valid = (
+            isinstance(messages, list)
+            and isinstance(summary, (str, type(None)))
+            and all(
+                isinstance(message, dict)
+                and message.get("role") in _ROLE_LABELS
+                and isinstance(message.get("content"), str)
+                for message in messages
+            )
+        )
+        if not valid:
+            self.clear()
+            return False
+        self.messages = [{"role": message["role"], "content": message["content"]} for message in messages]
+        self.summary = summary or ""
+        self._compact()
+        return True
+
+    @staticmethod
+    def count_tokens(messages: List[Message]) -> int:
+        return sum(estimate_tokens(message["content"]) for message in messages)
+
+    def _compact(self) -> None:
+        dropped: List[Message] = []
+        # Le dernier échange est toujours conservé, même s'il dépasse à lui seul le budget
+        while len(self.messages) > 2 and self.count_tokens(self.messages) > self.turns_budget:
+            dropped.extend(self.messages[:2])
+            del self.messages[:2]
+        if not dropped:
+            return
+        summary = self.summarizer(self.summary, dropped)
+        # Au-delà de son budget, le résumé perd ses lignes les plus anciennes
+        lines = summary.splitlines()
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_budget:
+            lines.pop(0)
+        self.summary = _truncate_tokens("\n".join(lines), self.summary_budget)
+
+
+__all__ = ["ConversationHistory", "estimate_tokens", "extractive_summary"]
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import itertools
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QTextDocument
+
+from utils.json_datastore import JSONDataStore
+from utils.quiz_rendering import RENDER_VERSION, has_render, prepare_quiz_items
+
+# Police par défaut du document de rendu : retirée pour que celle du widget (style.qss) s'applique
+_BODY_STYLE = re.compile(r'<body style="[^"]*">')
+
+
+@dataclass
+class LoadedCourse:
+    """Contenu d'un cours prêt à afficher, préparé hors du thread de l'interface."""
+
+    course_id: str
+    filename: str = "Cours"
+    summary: str = ""
+    summary_html: str = ""
+    quiz: List[Dict[str, Any]] = field(default_factory=list)
+    flashcards: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def render_summary_html(summary: str) -> str:
+    """HTML du résumé produit par le moteur Markdown de Qt, celui de ``QTextEdit.setMarkdown``.
+
+    Appelé dans le thread de chargement : le thread de l'interface n'a plus
+    qu'à appliquer le HTML avec ``setHtml``. Chaque appel utilise son propre
+    document, et une QGuiApplication existe toujours quand CourseLoader tourne.
+    """
+
+    document = QTextDocument()
+    document.setMarkdown(summary)
+    return _BODY_STYLE.sub("<body>", document.toHtml(), count=1)
+
+
+def _summary_render(course: Dict[str, Any]) -> str:
+    render = course.get("summary_render")
+    if isinstance(render, dict) and render.get("version") == RENDER_VERSION and isinstance(render.get("html"), str):
+        return render["html"]
+    return ""
+
+
+def _list_payload(payload: Any, *keys: str) -> List[Dict[str, Any]]:
+    if isinstance(payload, dict):
+        for key in keys:
+            if payload.get(key):
+                return list(payload[key])
+        return []
+    return list(payload or [])
+
+
+class _LoadSignals(QObject):
+    # Chaque signal porte le jeton de la demande pour écarter les chargements périmés
+    summary_ready = pyqtSignal(int, object)
+    quiz_ready = pyqtSignal(int, object)
+    flashcards_ready = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+
+class _LoadTask(QRunnable):
+    """Lit un cours puis prépare chaque onglet, en s'arrêtant dès que la demande est périmée."""
+
+    def __init__(self, loader: "CourseLoader", token: int, course_id: str) -> None:
+        super().__init__()
+        self._loader = loader
+        self._signals = loader._signals
+        self._token = token
+        self._course_id = course_id
+
+    def run(self) -> None:
+        try:
+            self._load()
+        except Exception as exc:  # noqa: BLE001
+            self._signals.failed.emit(self._token, str(exc))
+
+    def _load(self) -> None:
+        if not self._loader.is_current(self._token):
+            return
+        course = self._loader.datastore.get_course_by_id(self._course_id)
+        if not course:
+            self._signals.failed.emit(self._token, "Impossible de charger ce cours. L'entrée semble corrompue.")
+            return
+
+        summary = str(course.get("summary") or "").strip()
+        summary_html = _summary_render(course)
+        if not summary_html:
+            # Premier affichage depuis l'historique : le rendu est enregistré avec le cours
+            summary_html = render_summary_html(summary)
+            self._loader.datastore.update_course(
+                self._course_id, summary_render={"version": RENDER_VERSION, "html": summary_html}
+            )
+        loaded = LoadedCourse(
+            course_id=self._course_id,
+            filename=course.get("filename", "Cours"),
+            summary=summary,
+            summary_html=summary_html,
+        )
+        if not self._loader.is_current(self._token):
+            return
+        self._signals.summary_ready.emit(self._token, loaded)
+
+        quiz_payload = course.get("quiz", [])
+        questions = _list_payload(quiz_payload, "questions", "quiz")
+        if not all(has_render(item) for item in questions if isinstance(item, dict)):
+            # Cours enregistré avant le rendu préparé : on le complète une fois pour toutes
+            questions = prepare_quiz_items(questions)
+            quiz_payload = {**quiz_payload, "questions": questions} if isinstance(quiz_payload, dict) else questions
+            self._loader.datastore.update_course(self._course_id, quiz=quiz_payload)
+        loaded.quiz = questions
+        if not self._loader.is_current(self._token):
+            return
+        self._signals.quiz_ready.emit(self._token, loaded)
+
+        loaded.flashcards = _list_payload(course.get("flashcards", []), "flashcards", "cards")
+        # Émis même si la demande est périmée : le cours complet rejoint le cache
+        self._signals.flashcards_ready.emit(self._token, loaded)
+
+
+class CourseLoader(QObject):
+    """Charge les cours de l'historique en arrière-plan, onglet par onglet.
+
+    Chaque appel à ``load`` invalide les demandes précédentes : une tâche
+    périmée s'arrête à l'étape suivante et ses signaux sont ignorés. Les
+    ``warm_size`` derniers cours entièrement préparés restent en mémoire et
+    s'affichent immédiatement.
+
+    ``datastore`` peut être fourni plus tard, avant le premier ``load``.
+    """
+
+    summary_ready = pyqtSignal(object)
+    quiz_ready = pyqtSignal(object)
+    flashcards_ready = pyqtSignal(object)
+    failed = pyqtSignal(str, str)
+
+    DEFAULT_WARM_SIZE = 5
+
+    def __init__(
+        self,
+        datastore: Optional[JSONDataStore] = None,
+        warm_size: int = DEFAULT_WARM_SIZE,
+        parent: QObject | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self.datastore = datastore
+        self._warm: "OrderedDict[str, LoadedCourse]" = OrderedDict()
+        self._warm_size = max(0, warm_size)
+        self._tokens = itertools.count(1)
+        self._token = 0
+        self._current_id: Optional[str] = None
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+        self._signals = _LoadSignals(self)
+        self._signals.summary_ready.connect(lambda token, course: self._relay(token, course, self.summary_ready))
+        self._signals.quiz_ready.connect(lambda token, course: self._relay(token, course, self.quiz_ready))
+        self._signals.flashcards_ready.connect(self._on_course_complete)
+        self._signals.failed.connect(self._on_failed)
+
+    def load(self, course_id: str) -> None:
+        self._token = next(self._tokens)
+        self._current_id = course_id
+
+        warm = self._warm.get(course_id)
+        if warm is not None:
+            self._warm.move_to_end(course_id)
+            self.summary_ready.emit(warm)
+            self.quiz_ready.emit(warm)
+            self.flashcards_ready.emit(warm)
+            return
+
+        # Les tâches encore en file pour d'autres cours ne servent plus à rien
+        self._pool.clear()
+        self._pool.start(_LoadTask(self, self._token, course_id))
+
+    def cancel(self) -> None:
+        self._token = next(self._tokens)
+        self._current_id = None
+        self._pool.clear()
+
+    def is_current(self, token: int) -> bool:
+        return token == self._token
+
+    def forget(self, course_id: str) -> None:
+        """Retire un cours du cache, par exemple après sa suppression."""
+
+        self._warm.pop(course_id, None)
+
+    def shutdown(self, timeout_ms: int = 2000) -> None:
+        self.cancel()
+        self._pool.waitForDone(timeout_ms)
+
+    def _on_course_complete(self, token: int, course: LoadedCourse) -> None:
+        if self._warm_size:
+            self._warm[course.course_id] = course
+            self._warm.move_to_end(course.course_id)
+            while len(self._warm) > self._warm_size:
+                self._warm.popitem(last=False)
+        self._relay(token, course, self.flashcards_ready)
+
+    def _relay(self, token: int, course: LoadedCourse, signal: Any) -> None:
+        if self.is_current(token):
+            signal.emit(course)
+
+    def _on_failed(self, token: int, message: str) -> None:
+        if self.is_current(token) and self._current_id is not None:
+            self.failed.emit(self._current_id, message)
+
+
+__all__ = ["CourseLoader", "LoadedCourse", "render_summary_html"]
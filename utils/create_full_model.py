@@ -1,11 +1,4 @@
-from utils.rag_utils import (
-    extract_data,
-    sentence_chunking,
-    create_embeddings,
-    store_embeddings,
-    retrieve_relevant_chunks,
-    generate_prompt,
-)
+from utils.rag_utils import index_document
 from utils.model_manager import ModelManager
 import requests
 import json
@@ -22,16 +15,30 @@ def create_full_model(
     metadata=None,
     model_file="models.json"
 ):
-    # 1. Extract data from rag_file (if provided)
+    # 1. Index rag_file (if provided); unchanged chunks are reused from the persisted index
+    rag_index = None
     if rag_file:
-        print(f"Extracting data from: {rag_file}")
-        text = extract_data(rag_file)
-        print("Chunking sentences...")
-        chunks = sentence_chunking(text, chunk_size=chunk_size, overlap=overlap)
-        print("Creating embeddings...")
-        embeddings = create_embeddings(chunks, model_name=embedding_model)
-        print("Storing embeddings in ChromaDB...")
-        store_embeddings(embeddings, chunks, metadata=metadata)
+        print(f"Indexing: {rag_file}")
+        index = index_document(
+            rag_file,
+            chunk_size=chunk_size,
+            overlap=overlap,
+            model_name=embedding_model,
+            metadata=metadata,
+        )
+        update = index.info.get("last_update", {})
+        print(
+            f"Index ready: {len(index)} chunks "
+            f"({update.get('embedded', 0)} embedded, {update.get('reused', 0)} reused, "
+            f"{update.get('removed', 0)} removed)."
+        )
+        # Settings stored with the model so chat sessions reopen the same index
+        rag_index = {
+            "path": str(index.path),
+            "chunk_size": chunk_size,
+            "overlap": overlap,
+            "embedding_model": embedding_model,
+        }
     else:
         print("No RAG file provided, skipping RAG pipeline.")
 
@@ -44,4 +51,6 @@ def create_full_model(
         system_prompt=system_prompt,
         rag_file=rag_file
     )
+    if rag_index:
+        manager.edit_model(name, rag_index=rag_index)
     print(f"Model '{name}' created and saved.")
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+HASHING_MODEL = "hashing"
+DEFAULT_BATCH_SIZE = 64
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Normalise chaque ligne (norme L2) ; les lignes nulles restent nulles."""
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class HashingEmbedder:
+    """Embedder déterministe sans modèle : mots et bigrammes hachés dans ``dim`` cases.
+
+    Les résultats sont identiques d'une machine à l'autre, ce qui le rend utile
+    hors ligne et pour les tests ; la similarité reste lexicale.
+    """
+
+    def __init__(self, dim: int = 384) -> None:
+        self.dim = dim
+        self.name = f"{HASHING_MODEL}-{dim}"
+
+    def _features(self, text: str) -> Dict[int, float]:
+        words = _TOKEN.findall(text.lower())
+        counts: Dict[int, float] = {}
+        for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            # Le bit de poids fort donne le signe : les collisions se compensent en moyenne
+            index = (value & 0x7FFFFFFFFFFFFFFF) % self.dim
+            sign = -1.0 if value >> 63 else 1.0
+            counts[index] = counts.get(index, 0.0) + sign
+        return counts
+
+    def encode(self, texts: Sequence[str], batch_size: int = DEFAULT_BATCH_SIZE) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for index, count in self._features(text).items():
+                # Fréquence sous-linéaire : un mot répété ne domine pas le vecteur
+                matrix[row, index] = math.copysign(1.0 + math.log(abs(count)), count) if count else 0.0
+        return normalize_rows(matrix)
+
+
+class SentenceTransformerEmbedder:
+    """Modèle local ``sentence-transformers``, chargé à la première utilisation."""
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL) -> None:
+        from sentence_transformers import SentenceTransformer
+
+        self.name = model_name
+        self._model = SentenceTransformer(model_name)
+        self.dim = int(self._model.get_sentence_embedding_dimension())
+
+    def encode(self, texts: Sequence[str], batch_size: int = DEFAULT_BATCH_SIZE) -> np.ndarray:
+        vectors = self._model.encode(
+            list(texts),
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+
+_embedders: Dict[str, object] = {}
+_embedders_lock = threading.Lock()
+
+
+def get_embedder(model_name: str = DEFAULT_EMBEDDING_MODEL):
+    """Renvoie l'embedder ``model_name`` (mis en cache, le chargement d'un modèle est coûteux).
+
+    ``hashing`` ou ``hashing-<dim>`` sélectionne l'embedder déterministe, de
+    même que ``NEUROLEARN_EMBEDDER=hashing``. Si ``sentence-transformers``
+    n'est pas installé, l'embedder déterministe est utilisé à sa place.
+    """
+
+    if os.environ.get("NEUROLEARN_EMBEDDER", "").strip().lower() == HASHING_MODEL:
+        model_name = HASHING_MODEL
+    with _embedders_lock:
+        embedder = _embedders.get(model_name)
+        if embedder is None:
+            if model_name.startswith(HASHING_MODEL):
+                _, _, dim = model_name.partition("-")
+                embedder = HashingEmbedder(int(dim) if dim.isdigit() else 384)
+            else:
+                try:
+                    embedder = SentenceTransformerEmbedder(model_name)
+                except ImportError:
+                    logger.warning(
+                        "sentence-transformers indisponible : embeddings par hachage à la place de %s",
+                        model_name,
+                    )
+                    embedder = HashingEmbedder()
+            _embedders[model_name] = embedder
+        return embedder
+
+
+@dataclass
+class Embeddings:
+    """Vecteurs normalisés d'une liste de textes et nom de l'embedder qui les a produits."""
+
+    vectors: np.ndarray
+    model_name: str
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+
+def embed_texts(
+    texts: Sequence[str],
+    model_name: str = DEFAULT_EMBEDDING_MODEL,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Embeddings:
+    embedder = get_embedder(model_name)
+    batches: List[np.ndarray] = [
+        embedder.encode(texts[start:start + batch_size], batch_size=batch_size)
+        for start in range(0, len(texts), batch_size)
+    ]
+    vectors = np.vstack(batches) if batches else np.zeros((0, embedder.dim), dtype=np.float32)
+    # Le nom effectif est retenu : les requêtes doivent passer par le même embedder
+    return Embeddings(vectors=vectors, model_name=embedder.name)
+
+
+__all__ = [
+    "DEFAULT_EMBEDDING_MODEL",
+    "Embeddings",
+    "HashingEmbedder",
+    "SentenceTransformerEmbedder",
+    "embed_texts",
+    "get_embedder",
+    "normalize_rows",
+]
@@ -1,14 +1,86 @@
 from __future__ import annotations
 
 import json
+import math
 import os
-from typing import Any, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 
 from PyQt6.QtCore import QObject, pyqtSignal
 
-import google.generativeai as genai
+if TYPE_CHECKING:
+    import google.generativeai as genai
+else:
+    # Le SDK Gemini est lourd à importer : il n'est chargé qu'à la première génération
+    genai = None
 
+from utils.cache import GenerationCache, file_sha256
+from utils.quiz_rendering import prepare_quiz_items
 from utils.rag_utils import get_text_from_pdf
+from utils.request_scheduler import RequestCancelled, RequestScheduler, shared_scheduler
+
+# À incrémenter à chaque modification des prompts : invalide le cache de génération.
+PROMPT_VERSION = 2
+
+# Au-delà de ce volume estimé, le document est traité section par section (map-reduce).
+DEFAULT_CHUNK_THRESHOLD_TOKENS = 100_000
+DEFAULT_SECTION_TOKENS = 12_000
+# Questions demandées en plus à chaque section : les doublons entre sections sont retirés à la fusion.
+QUIZ_SECTION_MARGIN = 0.25
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation grossière (~4 caractères par token), suffisante pour découper."""
+
+    return len(text) // 4 + 1
+
+
+def split_into_sections(text: str, max_tokens: int) -> List[str]:
+    """Découpe le texte en sections d'au plus ``max_tokens`` en respectant les paragraphes."""
+
+    max_chars = max_tokens * 4
+    sections: List[str] = []
+    current: List[str] = []
+    current_len = 0
+    for paragraph in text.split("\n\n"):
+        # Un paragraphe trop long est coupé sur un espace proche de la limite
+        while len(paragraph) > max_chars:
+            cut = paragraph.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            if current:
+                sections.append("\n\n".join(current))
+                current, current_len = [], 0
+            sections.append(paragraph[:cut])
+            paragraph = paragraph[cut:].lstrip()
+        if current and current_len + len(paragraph) + 2 > max_chars:
+            sections.append("\n\n".join(current))
+            current, current_len = [], 0
+        if paragraph:
+            current.append(paragraph)
+            current_len += len(paragraph) + 2
+    if current:
+        sections.append("\n\n".join(current))
+    return sections
+
+
+class GenerationCancelled(Exception):
+    """Levée pour interrompre une génération annulée par l'utilisateur."""
+
+
+def _load_genai() -> Any:
+    global genai
+    if genai is None:
+        import google.generativeai as sdk
+
+        genai = sdk
+    return genai
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
 
 
 class GenerationWorker(QObject):
@@ -16,41 +88,236 @@ class GenerationWorker(QObject):
 
     finished = pyqtSignal()
     error = pyqtSignal(str)
+    # Erreur limitée à un seul artefact : (nom de l'artefact, message)
+    artifact_error = pyqtSignal(str, str)
     finished_summary = pyqtSignal(str)
+    # Fragment de résumé reçu pendant la génération en streaming
+    summary_progress = pyqtSignal(str)
     finished_quiz = pyqtSignal(list)
     finished_flashcards = pyqtSignal(list)
 
-    def __init__(self, pdf_path: str, model_name: Optional[str] = None, num_questions: int = 10) -> None:
+    ARTIFACTS = ("summary", "quiz", "flashcards")
+
+    SUMMARY_CONFIG: Dict[str, Any] = {"temperature": 0.3}
+    JSON_CONFIG: Dict[str, Any] = {
+        "temperature": 0.3,
+        "response_mime_type": "application/json",
+    }
+
+    def __init__(
+        self,
+        pdf_path: str,
+        model_name: Optional[str] = None,
+        num_questions: int = 10,
+        concurrent: bool = True,
+        use_cache: bool = True,
+        cache: Optional[GenerationCache] = None,
+        chunk_threshold_tokens: Optional[int] = None,
+        section_tokens: Optional[int] = None,
+        max_parallel_sections: int = 4,
+        stream_summary: bool = True,
+        scheduler: Optional[RequestScheduler] = None,
+    ) -> None:
         super().__init__()
         self.pdf_path = pdf_path
         env_model = os.environ.get("GEMINI_MODEL")
         self.model_name = model_name or env_model or "gemini-2.5-flash"
         self.num_questions = num_questions
+        self.concurrent = concurrent
+        self.cache = cache or GenerationCache()
+        # Le cache peut être partagé entre workers : on ne modifie pas son état
+        self._use_cache = use_cache
+        self.chunk_threshold_tokens = chunk_threshold_tokens or _env_int(
+            "NEUROLEARN_CHUNK_THRESHOLD_TOKENS", DEFAULT_CHUNK_THRESHOLD_TOKENS
+        )
+        self.section_tokens = section_tokens or _env_int("NEUROLEARN_SECTION_TOKENS", DEFAULT_SECTION_TOKENS)
+        self.max_parallel_sections = max(1, max_parallel_sections)
+        self.stream_summary = stream_summary
+        # Partagé par défaut entre tous les workers : débit et quotas sont globaux
+        self.scheduler = scheduler or shared_scheduler()
+        self._cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        """Demande l'arrêt de la génération.
+
+        Les appels déjà envoyés à Gemini ne peuvent pas être interrompus, mais
+        aucun nouvel appel n'est lancé et plus aucun résultat n'est émis.
+        """
+
+        self._cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def _check_cancelled(self) -> None:
+        if self._cancel_event.is_set():
+            raise GenerationCancelled()
 
     def run(self) -> None:
         try:
+            cache_keys = self._cache_keys()
+            pending = self._emit_cached(cache_keys)
+            if not pending:
+                return
+
+            self._check_cancelled()
             document_text = get_text_from_pdf(self.pdf_path)
+            self._check_cancelled()
             api_key = os.environ.get("GOOGLE_API_KEY")
             if not api_key:
                 raise RuntimeError("La variable d'environnement GOOGLE_API_KEY est introuvable.")
 
-            genai.configure(api_key=api_key)
+            _load_genai().configure(api_key=api_key)
             model = self._init_model()
 
-            summary = self._generate_summary(model, document_text)
-            self.finished_summary.emit(summary)
-
-            quiz = self._generate_quiz(model, document_text, self.num_questions)
-            self.finished_quiz.emit(quiz)
-
-            flashcards = self._generate_flashcards(model, document_text)
-            self.finished_flashcards.emit(flashcards)
+            tasks = self._build_tasks(model, document_text)
+            tasks = {
+                artifact: (self._with_cache(generate, cache_keys.get(artifact)), signal)
+                for artifact, (generate, signal) in tasks.items()
+                if artifact in pending
+            }
+            if self.concurrent:
+                self._run_concurrently(tasks)
+            else:
+                self._run_sequentially(tasks)
 
+        except GenerationCancelled:
+            pass
         except Exception as exc:
             self.error.emit(str(exc))
         finally:
             self.finished.emit()
 
+    def _artifact_config(self, artifact: str) -> Dict[str, Any]:
+        config = dict(self.SUMMARY_CONFIG if artifact == "summary" else self.JSON_CONFIG)
+        if artifact == "quiz":
+            config["num_questions"] = self.num_questions
+        # Le découpage change le résultat : il fait partie de la clé de cache
+        config["chunk_threshold_tokens"] = self.chunk_threshold_tokens
+        config["section_tokens"] = self.section_tokens
+        return config
+
+    def _cache_keys(self) -> Dict[str, str]:
+        """Calcule la clé de cache de chaque artefact (vide si le cache est désactivé)."""
+
+        if not (self._use_cache and self.cache.enabled):
+            return {}
+        try:
+            document_hash = file_sha256(self.pdf_path)
+        except OSError:
+            # L'erreur sera signalée proprement par get_text_from_pdf
+            return {}
+        return {
+            artifact: GenerationCache.make_key(
+                document_hash,
+                self.model_name,
+                artifact,
+                PROMPT_VERSION,
+                self._artifact_config(artifact),
+            )
+            for artifact in self.ARTIFACTS
+        }
+
+    def _emit_cached(self, cache_keys: Dict[str, str]) -> List[str]:
+        """Émet les artefacts déjà en cache et renvoie ceux qu'il reste à générer."""
+
+        signals = {
+            "summary": self.finished_summary,
+            "quiz": self.finished_quiz,
+            "flashcards": self.finished_flashcards,
+        }
+        pending: List[str] = []
+        for artifact in self.ARTIFACTS:
+            key = cache_keys.get(artifact)
+            cached = self.cache.get(key) if key else None
+            if cached is None:
+                pending.append(artifact)
+            else:
+                if artifact == "quiz":
+                    # Entrées mises en cache avant l'ajout du rendu préparé
+                    cached = prepare_quiz_items(cached)
+                signals[artifact].emit(cached)
+        return pending
+
+    def _with_cache(self, generate: Callable[[], Any], key: Optional[str]) -> Callable[[], Any]:
+        if not key:
+            return generate
+
+        def generate_and_store() -> Any:
+            result = generate()
+            self.cache.put(key, result)
+            return result
+
+        return generate_and_store
+
+    def _build_tasks(
+        self, model: genai.GenerativeModel, document_text: str
+    ) -> Dict[str, Tuple[Callable[[], Any], Any]]:
+        """Associe chaque artefact à sa fonction de génération et à son signal."""
+
+        if estimate_tokens(document_text) > self.chunk_threshold_tokens:
+            sections = split_into_sections(document_text, self.section_tokens)
+            return {
+                "summary": (
+                    lambda: self._generate_summary_chunked(model, sections),
+                    self.finished_summary,
+                ),
+                "quiz": (
+                    lambda: self._generate_quiz_chunked(model, sections, self.num_questions),
+                    self.finished_quiz,
+                ),
+                "flashcards": (
+                    lambda: self._generate_flashcards_chunked(model, sections),
+                    self.finished_flashcards,
+                ),
+            }
+
+        return {
+            "summary": (
+                lambda: self._generate_summary(model, document_text, stream=self.stream_summary),
+                self.finished_summary,
+            ),
+            "quiz": (
+                lambda: self._generate_quiz(model, document_text, self.num_questions),
+                self.finished_quiz,
+            ),
+            "flashcards": (
+                lambda: self._generate_flashcards(model, document_text),
+                self.finished_flashcards,
+            ),
+        }
+
+    def _run_sequentially(self, tasks: Dict[str, Tuple[Callable[[], Any], Any]]) -> None:
+        for artifact, (generate, signal) in tasks.items():
+            self._check_cancelled()
+            try:
+                result = generate()
+            except GenerationCancelled:
+                raise
+            except Exception as exc:
+                self.artifact_error.emit(artifact, str(exc))
+                continue
+            if not self.is_cancelled():
+                signal.emit(result)
+
+    def _run_concurrently(self, tasks: Dict[str, Tuple[Callable[[], Any], Any]]) -> None:
+        """Envoie les trois requêtes en même temps et émet chaque résultat dès son arrivée."""
+
+        with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="generation") as executor:
+            futures = {executor.submit(generate): artifact for artifact, (generate, _) in tasks.items()}
+            for future in as_completed(futures):
+                if self.is_cancelled():
+                    break
+                artifact = futures[future]
+                try:
+                    result = future.result()
+                except GenerationCancelled:
+                    continue
+                except Exception as exc:
+                    self.artifact_error.emit(artifact, str(exc))
+                    continue
+                tasks[artifact][1].emit(result)
+
     def _init_model(self) -> genai.GenerativeModel:
         """Initialise le modèle Gemini en gérant les éventuels changements de nom."""
 
@@ -73,52 +340,187 @@ class GenerationWorker(QObject):
             f"Dernière erreur: {last_exc}"
         )
 
-    def _generate_summary(self, model: genai.GenerativeModel, document_text: str) -> str:
+    def _generate_summary(
+        self, model: genai.GenerativeModel, document_text: str, stream: bool = False
+    ) -> str:
         prompt = (
             "Résume en Markdown ce document de manière claire et structurée :\n\n"
             f"{document_text}"
         )
-        response = model.generate_content(
+        if stream:
+            return self._stream_summary(model, prompt)
+        response = self._generate_content(
+            model,
             prompt,
-            generation_config={"temperature": 0.3},
+            generation_config=dict(self.SUMMARY_CONFIG),
         )
         return self._response_to_text(response)
 
-    def _generate_quiz(self, model: genai.GenerativeModel, document_text: str, num_questions: int = 10) -> List[dict]:
+    def _stream_summary(self, model: genai.GenerativeModel, prompt: str) -> str:
+        """Génère le résumé en streaming et émet chaque fragment dès sa réception."""
+
+        def read_stream(response: Any) -> str:
+            parts: List[str] = []
+            for chunk in response:
+                piece = self._response_to_text(chunk)
+                if piece:
+                    parts.append(piece)
+                    self.summary_progress.emit(piece)
+            return "".join(parts)
+
+        # Le flux est lu dans la place de concurrence du planificateur
+        return self._generate_content(
+            model,
+            prompt,
+            generation_config=dict(self.SUMMARY_CONFIG),
+            stream=True,
+            consume=read_stream,
+        )
+
+    def _generate_content(self, model: genai.GenerativeModel, contents: Any, **kwargs: Any) -> Any:
+        """Passe l'appel par le planificateur (débit, reprises, délai maximal)."""
+
+        try:
+            return self.scheduler.generate(model, contents, cancelled=self.is_cancelled, **kwargs)
+        except RequestCancelled as exc:
+            raise GenerationCancelled() from exc
+
+    def _generate_quiz(
+        self,
+        model: genai.GenerativeModel,
+        document_text: str,
+        num_questions: int = 10,
+        exclude: Optional[List[str]] = None,
+    ) -> List[dict]:
         prompt = (
             f"Génère un quiz en JSON basé sur le document ci-dessous. Le quiz doit contenir exactement {num_questions} questions.\n"
             "Tu dois renvoyer exactement le format suivant : {\"questions\": [{"
             "\"question\": \"...\", \"options\": [\"...\"], \"answer\": \"...\"}]}"
         )
-        response = model.generate_content(
+        if exclude:
+            prompt += "\nNe reprends aucune de ces questions déjà posées :\n" + "\n".join(f"- {q}" for q in exclude)
+        response = self._generate_content(
+            model,
             [prompt, f"=== DOCUMENT ===\n{document_text}"],
-            generation_config={
-                "temperature": 0.3,
-                "response_mime_type": "application/json",
-            },
+            generation_config=dict(self.JSON_CONFIG),
         )
-        return self._parse_json_list(self._response_to_text(response), "questions")
+        # Le rendu des questions est préparé ici, hors du thread de l'interface,
+        # puis enregistré avec le cours (voir utils.quiz_rendering)
+        return prepare_quiz_items(self._parse_json_list(self._response_to_text(response), "questions"))
 
     def _generate_flashcards(self, model: genai.GenerativeModel, document_text: str) -> List[dict]:
         prompt = (
             "Crée une liste de flashcards JSON basée sur le document ci-dessous.\n"
             "Format exigé : {\"flashcards\": [{\"front\": \"...\", \"back\": \"...\"}]}"
         )
-        response = model.generate_content(
+        response = self._generate_content(
+            model,
             [prompt, f"=== DOCUMENT ===\n{document_text}"],
-            generation_config={
-                "temperature": 0.3,
-                "response_mime_type": "application/json",
-            },
+            generation_config=dict(self.JSON_CONFIG),
         )
         return self._parse_json_list(self._response_to_text(response), "flashcards")
 
+    def _map_sections(self, generate: Callable[[Any], Any], items: List[Any]) -> List[Any]:
+        """Applique ``generate`` à chaque section en parallèle, en conservant l'ordre."""
+
+        def generate_unless_cancelled(item: Any) -> Any:
+            self._check_cancelled()
+            return generate(item)
+
+        # Pas plus de threads que de places du planificateur : les appels au-delà ne feraient qu'attendre
+        workers = min(self.max_parallel_sections, self.scheduler.max_concurrency, len(items)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="section") as executor:
+            return list(executor.map(generate_unless_cancelled, items))
+
+    def _generate_summary_chunked(self, model: genai.GenerativeModel, sections: List[str]) -> str:
+        partials = self._map_sections(lambda section: self._generate_summary(model, section), sections)
+        if len(partials) == 1:
+            return partials[0]
+        joined = "\n\n---\n\n".join(partial.strip() for partial in partials)
+        prompt = (
+            "Voici les résumés successifs des sections d'un même document. Fusionne-les en un "
+            "seul résumé Markdown clair et structuré, sans répétitions :\n\n"
+            f"{joined}"
+        )
+        if self.stream_summary:
+            return self._stream_summary(model, prompt)
+        response = self._generate_content(
+            model,
+            prompt,
+            generation_config=dict(self.SUMMARY_CONFIG),
+        )
+        return self._response_to_text(response)
+
+    def _generate_quiz_chunked(
+        self, model: genai.GenerativeModel, sections: List[str], num_questions: int = 10
+    ) -> List[dict]:
+        quotas = self._distribute(num_questions, sections)
+        # Marge par section : une fois les doublons retirés, le total doit encore suffire
+        jobs = [
+            (section, quota + max(1, math.ceil(quota * QUIZ_SECTION_MARGIN)))
+            for section, quota in zip(sections, quotas)
+            if quota > 0
+        ]
+        partials = self._map_sections(lambda job: self._generate_quiz(model, job[0], job[1]), jobs)
+        fields = ("question", "prompt")
+        merged = self._merge_unique(partials, fields, num_questions)
+        missing = num_questions - len(merged)
+        if missing > 0 and jobs:
+            # Un seul appel de complément, sur la plus longue section, sans reprendre les questions retenues
+            self._check_cancelled()
+            section = max(sections, key=len)
+            asked = [str(next((item[field] for field in fields if item.get(field)), "")) for item in merged]
+            extra = self._generate_quiz(model, section, missing, exclude=asked)
+            merged = self._merge_unique([merged, extra], fields, num_questions)
+        return merged
+
+    def _generate_flashcards_chunked(self, model: genai.GenerativeModel, sections: List[str]) -> List[dict]:
+        partials = self._map_sections(lambda section: self._generate_flashcards(model, section), sections)
+        return self._merge_unique(partials, ("front", "question"))
+
+    @staticmethod
+    def _distribute(total: int, sections: List[str]) -> List[int]:
+        """Répartit ``total`` entre les sections au prorata de leur longueur."""
+
+        lengths = [len(section) for section in sections]
+        size = sum(lengths) or 1
+        shares = [total * length / size for length in lengths]
+        quotas = [int(share) for share in shares]
+        remainders = sorted(range(len(shares)), key=lambda i: shares[i] - quotas[i], reverse=True)
+        for index in remainders[: total - sum(quotas)]:
+            quotas[index] += 1
+        return quotas
+
+    @staticmethod
+    def _merge_unique(
+        partials: List[List[dict]], fields: Tuple[str, ...], limit: Optional[int] = None
+    ) -> List[dict]:
+        """Fusionne les listes partielles en supprimant les doublons (texte normalisé)."""
+
+        seen = set()
+        merged: List[dict] = []
+        for items in partials:
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                text = next((str(item[field]) for field in fields if item.get(field)), "")
+                key = " ".join(text.lower().split())
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                merged.append(item)
+        return merged[:limit] if limit is not None else merged
+
     @staticmethod
     def _response_to_text(response: Any) -> str:
         """Extrait le texte d'une réponse Gemini."""
 
-        if hasattr(response, "text"):
-            return response.text or ""
+        try:
+            if hasattr(response, "text"):
+                return response.text or ""
+        except ValueError:
+            # Fragment de flux sans partie textuelle (ex. fin de génération)
+            return ""
         if hasattr(response, "parts"):
             parts = getattr(response, "parts", [])
             return "".join(getattr(p, "text", "") for p in parts)
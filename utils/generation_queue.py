@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import itertools
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+from utils.generation import GenerationWorker
+
+
+@dataclass
+class GenerationJob:
+    """État d'un PDF dans la file de génération par lot."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    job_id: int
+    pdf_path: str
+    num_questions: int
+    status: str = PENDING
+    error: str = ""
+    summary: Optional[str] = None
+    quiz: Optional[List[Dict[str, Any]]] = None
+    flashcards: Optional[List[Dict[str, Any]]] = None
+    failed_artifacts: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def filename(self) -> str:
+        return Path(self.pdf_path).name
+
+    @property
+    def completed_artifacts(self) -> int:
+        produced = sum(value is not None for value in (self.summary, self.quiz, self.flashcards))
+        return produced + len(self.failed_artifacts)
+
+    def reset(self) -> None:
+        self.status = self.PENDING
+        self.error = ""
+        self.summary = None
+        self.quiz = None
+        self.flashcards = None
+        self.failed_artifacts = {}
+
+
+class _JobRunner(QObject):
+    """Relaie les signaux d'un worker vers la file en gardant l'identifiant du job.
+
+    Il vit dans le thread de la file : les signaux émis depuis le thread du
+    worker y arrivent donc par connexion différée, comme dans MainWindow.
+    """
+
+    def __init__(self, queue: "GenerationQueue", job: GenerationJob) -> None:
+        super().__init__(queue)
+        self._queue = queue
+        self.job = job
+        self.thread: Optional[QThread] = None
+        self.worker: Optional[GenerationWorker] = None
+
+    def on_summary(self, summary: str) -> None:
+        self.job.summary = summary
+        self._queue.job_changed.emit(self.job.job_id)
+
+    def on_quiz(self, quiz: list) -> None:
+        self.job.quiz = quiz
+        self._queue.job_changed.emit(self.job.job_id)
+
+    def on_flashcards(self, flashcards: list) -> None:
+        self.job.flashcards = flashcards
+        self._queue.job_changed.emit(self.job.job_id)
+
+    def on_artifact_error(self, artifact: str, message: str) -> None:
+        self.job.failed_artifacts[artifact] = message
+        self._queue.job_changed.emit(self.job.job_id)
+
+    def on_error(self, message: str) -> None:
+        self.job.error = message
+
+    def on_finished(self) -> None:
+        self._queue._on_runner_finished(self)
+
+
+class GenerationQueue(QObject):
+    """File de PDF à générer, traités par plusieurs GenerationWorker en parallèle.
+
+    ``concurrency`` vaut par défaut ``NEUROLEARN_BATCH_CONCURRENCY`` (2 sinon).
+    """
+
+    job_added = pyqtSignal(int)
+    job_changed = pyqtSignal(int)
+    # Émis quand un job se termine avec au moins un artefact généré
+    job_finished = pyqtSignal(int)
+    idle = pyqtSignal()
+
+    def __init__(self, concurrency: Optional[int] = None, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        if concurrency is None:
+            concurrency = int(os.environ.get("NEUROLEARN_BATCH_CONCURRENCY", "2"))
+        self._concurrency = max(1, concurrency)
+        self._ids = itertools.count(1)
+        self._jobs: Dict[int, GenerationJob] = {}
+        self._pending: List[int] = []
+        self._runners: Dict[int, _JobRunner] = {}
+
+    @property
+    def concurrency(self) -> int:
+        return self._concurrency
+
+    def set_concurrency(self, concurrency: int) -> None:
+        self._concurrency = max(1, concurrency)
+        self._schedule()
+
+    def jobs(self) -> List[GenerationJob]:
+        return list(self._jobs.values())
+
+    def job(self, job_id: int) -> Optional[GenerationJob]:
+        return self._jobs.get(job_id)
+
+    def active_count(self) -> int:
+        """Nombre de jobs en attente ou en cours."""
+
+        return len(self._pending) + len(self._runners)
+
+    def enqueue(self, pdf_path: str, num_questions: int) -> int:
+        job = GenerationJob(job_id=next(self._ids), pdf_path=pdf_path, num_questions=num_questions)
+        self._jobs[job.job_id] = job
+        self._pending.append(job.job_id)
+        self.job_added.emit(job.job_id)
+        self._schedule()
+        return job.job_id
+
+    def cancel(self, job_id: int) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        if job.status == GenerationJob.PENDING:
+            self._pending.remove(job_id)
+        elif job.status == GenerationJob.RUNNING:
+            runner = self._runners.get(job_id)
+            if runner is not None and runner.worker is not None:
+                runner.worker.cancel()
+        else:
+            return False
+        job.status = GenerationJob.CANCELLED
+        self.job_changed.emit(job_id)
+        return True
+
+    def cancel_all(self) -> None:
+        for job_id in list(self._pending) + list(self._runners):
+            self.cancel(job_id)
+
+    def retry(self, job_id: int) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.status not in (GenerationJob.FAILED, GenerationJob.CANCELLED):
+            return False
+        if job_id in self._runners:
+            # Le worker annulé n'a pas encore rendu la main : on attend sa fin
+            return False
+        job.reset()
+        self._pending.append(job_id)
+        self.job_changed.emit(job_id)
+        self._schedule()
+        return True
+
+    def shutdown(self) -> None:
+        """Annule tous les jobs et attend la fin des threads encore actifs.
+
+        L'attente n'a pas de délai maximal : un QThread détruit pendant son
+        exécution fait planter Qt. Après l'annulation, un worker ne lance plus
+        d'appel ; seul un appel déjà parti peut le retenir, au plus
+        ``NEUROLEARN_GEMINI_TIMEOUT`` secondes.
+        """
+
+        self.cancel_all()
+        for runner in list(self._runners.values()):
+            if runner.thread is not None and runner.thread.isRunning():
+                # quit() avant la fin de run() est mémorisé : la boucle du thread s'arrête aussitôt après
+                runner.thread.quit()
+                runner.thread.wait()
+
+    def _schedule(self) -> None:
+        while self._pending and len(self._runners) < self._concurrency:
+            self._start(self._jobs[self._pending.pop(0)])
+
+    def _start(self, job: GenerationJob) -> None:
+        job.status = GenerationJob.RUNNING
+        runner = _JobRunner(self, job)
+        thread = QThread(self)
+        worker = GenerationWorker(job.pdf_path, num_questions=job.num_questions, stream_summary=False)
+        worker.moveToThread(thread)
+        runner.thread = thread
+        runner.worker = worker
+
+        thread.started.connect(worker.run)
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        worker.finished.connect(runner.on_finished)
+        worker.error.connect(runner.on_error)
+        worker.artifact_error.connect(runner.on_artifact_error)
+        worker.finished_summary.connect(runner.on_summary)
+        worker.finished_quiz.connect(runner.on_quiz)
+        worker.finished_flashcards.connect(runner.on_flashcards)
+
+        self._runners[job.job_id] = runner
+        self.job_changed.emit(job.job_id)
+        thread.start()
+
+    def _on_runner_finished(self, runner: _JobRunner) -> None:
+        job = runner.job
+        self._runners.pop(job.job_id, None)
+        runner.deleteLater()
+
+        if job.status == GenerationJob.RUNNING:
+            produced = any(value is not None for value in (job.summary, job.quiz, job.flashcards))
+            if job.error or not produced:
+                job.status = GenerationJob.FAILED
+                if not job.error:
+                    job.error = "; ".join(job.failed_artifacts.values()) or "Aucun contenu généré."
+            else:
+                job.status = GenerationJob.DONE
+            self.job_changed.emit(job.job_id)
+            if job.status == GenerationJob.DONE:
+                self.job_finished.emit(job.job_id)
+
+        self._schedule()
+        if not self._pending and not self._runners:
+            self.idle.emit()
+
+
+__all__ = ["GenerationJob", "GenerationQueue"]
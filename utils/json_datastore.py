@@ -1,16 +1,71 @@
 from __future__ import annotations
 
+import bisect
 import json
+import logging
+import os
+import tempfile
+import threading
 import uuid
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+logger = logging.getLogger(__name__)
+
+def _atomic_write_json(path: Path, payload: Any) -> None:
+    """Write JSON to a temp file in the same directory, then rename it over ``path``.
+
+    A crash mid-write leaves either the previous file or the new one, never a
+    truncated mix of both.
+    """
+
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=False, separators=(",", ":"))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
 
 class JSONDataStore:
-    """Simple JSON-backed store used to persist generated course content."""
+    """Simple JSON-backed store used to persist generated course content.
+
+    Each course body lives in its own file under ``<storage>_courses/`` and the
+    storage file itself only holds a small metadata index. Saving or deleting a
+    course therefore touches one course file plus the index, whatever the size
+    of the history. Files written by older versions (every course inline in a
+    single JSON document) are migrated on first load.
+
+    Only the index is read at start-up; it is kept sorted by creation date so
+    the history sidebar never touches course bodies. Bodies are read on demand
+    and the most recently used ones are kept in a bounded in-memory cache.
 
-    def __init__(self, storage_path: str | Path | None = None) -> None:
+    Index changes are appended to a journal (``<storage>.journal``) instead of
+    rewriting the index each time: deletions are tombstones whose course files
+    are only removed when the journal is compacted into the index.
+
+    Public methods are serialised by a re-entrant lock so courses can be loaded
+    from a background thread while the UI saves or deletes others.
+    """
+
+    FORMAT_VERSION = 2
+    DEFAULT_BODY_CACHE_SIZE = 16
+    COMPACT_THRESHOLD = 64
+
+    def __init__(
+        self,
+        storage_path: str | Path | None = None,
+        body_cache_size: int = DEFAULT_BODY_CACHE_SIZE,
+    ) -> None:
         base_path = (
             Path(storage_path)
             if storage_path is not None
@@ -18,7 +73,17 @@ class JSONDataStore:
         )
         self._storage_path = base_path.expanduser().resolve()
         self._storage_path.parent.mkdir(parents=True, exist_ok=True)
-        self._data: Dict[str, Any] = {"courses": []}
+        self._courses_dir = self._storage_path.with_name(f"{self._storage_path.stem}_courses")
+        self._courses_dir.mkdir(parents=True, exist_ok=True)
+        self._journal_path = self._storage_path.with_suffix(self._storage_path.suffix + ".journal")
+        # Sorted by ascending creation date; newest courses are appended at the end
+        self._index: List[Dict[str, str]] = []
+        self._by_id: Dict[str, Dict[str, str]] = {}
+        self._tombstones: set[str] = set()
+        self._journal_entries = 0
+        self._body_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._body_cache_size = max(0, body_cache_size)
+        self._lock = threading.RLock()
         self._load_data()
 
     def save_new_course(
@@ -31,82 +96,263 @@ class JSONDataStore:
     ) -> str:
         """Persist a newly generated course and return its identifier."""
 
-        course_id = str(uuid.uuid4())
-        creation_date = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            course_id = str(uuid.uuid4())
+            creation_date = datetime.now().isoformat(timespec="seconds")
 
-        new_course = {
-            "id": course_id,
-            "filename": filename,
-            "creation_date": creation_date,
-            "summary": summary,
-            "quiz": quiz_data,
-            "flashcards": flashcards_data,
-        }
+            new_course = {
+                "id": course_id,
+                "filename": filename,
+                "creation_date": creation_date,
+                "summary": summary,
+                "quiz": quiz_data,
+                "flashcards": flashcards_data,
+            }
 
-        self._data.setdefault("courses", []).append(new_course)
-        self._save_data()
-        return course_id
+            _atomic_write_json(self._course_path(course_id), new_course)
+            meta = self._metadata_for(new_course)
+            self._add_to_index(meta)
+            self._append_journal({"op": "add", "course": meta})
+            self._cache_body(course_id, new_course)
+            return course_id
 
     def get_all_course_metadata(self) -> List[Dict[str, str]]:
         """Return metadata for all stored courses ordered by creation date desc."""
 
-        courses = list(self._data.get("courses", []))
-        try:
-            courses.sort(key=lambda course: course.get("creation_date", ""), reverse=True)
-        except TypeError:
-            pass
-
-        metadata: List[Dict[str, str]] = []
-        for course in courses:
-            metadata.append(
-                {
-                    "id": str(course.get("id", "")),
-                    "filename": str(course.get("filename", "Cours")),
-                    "creation_date": str(course.get("creation_date", "")),
-                }
-            )
-        return metadata
+        with self._lock:
+            return [dict(meta) for meta in reversed(self._index)]
 
     def get_course_by_id(self, course_id: str) -> Optional[Dict[str, Any]]:
-        for course in self._data.get("courses", []):
-            if course.get("id") == course_id:
-                return course
-        return None
+        with self._lock:
+            cached = self._body_cache.get(course_id)
+            if cached is not None:
+                self._body_cache.move_to_end(course_id)
+                return cached
+
+            if course_id not in self._by_id:
+                return None
+            try:
+                with self._course_path(course_id).open("r", encoding="utf-8") as handle:
+                    course = json.load(handle)
+            except (json.JSONDecodeError, OSError):
+                return None
+            if not isinstance(course, dict):
+                return None
+            self._cache_body(course_id, course)
+            return course
+
+    def update_course(self, course_id: str, **fields: Any) -> bool:
+        """Rewrite body fields (summary, quiz, flashcards, summary_render) of an existing course.
+
+        Metadata stays untouched, so neither the index nor the journal changes.
+        A new summary drops the stored summary render unless one is given too.
+        Returns False if the course is unknown or could not be read.
+        """
+
+        with self._lock:
+            unknown = set(fields) - {"summary", "quiz", "flashcards", "summary_render"}
+            if unknown:
+                raise ValueError(f"Cannot update course fields: {', '.join(sorted(unknown))}")
+            course = self.get_course_by_id(course_id)
+            if course is None:
+                return False
+            updated = {**course, **fields}
+            if "summary" in fields and "summary_render" not in fields:
+                updated.pop("summary_render", None)
+            _atomic_write_json(self._course_path(course_id), updated)
+            self._cache_body(course_id, updated)
+            return True
 
     def delete_course(self, course_id: str) -> bool:
         """Delete a course by its ID. Returns True if deleted, False if not found."""
-        courses = self._data.get("courses", [])
-        for i, course in enumerate(courses):
-            if course.get("id") == course_id:
-                courses.pop(i)
-                self._save_data()
-                return True
-        return False
+        with self._lock:
+            if not self._remove_from_index(course_id):
+                return False
+            self._body_cache.pop(course_id, None)
+            self._tombstones.add(course_id)
+            self._append_journal({"op": "del", "id": course_id})
+            return True
+
+    def compact(self) -> None:
+        """Fold the journal into the index and remove tombstoned course files."""
+
+        with self._lock:
+            self._save_index()
+            try:
+                self._journal_path.unlink()
+            except FileNotFoundError:
+                pass
+            self._journal_entries = 0
+            for course_id in self._tombstones:
+                try:
+                    self._course_path(course_id).unlink()
+                except OSError:
+                    pass
+            self._tombstones.clear()
+
+    def _add_to_index(self, meta: Dict[str, str]) -> None:
+        if meta["id"] in self._by_id:
+            return
+        bisect.insort(self._index, meta, key=self._sort_key)
+        self._by_id[meta["id"]] = meta
+
+    def _remove_from_index(self, course_id: str) -> bool:
+        meta = self._by_id.pop(course_id, None)
+        if meta is None:
+            return False
+        # Binary search to the block sharing this creation date. Ids are unique in the index
+        # (_read_index drops duplicates, _add_to_index skips known ids), so the entry is there.
+        start = bisect.bisect_left(self._index, meta["creation_date"], key=self._sort_key)
+        end = bisect.bisect_right(self._index, meta["creation_date"], key=self._sort_key)
+        for position in range(start, end):
+            if self._index[position]["id"] == course_id:
+                del self._index[position]
+                break
+        return True
+
+    def _append_journal(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        with self._journal_path.open("a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+        self._journal_entries += 1
+        if self._journal_entries >= self.COMPACT_THRESHOLD:
+            self.compact()
+
+    def _replay_journal(self) -> None:
+        try:
+            with self._journal_path.open("r", encoding="utf-8") as handle:
+                lines = handle.readlines()
+        except FileNotFoundError:
+            return
+        except OSError:
+            lines = []
+
+        corrupt: List[int] = []
+        for number, line in enumerate(lines, start=1):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = None
+            if not isinstance(record, dict):
+                # Only the last line may be cut short by a crash; anything else is real damage
+                if number < len(lines) or line.endswith("\n"):
+                    corrupt.append(number)
+                continue
+            if record.get("op") == "add" and isinstance(record.get("course"), dict):
+                self._add_to_index(self._metadata_for(record["course"]))
+            elif record.get("op") == "del":
+                course_id = str(record.get("id", ""))
+                self._remove_from_index(course_id)
+                self._tombstones.add(course_id)
+        if corrupt:
+            # Keep the damaged journal: compaction below would otherwise erase the evidence
+            backup_path = self._journal_path.with_suffix(self._journal_path.suffix + ".corrupt")
+            try:
+                backup_path.write_text("".join(lines), encoding="utf-8")
+            except OSError:
+                backup_path = None
+            logger.error(
+                "Journal %s has %d unreadable line(s) (%s); they were skipped. Copy kept at %s.",
+                self._journal_path,
+                len(corrupt),
+                ", ".join(map(str, corrupt[:10])) + (", ..." if len(corrupt) > 10 else ""),
+                backup_path,
+            )
+        self._journal_entries = len(lines)
+        if self._journal_entries:
+            self.compact()
+
+    def _cache_body(self, course_id: str, course: Dict[str, Any]) -> None:
+        if not self._body_cache_size:
+            return
+        self._body_cache[course_id] = course
+        self._body_cache.move_to_end(course_id)
+        while len(self._body_cache) > self._body_cache_size:
+            self._body_cache.popitem(last=False)
+
+    @staticmethod
+    def _sort_key(meta: Dict[str, str]) -> str:
+        return meta["creation_date"]
+
+    def _course_path(self, course_id: str) -> Path:
+        return self._courses_dir / f"{course_id}.json"
+
+    @staticmethod
+    def _metadata_for(course: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            "id": str(course.get("id", "")),
+            "filename": str(course.get("filename", "Cours")),
+            "creation_date": str(course.get("creation_date", "")),
+        }
 
     def _load_data(self) -> None:
+        self._read_index()
+        self._by_id = {meta["id"]: meta for meta in self._index}
+        self._replay_journal()
+
+    def _read_index(self) -> None:
         if not self._storage_path.exists():
-            self._save_data()
+            self._save_index()
             return
 
         try:
             with self._storage_path.open("r", encoding="utf-8") as handle:
                 payload = json.load(handle)
         except (json.JSONDecodeError, OSError):
-            backup_path = self._storage_path.with_suffix(self._storage_path.suffix + ".bak")
-            try:
-                self._storage_path.replace(backup_path)
-            except OSError:
-                pass
-            self._data = {"courses": []}
-            self._save_data()
+            self._backup_storage(".bak")
+            self._index = []
+            self._save_index()
+            return
+
+        if not isinstance(payload, dict) or not isinstance(payload.get("courses"), list):
+            self._index = []
+            self._save_index()
             return
 
-        if isinstance(payload, dict) and isinstance(payload.get("courses"), list):
-            self._data = payload
-        else:
-            self._data = {"courses": []}
-            self._save_data()
+        if payload.get("version") != self.FORMAT_VERSION:
+            self._migrate_legacy(payload["courses"])
+            return
+
+        # Already sorted when written by this version: timsort is then a single pass.
+        # Ids are unique in the index; a duplicate (hand-edited file) keeps its last entry.
+        unique = {
+            str(meta["id"]): self._metadata_for(meta)
+            for meta in payload["courses"]
+            if isinstance(meta, dict) and meta.get("id")
+        }
+        self._index = sorted(unique.values(), key=self._sort_key)
+
+    def _migrate_legacy(self, courses: List[Any]) -> None:
+        """Split a single-file history (format v1) into one file per course."""
 
-    def _save_data(self) -> None:
-        with self._storage_path.open("w", encoding="utf-8") as handle:
-            json.dump(self._data, handle, ensure_ascii=False, indent=2)
+        index: List[Dict[str, str]] = []
+        for course in courses:
+            if not isinstance(course, dict):
+                continue
+            course = dict(course)
+            course["id"] = str(course.get("id") or uuid.uuid4())
+            _atomic_write_json(self._course_path(course["id"]), course)
+            index.append(self._metadata_for(course))
+
+        # The v1 file is kept as a backup before the index replaces it
+        self._backup_storage(".v1.bak", copy=True)
+        self._index = sorted(index, key=self._sort_key)
+        self._save_index()
+
+    def _backup_storage(self, suffix: str, copy: bool = False) -> None:
+        backup_path = self._storage_path.with_suffix(self._storage_path.suffix + suffix)
+        try:
+            if copy:
+                backup_path.write_bytes(self._storage_path.read_bytes())
+            else:
+                self._storage_path.replace(backup_path)
+        except OSError:
+            pass
+
+    def _save_index(self) -> None:
+        _atomic_write_json(
+            self._storage_path,
+            {"version": self.FORMAT_VERSION, "courses": self._index},
+        )
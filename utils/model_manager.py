@@ -1,84 +1,172 @@
 # utils/model_manager.py
 
+import copy
+import hashlib
 import json
 import os
-
-
-
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def _file_lock(lock_path):
+    # Exclusive lock shared by every process using the same models file
+    with open(lock_path, "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10 s; keep waiting
+                    time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
 
 
 class ModelManager:
     def __init__(self, model_file="models.json"):
         self.model_file = model_file
-        self.models = self._load_models()
+        self.lock_file = f"{model_file}.lock"
+        self.models = {}
+        self._signature = None  # (mtime_ns, size, inode) of the file self.models came from
+        self._digest = None     # sha256 of that file's content
+        self._lock = threading.RLock()
+        self._refresh()
 
     def _load_models(self):
     # Load models from JSON file, or return empty dict if not found or invalid
-        if os.path.exists(self.model_file):
+        self._refresh()
+        return self.models
+
+    def _refresh(self):
+        # Serve from memory; re-read the file only when its stat changes, and re-parse only
+        # when its content hash changes (a touched or rewritten-identical file is kept as is)
+        with self._lock:
+            try:
+                stat = os.stat(self.model_file)
+            except FileNotFoundError:
+                self.models, self._signature, self._digest = {}, None, None
+                return
+            signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            if signature == self._signature:
+                return
+            with open(self.model_file, 'rb') as f:
+                raw = f.read()
+            digest = hashlib.sha256(raw).hexdigest()
+            if digest != self._digest:
+                try:
+                    data = json.loads(raw.decode('utf-8'))
+                    self.models = data if isinstance(data, dict) else {}
+                except (UnicodeDecodeError, ValueError):
+                    self.models = {}
+            self._signature, self._digest = signature, digest
+
+    @contextmanager
+    def _transaction(self):
+        # Mutations start from the latest file (another process may have written it) and
+        # hold the cross-process lock until the new version is in place
+        with self._lock, _file_lock(self.lock_file):
+            self._refresh()
             try:
-                with open(self.model_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, ValueError):
-                return {}
-        return {}
+                yield self.models
+                self._save_models()
+            except BaseException:
+                # Drop whatever was changed in memory; the next read reloads the file
+                self._signature = self._digest = None
+                raise
 
     def _save_models(self):
-        # Save current models back to JSON file
-        if self.models:
-            with open(self.model_file, 'w') as f:
-                json.dump(self.models, f, indent=2)
+        # Save current models back to JSON file, atomically: readers see the old or the new
+        # file, never a partial one. An empty dict is written too, so deleting the last model sticks.
+        directory = os.path.dirname(os.path.abspath(self.model_file))
+        data = json.dumps(self.models, indent=2).encode('utf-8')
+        fd, tmp_name = tempfile.mkstemp(dir=directory, prefix=".models-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, self.model_file)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+        stat = os.stat(self.model_file)
+        self._signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        self._digest = hashlib.sha256(data).hexdigest()
 
     def create_model(self, name, role, model_name, system_prompt, rag_file=None):
-        if name in self.models:  # Only check for duplicate config name
-            raise ValueError(f"Model config '{name}' already exists.")
-        # Remove the Ollama model check for now
-        self.models[name] = {
-            "role": role,       
-            "model": model_name,  # This should be validated separately
-            "system_prompt": system_prompt,
-            "rag_file": rag_file
-        }
-        self._save_models()
-        
-        
+        with self._transaction() as models:
+            if name in models:  # Only check for duplicate config name
+                raise ValueError(f"Model config '{name}' already exists.")
+            # Remove the Ollama model check for now
+            models[name] = {
+                "role": role,
+                "model": model_name,  # This should be validated separately
+                "system_prompt": system_prompt,
+                "rag_file": rag_file
+            }
+
+
 
     def list_models(self):
         # Return list of model names
-        data = self._load_models()
-        model_names = list(data.keys())
-        return model_names
+        with self._lock:
+            return list(self._load_models().keys())
 
     def get_model(self, name):
-        # Return full config of a model by name
-        if name in self.list_models():
-            return self.models[name]
+        # Return full config of a model by name (a copy: callers cannot alter the cache)
+        with self._lock:
+            models = self._load_models()
+            if name in models:
+                return copy.deepcopy(models[name])
         raise ValueError(f"Model config '{name}' not found.")
 
     def edit_model(self, name, **updates):
-        if name not in self.models:
-            raise ValueError(f"Model config '{name}' not found.")
-        for key, value in updates.items():
-            self.models[name][key] = value
-        self._save_models()
+        with self._transaction() as models:
+            if name not in models:
+                raise ValueError(f"Model config '{name}' not found.")
+            for key, value in updates.items():
+                models[name][key] = value
 
     def delete_model(self, name):
         # Remove a model
-        if name in self.models:
-            del self.models[name]
-            self._save_models()
-        else:
-            raise ValueError(f"Model config '{name}' not found.")
-        
-        
-    
-    
-    
+        with self._transaction() as models:
+            if name not in models:
+                raise ValueError(f"Model config '{name}' not found.")
+            del models[name]
+
+
+
+
+
 
 """
 ModelManager - Classe pour la gestion des configurations de modèles AI.
 
 Permet de créer, éditer, lister, supprimer et charger des configurations de modèles depuis un fichier JSON.
 Compatible avec APIUtils pour l'orchestration via endpoints API.
+Les lectures sont servies depuis la mémoire ; le fichier n'est relu que s'il a changé sur disque.
+Les écritures sont atomiques et protégées par un verrou partagé entre processus (fichier ``.lock``).
 """
 
-# ...existing code...
\ No newline at end of file
+# ...existing code...
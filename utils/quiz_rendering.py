@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import html
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, List
+
+# À incrémenter si le format ou le calcul des textes préparés change.
+# v2 : conversions en Python pur (plus de QTextDocument hors du thread de l'interface)
+RENDER_VERSION = 2
+
+_BLOCK_TAGS = frozenset({"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "table"})
+_SKIPPED_TAGS = frozenset({"head", "script", "style", "title"})
+_EMPHASIS = {"b": "**", "strong": "**", "i": "*", "em": "*", "code": "`"}
+
+_MD_IMAGE = re.compile(r"!\[([^\]]*)\]\([^)]*\)")
+_MD_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_MD_LINE_PREFIX = re.compile(r"^\s{0,3}(?:#{1,6}\s+|>\s?|[-*+]\s+|\d+[.)]\s+)", re.MULTILINE)
+_MD_EMPHASIS = re.compile(r"(\*\*|__|\*|_|~~|`)(?=\S)(.+?)(?<=\S)\1")
+_HTML_TAG = re.compile(r"<[^>]+>")
+
+
+class _HtmlToMarkdown(HTMLParser):
+    """Conversion minimale HTML -> Markdown : blocs, listes et emphase."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag: str, attrs: Any) -> None:
+        if tag in _SKIPPED_TAGS:
+            self._skip += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+            if tag == "li":
+                self.parts.append("- ")
+        elif tag in _EMPHASIS:
+            self.parts.append(_EMPHASIS[tag])
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIPPED_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+        elif tag in _EMPHASIS:
+            self.parts.append(_EMPHASIS[tag])
+
+    def handle_data(self, data: str) -> None:
+        if not self._skip:
+            self.parts.append(re.sub(r"\s+", " ", data))
+
+    def text(self) -> str:
+        lines = (line.strip() for line in "".join(self.parts).splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+def sanitize_content(value: str) -> str:
+    """Convertit un contenu HTML en Markdown ; renvoie le texte tel quel sinon."""
+
+    text = (value or "").strip()
+    if not text:
+        return ""
+
+    lowered = text.lower()
+    if "<html" in lowered or "<body" in lowered or "<!doctype" in lowered:
+        parser = _HtmlToMarkdown()
+        try:
+            parser.feed(text)
+            parser.close()
+        except Exception:
+            return html.unescape(_HTML_TAG.sub(" ", text)).strip()
+        return parser.text()
+    return text
+
+
+def to_plain_text(value: str) -> str:
+    """Texte brut d'un contenu Markdown, pour comparer options et réponse."""
+
+    plain = _MD_IMAGE.sub(r"\1", value)
+    plain = _MD_LINK.sub(r"\1", plain)
+    plain = _HTML_TAG.sub("", plain)
+    plain = _MD_LINE_PREFIX.sub("", plain)
+    plain = _MD_EMPHASIS.sub(r"\2", plain)
+    plain = html.unescape(plain).replace("\\", "").strip()
+    return plain or value.strip()
+
+
+def normalize(value: str) -> str:
+    return " ".join(value.strip().lower().split())
+
+
+def find_correct_indices(option_plain: List[str], answer_plain: str) -> List[int]:
+    if not option_plain:
+        return []
+    normalized_answer = normalize(answer_plain)
+    return [i for i, option in enumerate(option_plain) if normalize(option) == normalized_answer]
+
+
+def render_quiz_item(question: str, options: Iterable[str], answer: str) -> Dict[str, Any]:
+    """Prépare les textes affichés d'une question et les indices des bonnes réponses."""
+
+    option_displays = [sanitize_content(str(opt)) or "*Option vide*" for opt in options]
+    option_plain = [to_plain_text(value) for value in option_displays]
+    answer_display = sanitize_content(answer or "")
+    return {
+        "version": RENDER_VERSION,
+        "question": sanitize_content(question) or "Question",
+        "options": option_displays,
+        "options_plain": option_plain,
+        "answer": answer_display,
+        "correct_indices": find_correct_indices(option_plain, to_plain_text(answer_display)),
+    }
+
+
+def has_render(item: Any) -> bool:
+    render = item.get("render") if isinstance(item, dict) else None
+    return isinstance(render, dict) and render.get("version") == RENDER_VERSION
+
+
+def prepare_quiz_items(items: Iterable[Any]) -> List[Any]:
+    """Ajoute à chaque question son rendu préparé (clé ``render``) s'il manque ou est périmé.
+
+    Le résultat est enregistré avec le cours : les widgets du quiz peuvent
+    ensuite s'afficher sans aucune conversion. Les conversions n'utilisent pas
+    Qt et peuvent tourner sur n'importe quel thread, même sans QApplication.
+    """
+
+    prepared: List[Any] = []
+    for item in items:
+        if isinstance(item, dict) and not has_render(item):
+            item = dict(item)
+            item["render"] = render_quiz_item(
+                str(item.get("question") or item.get("prompt") or "Question"),
+                item.get("options") or item.get("choices") or [],
+                str(item.get("answer") or item.get("correct_answer") or ""),
+            )
+        prepared.append(item)
+    return prepared
+
+
+__all__ = [
+    "RENDER_VERSION",
+    "find_correct_indices",
+    "has_render",
+    "normalize",
+    "prepare_quiz_items",
+    "render_quiz_item",
+    "sanitize_content",
+    "to_plain_text",
+]
@@ -1,36 +1,424 @@
+import hashlib
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
-from pypdf import PdfReader
+from utils.cache import PDFTextCache
 
+if TYPE_CHECKING:
+    from utils.embeddings import Embeddings
+    from utils.vector_index import VectorIndex
 
-def get_text_from_pdf(pdf_path: str) -> str:
-    """Lit un PDF et renvoie son contenu textuel."""
+# En dessous de ce nombre de pages, lancer des processus coûte plus cher que l'extraction.
+PARALLEL_MIN_PAGES = 64
+
+_text_cache = PDFTextCache()
+
+# PdfReader ouvert une seule fois par processus du pool d'extraction (voir _init_extract_worker)
+_worker_reader = None
 
+
+def _check_pdf_path(pdf_path: str) -> Path:
     path = Path(pdf_path)
     if not path.exists():
         raise FileNotFoundError(f"Fichier introuvable : {pdf_path}")
     if path.suffix.lower() != ".pdf":
         raise ValueError("Le fichier sélectionné n'est pas un PDF.")
+    return path
+
+
+def _pdf_reader(source):
+    # pypdf n'est importé qu'à la première extraction, pas au démarrage de l'application
+    from pypdf import PdfReader
+
+    return PdfReader(source)
+
+
+def _extract_page(page, index: int) -> str:
+    try:
+        page_text = page.extract_text() or ""
+    except Exception as exc:  # pragma: no cover - dépend de pypdf
+        raise ValueError(f"Impossible de lire la page {index}: {exc}") from exc
+    return page_text.strip()
+
+
+def _init_extract_worker(pdf_path: str) -> None:
+    global _worker_reader
+    _worker_reader = _pdf_reader(pdf_path)
+
 
-    text_parts: list[str] = []
+def _extract_page_range(start: int, stop: int) -> List[str]:
+    """Extrait les pages [start, stop) ; exécuté dans un processus du pool."""
+
+    return [_extract_page(_worker_reader.pages[index], index + 1) for index in range(start, stop)]
+
+
+def _default_workers(page_count: int) -> int:
+    env_workers = os.environ.get("NEUROLEARN_PDF_WORKERS")
+    if env_workers:
+        return max(1, int(env_workers))
+    if page_count < PARALLEL_MIN_PAGES:
+        return 1
+    return max(1, min(os.cpu_count() or 1, 8))
+
+
+def iter_pdf_pages(pdf_path: str) -> Iterator[str]:
+    """Renvoie le texte de chaque page au fur et à mesure de l'extraction.
+
+    Une chaîne vide est produite pour les pages sans texte afin que la position
+    dans l'itération corresponde toujours au numéro de page.
+    """
+
+    path = _check_pdf_path(pdf_path)
     with path.open("rb") as pdf_file:
-        reader = PdfReader(pdf_file)
+        reader = _pdf_reader(pdf_file)
         if not reader.pages:
             raise ValueError("Le PDF ne contient aucune page.")
 
         for index, page in enumerate(reader.pages, start=1):
-            try:
-                page_text = page.extract_text() or ""
-            except Exception as exc:  # pragma: no cover - dépend de pypdf
-                raise ValueError(f"Impossible de lire la page {index}: {exc}") from exc
-            cleaned = page_text.strip()
-            if cleaned:
-                text_parts.append(cleaned)
+            yield _extract_page(page, index)
+
+
+def get_pdf_pages(pdf_path: str, workers: Optional[int] = None, use_cache: bool = True) -> List[str]:
+    """Extrait le texte de toutes les pages, en parallèle sur plusieurs processus si utile.
+
+    ``workers`` vaut par défaut ``NEUROLEARN_PDF_WORKERS`` ou, pour les gros
+    documents, le nombre de cœurs (plafonné à 8). Les pages sont renvoyées dans
+    l'ordre du document quel que soit l'ordre de fin des processus. Un PDF
+    inchangé depuis la dernière extraction est relu depuis le cache de texte
+    sans passer par pypdf.
+    """
+
+    path = _check_pdf_path(pdf_path)
+    if use_cache:
+        cached = _text_cache.get_pages(path)
+        if cached is not None:
+            return cached
 
+    with path.open("rb") as pdf_file:
+        reader = _pdf_reader(pdf_file)
+        page_count = len(reader.pages)
+        if not page_count:
+            raise ValueError("Le PDF ne contient aucune page.")
+        if workers is None:
+            workers = _default_workers(page_count)
+        if min(workers, page_count) <= 1:
+            # Le document déjà ouvert pour compter les pages sert directement à l'extraction
+            pages = [_extract_page(page, index) for index, page in enumerate(reader.pages, start=1)]
+        else:
+            pages = _extract_pages(path, page_count, workers)
+    if use_cache:
+        _text_cache.put_pages(path, pages)
+    return pages
+
+
+def _extract_pages(path: Path, page_count: int, workers: int) -> List[str]:
+    """Extrait ``page_count`` pages sur un pool de processus ; chaque processus lit le PDF une fois."""
+
+    workers = min(workers, page_count)
+    # Plusieurs tranches par processus pour équilibrer la charge entre pages lourdes et légères
+    slice_size = max(1, -(-page_count // (workers * 4)))
+    starts = list(range(0, page_count, slice_size))
+    stops = [min(start + slice_size, page_count) for start in starts]
+    # « spawn » et non fork : l'extraction est lancée depuis un QThread, et forker un
+    # processus dont d'autres threads (Qt) tiennent des verrous peut le bloquer
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_extract_worker,
+        initargs=(str(path),),
+    ) as executor:
+        slices = executor.map(_extract_page_range, starts, stops)
+        return [text for page_slice in slices for text in page_slice]
+
+
+def get_text_from_pdf(pdf_path: str, workers: Optional[int] = None, use_cache: bool = True) -> str:
+    """Lit un PDF et renvoie son contenu textuel."""
+
+    pages = get_pdf_pages(pdf_path, workers=workers, use_cache=use_cache)
+    text_parts = [text for text in pages if text]
     if not text_parts:
         raise ValueError("Aucun texte n'a pu être extrait du PDF.")
 
     return "\n\n".join(text_parts)
 
 
-__all__ = ["get_text_from_pdf"]
\ No newline at end of file
+# --- Moteur de recherche local (RAG) -------------------------------------------
+# NumPy et les embedders sont importés dans les fonctions : ce module est chargé
+# au démarrage de l'interface, qui n'en a pas besoin.
+
+DEFAULT_TOP_K = 5
+TEXT_SUFFIXES = {".txt", ".md", ".markdown"}
+
+# Fin de phrase : ponctuation suivie d'espaces, ou saut de paragraphe
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\n\s*\n")
+
+
+def extract_data(file_path: str) -> str:
+    """Renvoie le texte d'un PDF ou d'un fichier texte (.txt, .md)."""
+
+    path = Path(file_path)
+    if path.suffix.lower() in TEXT_SUFFIXES:
+        if not path.exists():
+            raise FileNotFoundError(f"Fichier introuvable : {file_path}")
+        return path.read_text(encoding="utf-8", errors="replace")
+    return get_text_from_pdf(file_path)
+
+
+def split_sentences(text: str) -> List[str]:
+    return [" ".join(part.split()) for part in _SENTENCE_END.split(text) if part and part.strip()]
+
+
+def sentence_chunking(text: str, chunk_size: int = 7, overlap: int = 1) -> List[str]:
+    """Regroupe les phrases par fenêtres de ``chunk_size``, dont ``overlap`` partagées avec la précédente."""
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size doit être au moins 1.")
+    if not 0 <= overlap < chunk_size:
+        raise ValueError("overlap doit être compris entre 0 et chunk_size - 1.")
+
+    sentences = split_sentences(text)
+    step = chunk_size - overlap
+    chunks: List[str] = []
+    for start in range(0, len(sentences), step):
+        chunks.append(" ".join(sentences[start:start + chunk_size]))
+        if start + chunk_size >= len(sentences):
+            break
+    return chunks
+
+
+def create_embeddings(
+    chunks: Sequence[str],
+    model_name: Optional[str] = None,
+    batch_size: Optional[int] = None,
+) -> "Embeddings":
+    """Calcule par lots les vecteurs normalisés des chunks.
+
+    ``model_name`` désigne un modèle ``sentence-transformers`` local, ou
+    ``hashing`` pour l'embedder déterministe sans dépendance.
+    """
+
+    from utils.embeddings import DEFAULT_BATCH_SIZE, DEFAULT_EMBEDDING_MODEL, embed_texts
+
+    return embed_texts(
+        list(chunks),
+        model_name=model_name or DEFAULT_EMBEDDING_MODEL,
+        batch_size=batch_size or DEFAULT_BATCH_SIZE,
+    )
+
+
+def _default_index_path(embeddings: "Embeddings", chunks: Sequence[str]) -> Path:
+    from utils.vector_index import INDEX_ROOT
+
+    digest = hashlib.sha256(embeddings.model_name.encode("utf-8"))
+    for chunk in chunks:
+        digest.update(b"\0" + chunk.encode("utf-8"))
+    return INDEX_ROOT / digest.hexdigest()[:32]
+
+
+def store_embeddings(
+    embeddings: "Embeddings",
+    chunks: Sequence[str],
+    metadata: Optional[Dict[str, Any]] = None,
+    index_path: Optional[str] = None,
+    ann: Optional[bool] = None,
+) -> "VectorIndex":
+    """Range les vecteurs dans un VectorIndex enregistré sur disque et le renvoie.
+
+    ``metadata`` est attaché à chaque chunk, avec sa position. Sans
+    ``index_path``, l'index est rangé sous ``.cache/vector_index/`` selon
+    l'empreinte des chunks et de l'embedder. ``ann`` force (ou interdit) la
+    construction de l'index approché IVF, construit par défaut au-delà de
+    ``ANN_MIN_VECTORS`` chunks.
+    """
+
+    from utils.vector_index import ANN_MIN_VECTORS, VectorIndex
+
+    index = VectorIndex(embeddings.vectors.shape[1], embeddings.model_name)
+    index.add(
+        embeddings.vectors,
+        list(chunks),
+        [{**(metadata or {}), "position": position} for position in range(len(chunks))],
+    )
+    if ann if ann is not None else len(index) >= ANN_MIN_VECTORS:
+        index.train_ivf()
+    index.save(index_path or _default_index_path(embeddings, chunks))
+    return index
+
+
+def chunk_hash(chunk: str) -> str:
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+
+def document_index_path(
+    file_path: str, chunk_size: int = 7, overlap: int = 1, model_name: Optional[str] = None
+) -> Path:
+    """Emplacement de l'index persistant d'un fichier pour un réglage de découpage et d'embedder."""
+
+    from utils.embeddings import DEFAULT_EMBEDDING_MODEL
+    from utils.vector_index import INDEX_ROOT
+
+    key = f"{Path(file_path).resolve()}|{chunk_size}|{overlap}|{model_name or DEFAULT_EMBEDDING_MODEL}"
+    return INDEX_ROOT / "documents" / hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def _source_signature(path: Path) -> Dict[str, Any]:
+    stat = path.stat()
+    return {"path": str(path.resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def index_document(
+    file_path: str,
+    chunk_size: int = 7,
+    overlap: int = 1,
+    model_name: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    index_path: Optional[str] = None,
+    ann: Optional[bool] = None,
+) -> "VectorIndex":
+    """Indexe ``file_path`` de façon incrémentale et renvoie son VectorIndex persistant.
+
+    Si le fichier n'a pas changé depuis la dernière indexation, l'index est
+    relu sans rien recalculer (seules les métadonnées sont mises à jour si
+    ``metadata`` a changé). Sinon le texte est redécoupé et chaque chunk identifié par
+    l'empreinte de son contenu : seuls les chunks nouveaux ou modifiés sont
+    envoyés à l'embedder, les chunks disparus sont retirés. Le détail de la
+    mise à jour est disponible dans ``index.info["last_update"]``.
+    """
+
+    import numpy as np
+
+    from utils.embeddings import DEFAULT_EMBEDDING_MODEL, get_embedder
+    from utils.vector_index import ANN_MIN_VECTORS, VectorIndex
+
+    model_name = model_name or DEFAULT_EMBEDDING_MODEL
+    target = Path(index_path) if index_path else document_index_path(file_path, chunk_size, overlap, model_name)
+    source = _source_signature(Path(file_path))
+    settings = {"chunk_size": chunk_size, "overlap": overlap, "model": model_name}
+
+    previous: Optional[VectorIndex] = None
+    if VectorIndex.exists(target):
+        try:
+            previous = VectorIndex.load(target)
+        except (OSError, ValueError, KeyError):
+            previous = None
+    if previous is not None and previous.info.get("settings") == settings:
+        if previous.info.get("source") == source:
+            return _reuse_index(previous, metadata)
+    else:
+        previous = None
+
+    chunks = sentence_chunking(extract_data(file_path), chunk_size=chunk_size, overlap=overlap)
+    hashes = [chunk_hash(chunk) for chunk in chunks]
+    embedder = get_embedder(model_name)
+
+    known: Dict[str, int] = {}
+    if previous is not None and previous.model_name == embedder.name:
+        for row, meta in enumerate(previous.metadata):
+            known.setdefault(meta.get("hash", ""), row)
+
+    missing = [i for i, digest in enumerate(hashes) if digest not in known]
+    fresh = create_embeddings([chunks[i] for i in missing], model_name=model_name) if missing else None
+
+    vectors = np.empty((len(chunks), embedder.dim), dtype=np.float32)
+    reused = [i for i, digest in enumerate(hashes) if digest in known]
+    if reused:
+        vectors[reused] = previous.vectors[[known[hashes[i]] for i in reused]]
+    if fresh is not None:
+        vectors[missing] = fresh.vectors
+
+    index = VectorIndex(embedder.dim, embedder.name)
+    index.add(
+        vectors,
+        chunks,
+        [{**(metadata or {}), "position": i, "hash": digest} for i, digest in enumerate(hashes)],
+    )
+    if previous is not None and previous.centroids is not None and ann is not False:
+        # Les centroïdes restent valables tant que le corpus évolue peu : pas de nouvel entraînement
+        index.assign_ivf(previous.centroids)
+    elif ann if ann is not None else len(index) >= ANN_MIN_VECTORS:
+        index.train_ivf()
+
+    removed = len(set(known) - set(hashes))
+    # Libère le mmap de l'ancien index avant de remplacer ses fichiers
+    previous = None
+    index.info = {
+        "source": source,
+        "settings": settings,
+        "last_update": {"reused": len(reused), "embedded": len(missing), "removed": removed},
+    }
+    index.save(target)
+    return index
+
+
+def _reuse_index(index: "VectorIndex", metadata: Optional[Dict[str, Any]]) -> "VectorIndex":
+    """Index d'un fichier inchangé : ``last_update`` décrit cet appel, pas l'indexation précédente."""
+
+    wanted = [
+        {**(metadata or {}), "position": position, "hash": meta.get("hash", "")}
+        for position, meta in enumerate(index.metadata)
+    ]
+    index.info["last_update"] = {"reused": len(index), "embedded": 0, "removed": 0}
+    if wanted != index.metadata:
+        index.metadata = wanted
+        index.save()
+    return index
+
+
+def retrieve_relevant_chunks(
+    db: "VectorIndex", query: str, top_k: int = DEFAULT_TOP_K, nprobe: Optional[int] = None
+) -> Tuple[List[str], List[float]]:
+    """Renvoie ``(chunks, scores)`` des ``top_k`` chunks les plus proches de ``query``.
+
+    ``nprobe`` règle le compromis rappel/latence si l'index a un IVF (voir VectorIndex.search).
+    """
+
+    from utils.embeddings import get_embedder
+
+    if db is None or not len(db) or not query.strip():
+        return [], []
+    query_vector = get_embedder(db.model_name).encode([query])
+    scores, indices = db.search(query_vector, top_k=top_k, nprobe=nprobe)
+    found = [(i, score) for i, score in zip(indices[0], scores[0]) if i >= 0]
+    return [db.chunks[i] for i, _ in found], [float(score) for _, score in found]
+
+
+def generate_prompt(
+    query: str,
+    retrieved_chunks: Sequence[str],
+    system_prompt: Optional[str] = None,
+) -> str:
+    """Assemble le prompt final : consignes, extraits numérotés puis question."""
+
+    parts: List[str] = []
+    if system_prompt:
+        parts.append(system_prompt.strip())
+    if retrieved_chunks:
+        context = "\n\n".join(f"[{number}] {chunk}" for number, chunk in enumerate(retrieved_chunks, start=1))
+        parts.append(
+            "Réponds en t'appuyant sur les extraits suivants ; "
+            "si la réponse n'y figure pas, dis-le.\n\n"
+            f"=== CONTEXTE ===\n{context}"
+        )
+    parts.append(f"=== QUESTION ===\n{query.strip()}")
+    return "\n\n".join(parts)
+
+
+__all__ = [
+    "chunk_hash",
+    "create_embeddings",
+    "extract_data",
+    "generate_prompt",
+    "get_pdf_pages",
+    "get_text_from_pdf",
+    "document_index_path",
+    "index_document",
+    "iter_pdf_pages",
+    "retrieve_relevant_chunks",
+    "sentence_chunking",
+    "split_sentences",
+    "store_embeddings",
+]
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Optional
+
+# Statuts HTTP considérés comme transitoires : quota dépassé et erreurs serveur.
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+# Noms des exceptions google.api_core correspondantes, pour ne pas importer le SDK ici.
+RETRYABLE_ERRORS = frozenset({
+    "DeadlineExceeded",
+    "InternalServerError",
+    "ResourceExhausted",
+    "ServiceUnavailable",
+    "TooManyRequests",
+    "GatewayTimeout",
+    "BadGateway",
+})
+
+_RETRY_IN = re.compile(r"retry in\s+([\d.]+)\s*s", re.IGNORECASE)
+_RETRY_DELAY = re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE)
+
+# Pas d'attente maximal entre deux vérifications d'annulation.
+_POLL_SECONDS = 0.2
+
+
+class RequestCancelled(Exception):
+    """Levée quand l'appelant annule pendant l'attente d'un créneau ou d'un nouvel essai."""
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(exc, "code", None)
+    if isinstance(status, int) and status in RETRYABLE_STATUS:
+        return True
+    return type(exc).__name__ in RETRYABLE_ERRORS
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Délai d'attente demandé par le serveur, en secondes, s'il en indique un."""
+
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        try:
+            return max(0.0, float(headers.get("Retry-After")))
+        except (TypeError, ValueError):
+            pass
+
+    # google.rpc.RetryInfo joint aux erreurs 429 de l'API Gemini
+    for detail in getattr(exc, "details", None) or ():
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None and hasattr(delay, "seconds"):
+            return delay.seconds + getattr(delay, "nanos", 0) / 1e9
+
+    message = str(exc)
+    match = _RETRY_IN.search(message) or _RETRY_DELAY.search(message)
+    return float(match.group(1)) if match else None
+
+
+class _TokenBucket:
+    """Limiteur de débit : ``rate`` jetons par seconde, au plus ``capacity`` en réserve."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self._rate = rate
+        self._capacity = max(1.0, capacity)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Prend un jeton s'il y en a un, sinon renvoie le temps à attendre."""
+
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self._rate
+
+    def pause(self, seconds: float) -> None:
+        """Suspend toutes les requêtes, par exemple quand le serveur signale un quota atteint."""
+
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class RequestScheduler:
+    """Planifie les appels à l'API Gemini partagés par tous les workers.
+
+    Chaque appel attend un jeton (débit limité à ``requests_per_minute``) et
+    une place parmi ``max_concurrency`` requêtes simultanées. Les erreurs
+    transitoires (429, 5xx, délais dépassés) sont relancées jusqu'à
+    ``max_retries`` fois avec un délai exponentiel aléatoire ; un délai
+    indiqué par le serveur est respecté et suspend aussi les autres appels.
+
+    Les valeurs par défaut proviennent de ``NEUROLEARN_GEMINI_RPM``,
+    ``NEUROLEARN_GEMINI_CONCURRENCY``, ``NEUROLEARN_GEMINI_MAX_RETRIES`` et
+    ``NEUROLEARN_GEMINI_TIMEOUT`` (secondes par requête).
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ) -> None:
+        if requests_per_minute is None:
+            requests_per_minute = _env_number("NEUROLEARN_GEMINI_RPM", 60)
+        if max_concurrency is None:
+            max_concurrency = int(_env_number("NEUROLEARN_GEMINI_CONCURRENCY", 4))
+        if max_retries is None:
+            max_retries = int(_env_number("NEUROLEARN_GEMINI_MAX_RETRIES", 5))
+        if timeout is None:
+            timeout = _env_number("NEUROLEARN_GEMINI_TIMEOUT", 120)
+
+        rate = max(requests_per_minute, 1e-3) / 60.0
+        self.max_concurrency = max(1, max_concurrency)
+        # Réserve d'une seconde de débit, et au moins une rafale de max_concurrency appels :
+        # les appels lancés ensemble (résumé, quiz, fiches) partent sans s'attendre
+        self._bucket = _TokenBucket(rate, max(rate, self.max_concurrency))
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.timeout = timeout if timeout > 0 else None
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def generate(
+        self,
+        model: Any,
+        contents: Any,
+        cancelled: Optional[Callable[[], bool]] = None,
+        consume: Optional[Callable[[Any], Any]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Appelle ``model.generate_content`` avec le délai maximal par requête configuré.
+
+        En streaming, passer ``consume`` : le flux est lu pendant que la place
+        de concurrence est tenue, et son résultat est renvoyé. Seule
+        l'ouverture du flux est relancée : les fragments déjà reçus ne sont
+        jamais rejoués.
+        """
+
+        if self.timeout is not None:
+            kwargs.setdefault("request_options", {"timeout": self.timeout})
+        return self.submit(model.generate_content, contents, cancelled=cancelled, consume=consume, **kwargs)
+
+    def submit(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        cancelled: Optional[Callable[[], bool]] = None,
+        consume: Optional[Callable[[Any], Any]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        attempt = 0
+        while True:
+            self._wait_for_token(cancelled)
+            self._acquire_slot(cancelled)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as exc:
+                if attempt >= self.max_retries or not is_retryable(exc):
+                    raise
+                delay = self._backoff(attempt, exc)
+            else:
+                # Toujours dans la place : une réponse lue en flux compte jusqu'à sa fin.
+                # Une erreur pendant la lecture n'est pas relancée.
+                return consume(result) if consume is not None else result
+            finally:
+                self._slots.release()
+            attempt += 1
+            self._wait(delay, cancelled)
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        hint = retry_after(exc)
+        if hint is not None:
+            delay = min(self.max_delay, hint) + random.uniform(0, self.base_delay)
+            self._bucket.pause(delay)
+            return delay
+        # « Full jitter » : évite que les workers relancent tous au même instant
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _wait_for_token(self, cancelled: Optional[Callable[[], bool]]) -> None:
+        while True:
+            delay = self._bucket.reserve()
+            if delay <= 0:
+                return
+            self._wait(delay, cancelled)
+
+    def _acquire_slot(self, cancelled: Optional[Callable[[], bool]]) -> None:
+        while not self._slots.acquire(timeout=_POLL_SECONDS):
+            if cancelled is not None and cancelled():
+                raise RequestCancelled()
+
+    def _wait(self, seconds: float, cancelled: Optional[Callable[[], bool]]) -> None:
+        deadline = time.monotonic() + seconds
+        while True:
+            if cancelled is not None and cancelled():
+                raise RequestCancelled()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, _POLL_SECONDS))
+
+
+_shared: Optional[RequestScheduler] = None
+_shared_lock = threading.Lock()
+
+
+def shared_scheduler() -> RequestScheduler:
+    """Planificateur commun à tous les GenerationWorker du processus."""
+
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RequestScheduler()
+        return _shared
+
+
+__all__ = [
+    "RequestCancelled",
+    "RequestScheduler",
+    "is_retryable",
+    "retry_after",
+    "shared_scheduler",
+]
@@ -0,0 +1,239 @@
+"""
+SessionStore - Sessions de chat de l'API, une ModelInterface par (modèle, session).
+
+Les sessions inactives depuis plus de ``ttl`` secondes expirent et au plus
+``max_sessions`` restent en mémoire (les moins récemment utilisées partent
+d'abord). Une session en cours d'utilisation n'est jamais évincée. Si un
+dossier de persistance est configuré, l'historique d'une session évincée y
+est écrit et rechargé quand elle revient.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from utils.ModelInterface import ModelInterface
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, str]  # (modèle, identifiant de session)
+
+DEFAULT_TTL = 30 * 60
+DEFAULT_MAX_SESSIONS = 256
+
+
+class _Session:
+    __slots__ = ("key", "interface", "lock", "last_used", "users")
+
+    def __init__(self, key: SessionKey, interface: ModelInterface) -> None:
+        self.key = key
+        self.interface = interface
+        self.lock = threading.Lock()  # Les tours d'une même session sont traités un à un
+        self.last_used = time.monotonic()
+        self.users = 0
+
+
+class SessionStore:
+    """Cache borné des sessions de chat.
+
+    ``ttl`` (``NEUROLEARN_SESSION_TTL``, 30 min) et ``max_sessions``
+    (``NEUROLEARN_MAX_SESSIONS``, 256) règlent l'éviction ; ``persist_dir``
+    (``NEUROLEARN_SESSION_DIR``, désactivé par défaut) active la sauvegarde
+    des historiques évincés. Les dépassements sont traités à chaque accès,
+    sans thread de fond : les sessions sont triées de la plus ancienne à la
+    plus récente, l'expiration ne parcourt donc que les sessions périmées.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        max_sessions: Optional[int] = None,
+        persist_dir: str | Path | None = None,
+    ) -> None:
+        if ttl is None:
+            ttl = float(os.environ.get("NEUROLEARN_SESSION_TTL", DEFAULT_TTL))
+        if max_sessions is None:
+            max_sessions = int(os.environ.get("NEUROLEARN_MAX_SESSIONS", DEFAULT_MAX_SESSIONS))
+        if persist_dir is None:
+            persist_dir = os.environ.get("NEUROLEARN_SESSION_DIR") or None
+        self.ttl = ttl
+        self.max_sessions = max(1, max_sessions)
+        self.persist_dir = Path(persist_dir) if persist_dir is not None else None
+        self.evictions = 0
+        self._sessions: "OrderedDict[SessionKey, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Sérialise lectures et écritures disque : une session évincée n'est pas
+        # rechargée avant que son historique soit écrit
+        self._io_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    @contextmanager
+    def use(self, key: SessionKey, factory: Callable[[], ModelInterface]) -> Iterator[ModelInterface]:
+        """Réserve la session ``key`` (créée avec ``factory`` si besoin) le temps d'un tour.
+
+        Les tours d'une même session s'exécutent l'un après l'autre ; les
+        exceptions de ``factory`` remontent telles quelles.
+        """
+
+        session = self._checkout(key, factory)
+        try:
+            with session.lock:
+                yield session.interface
+        finally:
+            with self._lock:
+                session.users -= 1
+                session.last_used = time.monotonic()
+                if self._sessions.get(session.key) is session:
+                    self._sessions.move_to_end(session.key)
+            self._evict()
+
+    def discard(self, model_name: str, forget: bool = False) -> None:
+        """Retire de la mémoire les sessions d'un modèle.
+
+        Les historiques sont sauvegardés, sauf avec ``forget`` (modèle supprimé)
+        qui efface aussi ceux déjà écrits sur disque.
+        """
+
+        with self._lock:
+            removed = [session for key, session in self._sessions.items() if key[0] == model_name]
+            for session in removed:
+                del self._sessions[session.key]
+            self._io_lock.acquire()
+        try:
+            if not forget:
+                self._persist(removed)
+            elif self.persist_dir is not None and self.persist_dir.exists():
+                for path in self.persist_dir.glob("*.json"):
+                    try:
+                        with path.open("r", encoding="utf-8") as handle:
+                            if json.load(handle).get("model") == model_name:
+                                path.unlink()
+                    except (OSError, ValueError, AttributeError):
+                        continue
+        finally:
+            self._io_lock.release()
+
+    def flush(self) -> None:
+        """Sauvegarde l'historique de toutes les sessions en mémoire (arrêt du serveur)."""
+
+        with self._lock:
+            sessions = list(self._sessions.values())
+        with self._io_lock:
+            self._persist(sessions)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "live": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl_s": self.ttl,
+                "evictions": self.evictions,
+                "persisted": self.persist_dir is not None,
+            }
+
+    def _checkout(self, key: SessionKey, factory: Callable[[], ModelInterface]) -> _Session:
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+                session.users += 1
+                session.last_used = time.monotonic()
+                return session
+        # Création hors du verrou : la factory et la lecture disque peuvent être lentes
+        interface = factory()
+        state = self._load(key)
+        # Fichier lisible mais mal formé : la session repart d'un historique vide
+        if state is not None and not interface.conversation.restore(state):
+            logger.warning("Historique de session illisible ignoré : %s", self._session_path(key))
+        with self._lock:
+            # Une requête concurrente a pu créer la même session entre-temps
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = _Session(key, interface)
+            else:
+                self._sessions.move_to_end(key)
+            session.users += 1
+            session.last_used = time.monotonic()
+        self._evict()
+        return session
+
+    def _evict(self) -> None:
+        evicted: List[_Session] = []
+        with self._lock:
+            deadline = time.monotonic() - self.ttl
+            for key, session in list(self._sessions.items()):
+                over_cap = len(self._sessions) > self.max_sessions
+                if not over_cap and session.last_used > deadline:
+                    break
+                if session.users:
+                    continue
+                del self._sessions[key]
+                evicted.append(session)
+            self.evictions += len(evicted)
+            if not evicted:
+                return
+            self._io_lock.acquire()
+        try:
+            self._persist(evicted)
+        finally:
+            self._io_lock.release()
+
+    def _session_path(self, key: SessionKey) -> Path:
+        digest = hashlib.sha256("\0".join(key).encode("utf-8")).hexdigest()[:32]
+        return self.persist_dir / f"{digest}.json"
+
+    def _load(self, key: SessionKey) -> Optional[dict]:
+        if self.persist_dir is None:
+            return None
+        try:
+            with self._io_lock, self._session_path(key).open("r", encoding="utf-8") as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or [entry.get("model"), entry.get("session_id")] != list(key):
+            return None
+        return entry.get("conversation")
+
+    def _persist(self, sessions: List[_Session]) -> None:
+        # Appelé avec _io_lock
+        if self.persist_dir is None or not sessions:
+            return
+        self.persist_dir.mkdir(parents=True, exist_ok=True)
+        for session in sessions:
+            # Verrou de session : un tour encore en cours finit avant la sauvegarde
+            with session.lock:
+                conversation = session.interface.conversation
+                if not conversation.messages and not conversation.summary:
+                    continue
+                entry = {
+                    "model": session.key[0],
+                    "session_id": session.key[1],
+                    "saved_at": time.time(),
+                    "conversation": conversation.to_dict(),
+                }
+            path = self._session_path(session.key)
+            fd, tmp_name = tempfile.mkstemp(dir=self.persist_dir, prefix=".tmp-", suffix=".json")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                    json.dump(entry, handle, ensure_ascii=False)
+                os.replace(tmp_name, path)
+            except OSError:
+                try:
+                    os.unlink(tmp_name)
+                except OSError:
+                    pass
+
+
+__all__ = ["SessionStore"]
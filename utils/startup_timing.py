@@ -0,0 +1,64 @@
+"""
+Chronométrage du démarrage de l'application.
+
+Ce module n'importe que la bibliothèque standard afin de pouvoir être chargé
+avant Qt et de mesurer aussi le coût des imports. Le rapport est affiché sur
+la sortie d'erreur si ``NEUROLEARN_STARTUP_REPORT=1`` ; un budget en
+millisecondes peut être fixé avec ``NEUROLEARN_STARTUP_BUDGET_MS`` : un
+dépassement est alors signalé dans le rapport.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from typing import List, Optional, TextIO, Tuple
+
+
+class StartupTimer:
+    """Enregistre des jalons nommés depuis la création du chronomètre."""
+
+    def __init__(self, origin: Optional[float] = None) -> None:
+        self._origin = time.perf_counter() if origin is None else origin
+        self._marks: List[Tuple[str, float]] = []
+
+    def mark(self, name: str) -> float:
+        """Enregistre le jalon ``name`` et renvoie le temps écoulé en millisecondes."""
+
+        elapsed_ms = (time.perf_counter() - self._origin) * 1000
+        self._marks.append((name, elapsed_ms))
+        return elapsed_ms
+
+    @property
+    def marks(self) -> List[Tuple[str, float]]:
+        return list(self._marks)
+
+    @property
+    def total_ms(self) -> float:
+        return self._marks[-1][1] if self._marks else 0.0
+
+    def format_report(self, budget_ms: Optional[float] = None) -> str:
+        lines = ["Démarrage de NeuroLearn :"]
+        previous = 0.0
+        for name, elapsed in self._marks:
+            lines.append(f"  {name:<14}{elapsed:>9.1f} ms  (+{elapsed - previous:.1f} ms)")
+            previous = elapsed
+        if budget_ms is not None:
+            verdict = "OK" if self.total_ms <= budget_ms else "DÉPASSÉ"
+            lines.append(f"  budget        {budget_ms:>9.1f} ms  {verdict}")
+        return "\n".join(lines)
+
+    def report(self, stream: TextIO | None = None) -> None:
+        """Affiche le rapport si ``NEUROLEARN_STARTUP_REPORT`` est activé."""
+
+        if os.environ.get("NEUROLEARN_STARTUP_REPORT", "0").strip().lower() not in {"1", "true", "yes", "on"}:
+            return
+        budget = os.environ.get("NEUROLEARN_STARTUP_BUDGET_MS", "").strip()
+        try:
+            budget_ms = float(budget) if budget else None
+        except ValueError:
+            budget_ms = None
+        print(self.format_report(budget_ms), file=stream or sys.stderr)
+
+
+__all__ = ["StartupTimer"]
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.cache import CACHE_ROOT
+from utils.embeddings import normalize_rows
+
+INDEX_ROOT = CACHE_ROOT / "vector_index"
+
+# À partir de cette taille, store_embeddings construit un index IVF par défaut.
+ANN_MIN_VECTORS = 20_000
+DEFAULT_NPROBE = 16
+# Lignes traitées par produit matriciel lors de l'affectation aux listes (borne la mémoire)
+_ASSIGN_BATCH = 65_536
+
+
+def _nearest_centroid(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), _ASSIGN_BATCH):
+        block = np.asarray(vectors[start:start + _ASSIGN_BATCH], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def _spherical_kmeans(data: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """K-means sur la sphère unité : centroïdes normalisés, affectation par produit scalaire."""
+
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _nearest_centroid(data, centroids)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=k)
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts[filled])[:-1]))
+        sums = np.add.reduceat(data[order], starts, axis=0)
+        centroids[filled] = sums
+        # Une liste vide est réamorcée sur un point tiré au hasard
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), size=len(empty), replace=False)]
+        centroids = normalize_rows(centroids)
+    return centroids
+
+
+def _atomic_replace(path: Path, write) -> None:
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            write(handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+class VectorIndex:
+    """Index vectoriel en mémoire, persistant sur disque sous forme de matrice NumPy.
+
+    Les vecteurs sont normalisés à l'ajout : la similarité cosinus d'une requête
+    avec tout l'index se réduit à un produit matriciel, et le top-k est extrait
+    avec ``argpartition`` sans trier l'ensemble des scores.
+
+    Sur disque, un index occupe un dossier : ``vectors.npy`` (float32, relu en
+    ``mmap``) et ``chunks.json`` (textes, métadonnées, nom de l'embedder et
+    ``info``, un dictionnaire libre décrivant la source indexée).
+
+    Pour les gros corpus, ``train_ivf`` ajoute un index approché de type IVF :
+    les vecteurs sont répartis en ``nlist`` listes autour de centroïdes
+    (k-means sphérique) et une recherche ne parcourt que les ``nprobe`` listes
+    les plus proches de la requête. Augmenter ``nprobe`` améliore le rappel au
+    prix de la latence ; ``nprobe=0`` force la recherche exacte. L'IVF est
+    enregistré à côté de l'index (``ivf.npz``).
+    """
+
+    VECTORS_FILE = "vectors.npy"
+    CHUNKS_FILE = "chunks.json"
+    IVF_FILE = "ivf.npz"
+
+    def __init__(self, dim: int, model_name: str, path: str | Path | None = None) -> None:
+        self.dim = dim
+        self.model_name = model_name
+        self.path = Path(path) if path is not None else None
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.chunks: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.info: Dict[str, Any] = {}
+        self.nprobe = int(os.environ.get("NEUROLEARN_ANN_NPROBE", DEFAULT_NPROBE))
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        # Identifiants des vecteurs triés par liste ; la liste i occupe _list_ids[_offsets[i]:_offsets[i + 1]]
+        self._list_ids = np.zeros(0, dtype=np.int64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+
+    @property
+    def has_ivf(self) -> bool:
+        return self._centroids is not None
+
+    @property
+    def centroids(self) -> Optional[np.ndarray]:
+        return self._centroids
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def add(
+        self,
+        vectors: np.ndarray,
+        chunks: Sequence[str],
+        metadata: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Dimension des vecteurs invalide : {vectors.shape}, attendu (n, {self.dim}).")
+        if len(vectors) != len(chunks):
+            raise ValueError("Le nombre de vecteurs et de chunks diffère.")
+        if metadata is not None and len(metadata) != len(chunks):
+            raise ValueError("Le nombre de métadonnées et de chunks diffère.")
+
+        vectors = normalize_rows(vectors)
+        self.vectors = np.vstack([self.vectors, vectors])
+        self.chunks.extend(chunks)
+        self.metadata.extend(dict(meta) for meta in (metadata or [{} for _ in chunks]))
+        if self._centroids is not None:
+            self._assignments = np.concatenate([self._assignments, _nearest_centroid(vectors, self._centroids)])
+            self._build_lists()
+
+    def train_ivf(self, nlist: Optional[int] = None, iterations: int = 10, sample_size: int = 100_000,
+                  seed: int = 0) -> None:
+        """Construit l'index IVF ; ``nlist`` vaut par défaut environ 4·√n listes."""
+
+        if not len(self):
+            raise ValueError("Impossible d'entraîner l'IVF sur un index vide.")
+        if nlist is None:
+            nlist = int(4 * np.sqrt(len(self)))
+        nlist = max(1, min(nlist, len(self)))
+
+        rng = np.random.default_rng(seed)
+        # Échantillon de quelques dizaines de points par liste, suffisant pour placer les centroïdes
+        sample_size = min(len(self), max(sample_size, nlist * 32))
+        sample_ids = np.sort(rng.choice(len(self), size=sample_size, replace=False))
+        sample = np.asarray(self.vectors[sample_ids], dtype=np.float32)
+        self.assign_ivf(_spherical_kmeans(sample, nlist, iterations, rng))
+
+    def assign_ivf(self, centroids: np.ndarray) -> None:
+        """Répartit les vecteurs autour de centroïdes existants, sans nouvel entraînement."""
+
+        self._centroids = np.asarray(centroids, dtype=np.float32)
+        self._assignments = _nearest_centroid(self.vectors, self._centroids)
+        self._build_lists()
+
+    def drop_ivf(self) -> None:
+        self._centroids = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._list_ids = np.zeros(0, dtype=np.int64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+
+    def _build_lists(self) -> None:
+        self._list_ids = np.argsort(self._assignments, kind="stable").astype(np.int64)
+        counts = np.bincount(self._assignments, minlength=len(self._centroids))
+        self._offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    def search(
+        self, queries: np.ndarray, top_k: int = 5, nprobe: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Renvoie ``(scores, indices)`` de forme ``(n_requêtes, k)``, du plus proche au moins proche.
+
+        Avec un IVF entraîné, seules les ``nprobe`` listes les plus proches sont
+        parcourues (``self.nprobe`` par défaut) ; sinon la recherche est exacte.
+        Une requête approchée peut renvoyer moins de ``k`` résultats : les
+        cases manquantes ont l'indice -1 et le score ``-inf``.
+        """
+
+        queries = normalize_rows(np.atleast_2d(queries))
+        k = min(top_k, len(self))
+        if k <= 0:
+            empty = np.zeros((len(queries), 0))
+            return empty.astype(np.float32), empty.astype(np.int64)
+
+        nprobe = self.nprobe if nprobe is None else nprobe
+        if self._centroids is not None and 0 < nprobe < len(self._centroids):
+            return self._search_ivf(queries, k, nprobe)
+
+        scores = queries @ self.vectors.T
+        return self._top_k(scores, np.arange(scores.shape[1]), k)
+
+    def _search_ivf(self, queries: np.ndarray, k: int, nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+        probes = np.argpartition(-(queries @ self._centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        all_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, lists) in enumerate(zip(queries, probes)):
+            candidates = np.concatenate([self._list_ids[self._offsets[i]:self._offsets[i + 1]] for i in lists])
+            if not len(candidates):
+                continue
+            scores, ids = self._top_k((self.vectors[candidates] @ query)[None, :], candidates, k)
+            all_scores[row, :scores.shape[1]] = scores[0]
+            all_ids[row, :ids.shape[1]] = ids[0]
+        return all_scores, all_ids
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k par ligne de ``scores`` ; ``ids`` traduit les colonnes en identifiants de vecteurs."""
+
+        k = min(k, scores.shape[1])
+        if k < scores.shape[1]:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape).copy()
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        return np.take_along_axis(candidate_scores, order, axis=1), ids[np.take_along_axis(candidates, order, axis=1)]
+
+    def save(self, path: str | Path | None = None) -> Path:
+        target = Path(path) if path is not None else self.path
+        if target is None:
+            raise ValueError("Aucun emplacement fourni pour enregistrer l'index.")
+        target.mkdir(parents=True, exist_ok=True)
+
+        # Copie en mémoire : un index relu en mmap ne doit plus tenir le fichier remplacé
+        self.vectors = vectors = np.array(self.vectors, dtype=np.float32)
+        _atomic_replace(target / self.VECTORS_FILE, lambda handle: np.save(handle, vectors))
+        payload = {
+            "model_name": self.model_name,
+            "dim": self.dim,
+            "chunks": self.chunks,
+            "metadata": self.metadata,
+            "info": self.info,
+        }
+        _atomic_replace(
+            target / self.CHUNKS_FILE,
+            lambda handle: handle.write(json.dumps(payload, ensure_ascii=False).encode("utf-8")),
+        )
+        ivf_path = target / self.IVF_FILE
+        if self._centroids is not None:
+            centroids, assignments = self._centroids, self._assignments
+            _atomic_replace(
+                ivf_path,
+                lambda handle: np.savez(handle, centroids=centroids, assignments=assignments),
+            )
+        elif ivf_path.exists():
+            ivf_path.unlink()
+        self.path = target
+        return target
+
+    @classmethod
+    def load(cls, path: str | Path) -> "VectorIndex":
+        source = Path(path)
+        with (source / cls.CHUNKS_FILE).open("r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        vectors = np.load(source / cls.VECTORS_FILE, mmap_mode="r")
+        if len(vectors) != len(payload["chunks"]):
+            raise ValueError(f"Index incohérent dans {source} : vecteurs et chunks diffèrent.")
+
+        index = cls(int(payload["dim"]), payload["model_name"], path=source)
+        index.vectors = vectors
+        index.chunks = list(payload["chunks"])
+        index.metadata = list(payload.get("metadata") or [{} for _ in index.chunks])
+        index.info = dict(payload.get("info") or {})
+
+        ivf_path = source / cls.IVF_FILE
+        if ivf_path.exists():
+            with np.load(ivf_path) as ivf:
+                if len(ivf["assignments"]) == len(index):
+                    index._centroids = ivf["centroids"]
+                    index._assignments = ivf["assignments"]
+                    index._build_lists()
+        return index
+
+    @classmethod
+    def exists(cls, path: str | Path) -> bool:
+        source = Path(path)
+        return (source / cls.VECTORS_FILE).exists() and (source / cls.CHUNKS_FILE).exists()
+
+
+__all__ = ["ANN_MIN_VECTORS", "DEFAULT_NPROBE", "INDEX_ROOT", "VectorIndex"]